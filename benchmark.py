@@ -0,0 +1,228 @@
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from detector import util
+from detector.constants import options
+from detector.detector import DiagramTypeDetector, ShapeDetector, line_backends
+from detector.primitives.hierarchy_index import HierarchyIndex
+
+ap = argparse.ArgumentParser()
+
+
+def init_args():
+    ap.add_argument("-hi", "--hierarchy", required=False, action="store_true",
+                    help="Benchmarks the leaf lookups of the contour hierarchy for growing contour counts.")
+    ap.add_argument("-co", "--contours", required=False,
+                    help="Path to an image. Benchmarks the detection of the image with every contour mode.")
+    ap.add_argument("-lb", "--line-backends", required=False,
+                    help="Path to an image. Compares the segment count and speed of every line backend on the image.")
+    ap.add_argument("-cl", "--color-modes", required=False,
+                    help="Path to an image. Benchmarks the detection of the image in color and in gray mode.")
+    ap.add_argument("-ld", "--loading", required=False,
+                    help="Path to an image. Compares decoding the image at full and at reduced resolution.")
+    ap.add_argument("-sm", "--scale-modes", required=False,
+                    help="Path to an image. Benchmarks the detection of the image with every scale mode.")
+    ap.add_argument("-ti", "--tiles", required=False,
+                    help="Path to an image. Benchmarks the detection of the image at its full width with and without "
+                         "tiles.")
+    ap.add_argument("-ts", "--tile-sizes", required=False, nargs='+', type=int, default=[0, 2048, 1024, 512],
+                    help="Tile sizes that are benchmarked, 0 processes the working copy at once.")
+    ap.add_argument("-tw", "--tile-workers", required=False, type=int, default=1,
+                    help="Amount of tiles that are processed in parallel.")
+    ap.add_argument("-n", "--sizes", required=False, nargs='+', type=int, default=[500, 1000, 2000, 4000],
+                    help="Contour counts that are benchmarked.")
+
+
+def timed(fn, *args, **kwargs):
+    """
+    Calls the given function and measures its duration.
+    :return: A tuple containing (result, seconds)
+    """
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def create_random_hierarchy(size, seed=0):
+    """
+    Creates a random but consistent contour hierarchy in the format findContours returns.
+    :param size: Amount of contours
+    :param seed: Seed of the random generator
+    :return: Hierarchy array of shape (1, size, 4)
+    """
+    rng = np.random.RandomState(seed)
+    hierarchy = np.full((1, size, 4), -1, dtype=np.int32)
+
+    last_child = {}
+    for i in range(size):
+        parent = rng.randint(-1, i) if i > 0 else -1
+        hierarchy[0][i][3] = parent
+
+        previous = last_child.get(parent, -1)
+        if previous > -1:
+            hierarchy[0][previous][0] = i
+            hierarchy[0][i][1] = previous
+        elif parent > -1:
+            hierarchy[0][parent][2] = i
+        last_child[parent] = i
+
+    return hierarchy
+
+
+def benchmark_hierarchy(sizes):
+    """
+    Compares labeling all leaf contours by scanning the hierarchy per contour with using a prebuilt HierarchyIndex.
+    """
+    util.log("contours | per-call scan (s) | index build + lookups (s)")
+    for size in sizes:
+        hierarchy = create_random_hierarchy(size)
+
+        scan_leaves, scan_seconds = timed(lambda: [i for i in range(size) if util.has_no_contour_children(i, hierarchy)])
+
+        def indexed():
+            index = HierarchyIndex(hierarchy)
+            return [i for i in range(size) if util.has_no_contour_children(i, index)]
+        index_leaves, index_seconds = timed(indexed)
+
+        assert scan_leaves == index_leaves
+        util.log(f"{size:8d} | {scan_seconds:17.4f} | {index_seconds:25.4f}")
+
+
+def benchmark_contour_modes(img_path):
+    """
+    Detects and converts the given image with every contour mode and compares the memory of the stored contours and
+    the duration of the detection.
+    """
+    results = []
+    for mode in options.CONTOUR_MODES:
+        shape_detector = ShapeDetector(img_path, {'contour_mode': mode})
+        _, detect_seconds = timed(shape_detector.find_shapes)
+        converter = DiagramTypeDetector.find_converter(shape_detector)
+        _, convert_seconds = timed(converter.convert)
+
+        points = sum(len(c) for c in shape_detector.contours)
+        results.append((mode, points, util.contours_nbytes(shape_detector.contours), detect_seconds, convert_seconds))
+
+    _, base_points, base_bytes, base_detect, base_convert = results[0]
+    util.log("mode     | points   | bytes      | detect (s) | convert (s) | memory saved | time saved")
+    for mode, points, nbytes, detect_seconds, convert_seconds in results:
+        memory_saved = 1 - nbytes / float(base_bytes) if base_bytes else 0
+        time_saved = 1 - (detect_seconds + convert_seconds) / (base_detect + base_convert)
+        util.log(f"{mode:8s} | {points:8d} | {nbytes:10d} | {detect_seconds:10.4f} | {convert_seconds:11.4f} | "
+                 f"{memory_saved:12.1%} | {time_saved:10.1%}")
+
+
+def benchmark_line_backends(img_path):
+    """
+    Detects the line segments of the preprocessed image with every line backend.
+    """
+    image = ShapeDetector(img_path).preprocessed_image
+
+    util.log("backend  | segments | seconds  | segments/s")
+    for name, count, seconds, rate in line_backends.compare(image):
+        util.log(f"{name:8s} | {count:8d} | {seconds:8.4f} | {rate:10.0f}")
+
+
+def benchmark_color_modes(img_path):
+    """
+    Detects and converts the given image with every color mode and compares the memory of the held images and the
+    duration of loading, detection and conversion.
+    """
+    util.log("mode  | images (bytes) | load (s) | detect (s) | convert (s) | total (s)")
+    for mode in options.COLOR_MODES:
+        shape_detector, load_seconds = timed(ShapeDetector, img_path, {'color_mode': mode})
+        _, detect_seconds = timed(shape_detector.find_shapes)
+        converter = DiagramTypeDetector.find_converter(shape_detector)
+        _, convert_seconds = timed(converter.convert)
+
+        images = [i for i in [shape_detector.orig_image, shape_detector.image] if i is not None] + \
+            list(shape_detector.context.planes.values())
+        nbytes = sum(i.nbytes for i in {id(i): i for i in images}.values())
+        total = load_seconds + detect_seconds + convert_seconds
+        util.log(f"{mode:5s} | {nbytes:14d} | {load_seconds:8.4f} | {detect_seconds:10.4f} | {convert_seconds:11.4f} | "
+                 f"{total:9.4f}")
+
+
+def benchmark_loading(img_path):
+    """
+    Loads the given image with and without keeping the full resolution original and compares the duration and the
+    memory of the held images.
+    """
+    util.log("policy        | images (bytes) | load (s)")
+    for keep_original in [True, False]:
+        shape_detector, load_seconds = timed(ShapeDetector, img_path, {'keep_original': keep_original})
+        nbytes = sum(i.nbytes for i in [shape_detector.orig_image, shape_detector.image] if i is not None)
+        policy = "keep original" if keep_original else "reduced"
+        util.log(f"{policy:13s} | {nbytes:14d} | {load_seconds:8.4f}")
+
+
+def benchmark_scale_modes(img_path):
+    """
+    Detects and converts the given image with every scale mode and compares the found entities, the share of the full
+    resolution image that is processed again and the duration of loading, detection and conversion.
+    """
+    util.log("mode    | entities | full res pixels | load (s) | detect (s) | convert (s) | total (s)")
+    for mode in options.SCALE_MODES:
+        shape_detector, load_seconds = timed(ShapeDetector, img_path, {'scale_mode': mode})
+        _, detect_seconds = timed(shape_detector.find_shapes)
+        converter = DiagramTypeDetector.find_converter(shape_detector)
+        entities, convert_seconds = timed(converter.convert)
+
+        pyramid = shape_detector.pyramid
+        share = pyramid.processed_pixels / float(pyramid.full.shape[0] * pyramid.full.shape[1]) if pyramid else 0
+        total = load_seconds + detect_seconds + convert_seconds
+        util.log(f"{mode:7s} | {len(entities):8d} | {share:15.1%} | {load_seconds:8.4f} | {detect_seconds:10.4f} | "
+                 f"{convert_seconds:11.4f} | {total:9.4f}")
+
+
+def benchmark_tiles(img_path, tile_sizes, workers):
+    """
+    Detects and converts the given image at its full width with every tile size and compares the found entities, the
+    peak memory that is allocated during detection and conversion and their duration.
+    """
+    image = cv2.imread(img_path)
+    util.log(f"working width {image.shape[1]}, {workers} workers")
+    util.log("tile size | entities | peak (bytes) | detect (s) | convert (s)")
+    for tile_size in tile_sizes:
+        shape_detector = ShapeDetector(options={'working_width': image.shape[1], 'tile_size': tile_size,
+                                                'tile_workers': workers})
+        shape_detector.load(image)
+
+        tracemalloc.start()
+        _, detect_seconds = timed(shape_detector.find_shapes)
+        converter = DiagramTypeDetector.find_converter(shape_detector)
+        entities, convert_seconds = timed(converter.convert)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        util.log(f"{tile_size:9d} | {len(entities):8d} | {peak:12d} | {detect_seconds:10.4f} | {convert_seconds:11.4f}")
+
+
+if __name__ == '__main__':
+    init_args()
+    args = vars(ap.parse_args())
+
+    if args['hierarchy']:
+        benchmark_hierarchy(args['sizes'])
+
+    if args['contours'] is not None:
+        benchmark_contour_modes(args['contours'])
+
+    if args['line_backends'] is not None:
+        benchmark_line_backends(args['line_backends'])
+
+    if args['color_modes'] is not None:
+        benchmark_color_modes(args['color_modes'])
+
+    if args['loading'] is not None:
+        benchmark_loading(args['loading'])
+
+    if args['scale_modes'] is not None:
+        benchmark_scale_modes(args['scale_modes'])
+
+    if args['tiles'] is not None:
+        benchmark_tiles(args['tiles'], args['tile_sizes'], args['tile_workers'])
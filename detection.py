@@ -1,16 +1,46 @@
 import os
+import sys
 import argparse
 from detector import util, draw_util
-from detector.constants import options as options
+from detector.constants import constants, options as options
 from detector.detector import *
-from detector.export.class_diagram_image_exporter import ClassDiagramImageExporter
+from detector import batch
+from detector.manifest import Manifest
 
 ap = argparse.ArgumentParser()
 
 
 def init_args():
-    ap.add_argument("-i", "--image", required=True, help="Path to the image you want to detect")
+    source = ap.add_mutually_exclusive_group()
+    source.add_argument("-i", "--image", help="Path to the image you want to detect")
+    source.add_argument("-b", "--batch", nargs='+',
+                        help="Directories, glob patterns or file lists (one path per line) of the images you want to "
+                             "detect. Every image gets its own result in the output directory.")
     ap.add_argument("-s", "--save", required=False, help="Path the result will be saved at")
+    ap.add_argument("-od", "--output-dir", required=False, default=constants.OUTPUT_PATH,
+                    help="Directory the results of a batch are saved in.")
+    ap.add_argument("-w", "--workers", required=False, type=int, default=None,
+                    help="Amount of worker processes of a batch, default: amount of cores.")
+    ap.add_argument("-ct", "--cv-threads", required=False, type=int, default=1,
+                    help="Amount of threads OpenCV uses in each worker process of a batch.")
+    ap.add_argument("-pl", "--pipeline", required=False, action="store_true",
+                    help="Detects a batch in a pipeline of threads instead of worker processes, which overlaps "
+                         "loading, preprocessing, exporting and saving with the detection of the neighbouring images.")
+    ap.add_argument("-sw", "--stage-workers", required=False, type=int, nargs=len(batch.PIPELINE_STAGES),
+                    default=[1] * len(batch.PIPELINE_STAGES), metavar=tuple(s.upper() for s in batch.PIPELINE_STAGES),
+                    help="Amount of threads of the load, preprocess, detect, convert, export and save stage of the "
+                         "pipeline.")
+    ap.add_argument("-qs", "--queue-size", required=False, type=int, default=4,
+                    help="Maximum amount of images that wait for each stage of the pipeline.")
+    ap.add_argument("-m", "--manifest", required=False,
+                    help="Path of a SQLite manifest that records the state of each image of a batch. Images that are "
+                         "done are skipped when the batch is started again.")
+    ap.add_argument("-p", "--progress", required=False, action="store_true",
+                    help="Prints the progress recorded in the manifest and exits. Can be used while a batch is running.")
+    ap.add_argument("-r", "--retries", required=False, type=int, default=2,
+                    help="How often a failed image of a batch is detected again.")
+    ap.add_argument("-bo", "--backoff", required=False, type=float, default=1.0,
+                    help="Seconds before the first retry of a failed image, which double with every further retry.")
     ap.add_argument("-v", "--verbose", required=False, help="Prints details about the detection")
     ap.add_argument("-c", "--custom", required=False,
                     help="Set this parameter in order to define how the detection should be handled. If not -c is not"
@@ -23,6 +53,49 @@ def init_args():
                     help="Defines the value (epsilon) that is used to approximate contours.", nargs='?',
                     const=options.DEFAULT_CONTOUR_EPSILON, type=float, default=options.DEFAULT_CONTOUR_EPSILON)
 
+    ap.add_argument("-cm", "--contour-mode", required=False, choices=options.CONTOUR_MODES,
+                    default=options.DEFAULT_CONTOUR_MODE,
+                    help="Defines how the points of the detected contours are stored. 'simple' and 'polygon' need "
+                         "less memory on large images.")
+
+    ap.add_argument("-cl", "--color-mode", required=False, choices=options.COLOR_MODES,
+                    default=options.DEFAULT_COLOR_MODE,
+                    help="Defines whether the image is processed with its colors or as single channel gray image. "
+                         "'gray' is faster and needs less memory, colors are only used for the exported image.")
+
+    ap.add_argument("-ko", "--keep-original", required=False, action="store_true",
+                    help="Decodes and keeps the image in full resolution. By default large images are decoded at a "
+                         "reduced resolution close to the size of the working copy.")
+
+    ap.add_argument("-sm", "--scale-mode", required=False, choices=options.SCALE_MODES,
+                    default=options.DEFAULT_SCALE_MODE,
+                    help="Defines at which resolutions the image is processed. 'pyramid' detects the diagram in the "
+                         "working copy and refines line ends, small symbols and OCR crops at full resolution.")
+
+    ap.add_argument("-ww", "--working-width", required=False, type=int, default=util.WORKING_COPY_WIDTH,
+                    help="Width of the working copy all detection happens on.")
+
+    ap.add_argument("-ts", "--tile-size", required=False, type=int, default=options.DEFAULT_TILE_SIZE,
+                    help="Processes the working copy in overlapping tiles of the given size, whose results are "
+                         "stitched together. Bounds the memory of the derived images on wide working copies. Has to be "
+                         "at least twice the overlap. The contours are the same as without tiles, the line segments "
+                         "are found tile by tile and may differ: a line end can move by a few pixels and a short "
+                         "segment can be missing or added, which can join or split an association at a symbol.")
+
+    ap.add_argument("-to", "--tile-overlap", required=False, type=int, default=options.DEFAULT_TILE_OVERLAP,
+                    help="Pixels neighbouring tiles share, at least 8.")
+
+    ap.add_argument("-tw", "--tile-workers", required=False, type=int, default=options.DEFAULT_TILE_WORKERS,
+                    help="Amount of tiles that are processed in parallel.")
+
+    ap.add_argument("-cw", "--converter-workers", required=False, type=int, default=options.DEFAULT_CONVERTER_WORKERS,
+                    help="Amount of converter tasks that run at the same time, e.g. the OCR of the classes while the "
+                         "associations are extracted.")
+
+    ap.add_argument("-lb", "--line-backend", required=False, choices=options.LINE_BACKENDS,
+                    default=options.DEFAULT_LINE_BACKEND,
+                    help="Defines how line segments are detected. Compare the backends with benchmark.py -lb.")
+
     ap.add_argument("-dl", "--lines", required=False, help="Set this parameter in order to toggle the line detection.",
                     action="store_true")
 
@@ -37,38 +110,67 @@ if __name__ == '__main__':
     img_path = args["image"]
     output_path = args["save"]
 
+    if args['progress']:
+        if args['manifest'] is None:
+            ap.error("--progress requires --manifest")
+        with Manifest(args['manifest']) as manifest:
+            counts = manifest.progress()
+            total = sum(counts.values())
+            util.log(f"{counts[Manifest.DONE]} of {total} images done "
+                     f"({counts[Manifest.DONE] / total if total else 0:.1%}), {counts[Manifest.FAILED]} failed, "
+                     f"{counts[Manifest.PENDING]} pending")
+            for path, attempts, error in manifest.failures():
+                util.log(f"\tfailed after {attempts} attempts: {path}: {error.strip().splitlines()[-1]}")
+        sys.exit(0)
+
+    if img_path is None and args['batch'] is None:
+        ap.error("one of the arguments -i/--image -b/--batch is required")
+
+    opts = {
+        'ocr': args['ocr'],
+        'contour_epsilon': args['epsilon'],
+        'contour_mode': args['contour_mode'],
+        'line_backend': args['line_backend'],
+        'color_mode': args['color_mode'],
+        'keep_original': args['keep_original'],
+        'scale_mode': args['scale_mode'],
+        'working_width': args['working_width'],
+        'tile_size': args['tile_size'],
+        'tile_overlap': args['tile_overlap'],
+        'tile_workers': args['tile_workers'],
+        'converter_workers': args['converter_workers']
+    }
+    util.log(f"Passed options: {str(opts)}")
+
+    if args['batch'] is not None:
+        img_paths = batch.collect_images(args['batch'])
+        manifest = Manifest(args['manifest']) if args['manifest'] is not None else None
+        if args['pipeline']:
+            results = batch.run_pipeline(img_paths, opts, args['output_dir'], args['stage_workers'],
+                                         args['queue_size'], manifest, args['retries'], args['backoff'])
+        else:
+            results = batch.run(img_paths, opts, args['output_dir'], args['workers'], args['cv_threads'], manifest,
+                                args['retries'], args['backoff'])
+        if manifest is not None:
+            manifest.close()
+        sys.exit(1 if any(r[3] is not None for r in results) else 0)
+
     print(img_path)
     if os.path.isfile(img_path):
-        opts = {
-            'ocr': args['ocr'],
-            'contour_epsilon': args['epsilon']
-        }
-        util.log(f"Passed options: {str(opts)}")
-
-        shape_detector = ShapeDetector(img_path, opts)
-        img = shape_detector.image
-
         if not args['custom']:  # Start default diagram detection
-            shapes = shape_detector.find_shapes()
-
-            # Print shapes
-            for s in shapes:
-                util.log(f"\t{s}")
-
-            diagram_converter = DiagramTypeDetector.find_converter(shape_detector)
-            diagram_converter.convert()
-
-            classDiagramImageExporter = ClassDiagramImageExporter(img, diagram_converter, opts)
-            img = classDiagramImageExporter.export()
+            img = batch.detect_diagram(img_path, opts)
 
         else:  # custom behaviour
+            shape_detector = ShapeDetector(img_path, opts)
+            img = util.to_color(shape_detector.image)
+
             if args['shapes']:
                 shapes = shape_detector.find_shapes()
                 img = draw_util.draw_shapes_on_image(img, shapes)
 
             if args['lines']:
-                line_detector = LineDetector()
-                line_detector.init(shape_detector.preprocessed_image)
+                line_detector = LineDetector(args['line_backend'])
+                line_detector.init(shape_detector.get_preprocessed_image())
                 line_detector.find_lines()
                 lines = line_detector.merge_lines()
 
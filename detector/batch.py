@@ -0,0 +1,308 @@
+import collections
+import glob
+import hashlib
+import heapq
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+
+from detector.detector import DiagramTypeDetector, ShapeDetector
+from detector.export.class_diagram_image_exporter import ClassDiagramImageExporter
+from detector import util
+from detector.pipeline import Pipeline, Stage
+from detector.util import log
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+""" Extensions of the files that are taken from directories and globs. """
+
+PIPELINE_STAGES = ("load", "preprocess", "detect", "convert", "export", "save")
+""" Stages of run_pipeline, whose amount of threads can be set separately. """
+
+
+def collect_images(sources):
+    """
+    Collects the paths of the images of the given sources. A source is either an image, a directory whose images are
+    taken recursively, a glob pattern or a file list with one path per line. Each image is returned once, in the order
+    the sources were given.
+    :param sources: List of sources
+    :return: List of image paths
+    """
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(sorted(p for p in glob.glob(os.path.join(source, '**', '*'), recursive=True)
+                                if is_image(p)))
+        elif os.path.isfile(source) and not is_image(source):
+            with open(source) as file_list:
+                paths.extend(line.strip() for line in file_list if line.strip() and not line.startswith('#'))
+        elif os.path.isfile(source):
+            paths.append(source)
+        else:
+            paths.extend(sorted(p for p in glob.glob(source, recursive=True) if is_image(p)))
+
+    return list(dict.fromkeys(os.path.normpath(p) for p in paths))
+
+
+def is_image(path):
+    return os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def output_filename(img_path):
+    """
+    Returns the name of the result file of the given image. Images with the same name in different directories get
+    different results, because the name contains a hash of the absolute path of the image.
+    :param img_path: Path of the image
+    :return: Name of the result file
+    """
+    name = os.path.splitext(os.path.basename(img_path))[0]
+    digest = hashlib.sha1(os.path.abspath(img_path).encode('utf-8')).hexdigest()[:10]
+    return f"{name}-{digest}.png"
+
+
+def detect_diagram(img_path, opts):
+    """
+    Runs the diagram detection on the given image and exports the result.
+    :param img_path: Path of the image
+    :param opts: Options of the detection (see detection.py)
+    :return: The exported image
+    """
+    shape_detector = detect_shapes(ShapeDetector(img_path, opts))
+    return export_diagram(convert_diagram(shape_detector), opts)
+
+
+def detect_shapes(shape_detector):
+    """
+    Finds the shapes in the image of the given shape detector.
+    :param shape_detector: ShapeDetector that has loaded and preprocessed the image
+    :return: The shape detector
+    """
+    shapes = shape_detector.find_shapes()
+
+    # Print shapes
+    for s in shapes:
+        util.log(f"\t{s}")
+    return shape_detector
+
+
+def convert_diagram(shape_detector):
+    """
+    Converts the shapes of the given shape detector to the entities of the detected diagram type.
+    :param shape_detector: ShapeDetector that has found the shapes
+    :return: The diagram converter
+    """
+    diagram_converter = DiagramTypeDetector.find_converter(shape_detector)
+    diagram_converter.convert()
+    return diagram_converter
+
+
+def export_diagram(diagram_converter, opts):
+    """
+    Exports the entities of the given diagram converter to an image.
+    :param diagram_converter: Diagram converter that has converted the shapes
+    :param opts: Options of the detection (see detection.py)
+    :return: The exported image
+    """
+    exporter = ClassDiagramImageExporter(diagram_converter.shape_detector.image, diagram_converter, opts)
+    return exporter.export()
+
+
+def init_worker(cv_threads):
+    """
+    Limits the threads OpenCV uses in a worker process, so the worker processes do not oversubscribe the cores.
+    :param cv_threads: Amount of threads per worker
+    """
+    cv2.setNumThreads(cv_threads)
+
+
+def process_image(img_path, opts, output_path):
+    """
+    Detects the given image and saves the result. Errors are returned instead of raised, so one broken image does not
+    stop the batch.
+    :param img_path: Path of the image
+    :param opts: Options of the detection
+    :param output_path: Directory the result is saved in
+    :return: A tuple containing (image path, result path or None, seconds, error or None)
+    """
+    start = time.perf_counter()
+    try:
+        if not os.path.isfile(img_path):
+            raise ValueError("Image doesn't exist")
+
+        filename = output_filename(img_path)
+        util.save_image(detect_diagram(img_path, opts), filename, output_path)
+        return img_path, os.path.join(output_path, filename), time.perf_counter() - start, None
+    except Exception:
+        return img_path, None, time.perf_counter() - start, traceback.format_exc()
+
+
+def run(img_paths, opts, output_path, workers=None, cv_threads=1, manifest=None, retries=0, backoff=1.0):
+    """
+    Detects all given images in a pool of worker processes and saves one result per image in the output path. Failed
+    images are retried with an exponential backoff. If a worker process dies, e.g. by a crash of OpenCV or the OOM
+    killer, the images that were running fail and the pool is created again.
+    :param img_paths: Paths of the images
+    :param opts: Options of the detection
+    :param output_path: Directory the results are saved in
+    :param workers: Amount of worker processes, default: amount of cores
+    :param cv_threads: Amount of threads OpenCV uses in each worker
+    :param manifest: Manifest the results are recorded in. Images that it lists as done are skipped.
+    :param retries: How often a failed image is detected again
+    :param backoff: Seconds before the first retry, which double with every further retry
+    :return: List of the final (image path, result path or None, seconds, error or None) tuples, in the order they
+             finished
+    """
+    os.makedirs(output_path, exist_ok=True)
+    workers = workers or os.cpu_count()
+    if manifest is not None:
+        todo = manifest.prepare(img_paths, opts)
+        log(f"Batch: {len(img_paths) - len(todo)} of {len(img_paths)} images are already done")
+        img_paths = todo
+    log(f"Batch: {len(img_paths)} images, {workers} workers with {cv_threads} OpenCV threads each")
+
+    results = []
+    attempts = {}
+    retry_queue = []
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(workers, initializer=init_worker, initargs=(cv_threads,))
+    try:
+        running = {}
+
+        def submit(img_path):
+            attempts[img_path] = attempts.get(img_path, 0) + 1
+            running[pool.submit(process_image, img_path, opts, output_path)] = (img_path, pool, time.perf_counter())
+
+        # Only as many images as there are workers are submitted, so a dead worker only fails the running images
+        waiting = collections.deque(img_paths)
+        while running or retry_queue or waiting:
+            while retry_queue and retry_queue[0][0] <= time.monotonic():
+                waiting.appendleft(heapq.heappop(retry_queue)[1])
+            while waiting and len(running) < workers:
+                submit(waiting.popleft())
+
+            timeout = max(retry_queue[0][0] - time.monotonic(), 0) if retry_queue else None
+            finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in finished:
+                img_path, owner, submitted = running.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    # A dead worker fails all images of its pool, that were in progress
+                    broken = broken or owner is pool
+                    result = img_path, None, time.perf_counter() - submitted, traceback.format_exc()
+                _, output, seconds, error = result
+                if manifest is not None:
+                    manifest.record(img_path, output, seconds, error)
+
+                if error is not None and attempts[img_path] <= retries:
+                    delay = backoff * 2 ** (attempts[img_path] - 1)
+                    log(f"Batch: {img_path} failed after {seconds:.2f}s, retry {attempts[img_path]} of {retries} "
+                        f"in {delay:.1f}s")
+                    heapq.heappush(retry_queue, (time.monotonic() + delay, img_path))
+                    continue
+
+                if error is not None:
+                    log(f"Batch: {img_path} failed after {seconds:.2f}s\n{error}")
+                results.append(result)
+
+            if broken:
+                log("Batch: a worker process died, creating a new pool")
+                pool.shutdown(wait=False)
+                pool = ProcessPoolExecutor(workers, initializer=init_worker, initargs=(cv_threads,))
+    finally:
+        pool.shutdown()
+
+    log(summary(results, time.perf_counter() - start))
+    return results
+
+
+def run_pipeline(img_paths, opts, output_path, workers=(1, 1, 1, 1, 1, 1), queue_size=4, manifest=None, retries=0,
+                 backoff=1.0):
+    """
+    Detects all given images in a pipeline of threads in this process and saves one result per image in the output
+    path. Each step of the detection is a stage of the pipeline: load, preprocess, detect, convert, export and save.
+    While one image is detected, the next ones are loaded and preprocessed and the previous ones are exported and
+    saved. The failed images of a pass are retried in another pass after an exponential backoff.
+    :param img_paths: Paths of the images
+    :param opts: Options of the detection
+    :param output_path: Directory the results are saved in
+    :param workers: Amount of threads of each stage, in the order of PIPELINE_STAGES
+    :param queue_size: Maximum amount of images that wait for each stage
+    :param manifest: Manifest the results are recorded in. Images that it lists as done are skipped.
+    :param retries: How often a failed image is detected again
+    :param backoff: Seconds before the first retry, which double with every further retry
+    :return: List of the final (image path, result path or None, seconds, error or None) tuples, in the order they
+             finished
+    """
+    os.makedirs(output_path, exist_ok=True)
+    if manifest is not None:
+        todo = manifest.prepare(img_paths, opts)
+        log(f"Batch: {len(img_paths) - len(todo)} of {len(img_paths)} images are already done")
+        img_paths = todo
+    log(f"Batch: {len(img_paths)} images, pipeline with " +
+        ", ".join(f"{n} {name}" for name, n in zip(PIPELINE_STAGES, workers)) +
+        f" threads, queues of {queue_size} images")
+
+    def load(img_path, _):
+        if not os.path.isfile(img_path):
+            raise ValueError("Image doesn't exist")
+        return ShapeDetector(img_path, opts, preprocess=False)
+
+    def preprocess(_, shape_detector):
+        shape_detector.preprocess()
+        return shape_detector
+
+    def save(img_path, image):
+        filename = output_filename(img_path)
+        util.save_image(image, filename, output_path)
+        return os.path.join(output_path, filename)
+
+    functions = [load, preprocess, lambda _, shape_detector: detect_shapes(shape_detector),
+                 lambda _, shape_detector: convert_diagram(shape_detector),
+                 lambda _, diagram_converter: export_diagram(diagram_converter, opts), save]
+    pipeline = Pipeline([Stage(name, fn, n, queue_size) for name, fn, n in zip(PIPELINE_STAGES, functions, workers)])
+
+    results = []
+    attempt = 0
+    start = time.perf_counter()
+    while img_paths:
+        failed = []
+        for result in pipeline.run(img_paths):
+            img_path, output, error, seconds = result
+            if manifest is not None:
+                manifest.record(img_path, output, seconds, error)
+
+            if error is not None and attempt < retries:
+                failed.append(img_path)
+                continue
+
+            if error is not None:
+                log(f"Batch: {img_path} failed after {seconds:.2f}s\n{error}")
+            results.append((img_path, output, seconds, error))
+
+        if failed:
+            attempt += 1
+            delay = backoff * 2 ** (attempt - 1)
+            log(f"Batch: {len(failed)} images failed, retry {attempt} of {retries} in {delay:.1f}s")
+            time.sleep(delay)
+        img_paths = failed
+
+    for line in pipeline.metrics():
+        log(f"Pipeline: {line}")
+    log(summary(results, time.perf_counter() - start))
+    return results
+
+
+def summary(results, seconds):
+    """
+    Returns the aggregate throughput and the failure count of the given results.
+    :param results: Results of run
+    :param seconds: Wall time of the batch
+    """
+    failures = sum(1 for r in results if r[3] is not None)
+    rate = len(results) / seconds if seconds > 0 else 0
+    return f"Batch: {len(results)} images in {seconds:.2f}s, {rate:.2f} images/s, {failures} failed"
@@ -0,0 +1,122 @@
+import cv2
+import numpy as np
+
+
+class Canvas:
+    """
+    Overlay that queues lines, rectangles, contours and text and rasterizes all of them onto a single copy of an image
+    in one pass, instead of copying the image for every drawn primitive. The primitives are drawn in the order they
+    were queued. Consecutive lines and contours with the same style are drawn with one OpenCV call.
+    """
+
+    LINE = "line"
+    RECTANGLE = "rectangle"
+    CONTOURS = "contours"
+    TEXT = "text"
+
+    def __init__(self):
+        self.operations = []
+        """ Queued operations as tuples of (kind, style, item). """
+
+    def __len__(self):
+        return len(self.operations)
+
+    def line(self, start, end, color, thickness=2):
+        """
+        Queues a line.
+        :param start: (x, y) tuple of the start point
+        :param end: (x, y) tuple of the end point
+        :param color: Color of the line
+        :param thickness: Thickness of the line
+        """
+        points = np.array([Canvas._point(start), Canvas._point(end)], dtype=np.int32)
+        self.operations.append((Canvas.LINE, (color, thickness), points))
+
+    def polyline(self, points, color, thickness=2):
+        """
+        Queues an open polyline through the given points.
+        :param points: List of (x, y) tuples
+        :param color: Color of the polyline
+        :param thickness: Thickness of the polyline
+        """
+        points = np.array([Canvas._point(p) for p in points], dtype=np.int32)
+        self.operations.append((Canvas.LINE, (color, thickness), points))
+
+    def rectangle(self, p1, p2, color, thickness=2):
+        """
+        Queues a rectangle.
+        :param p1: (x, y) tuple of the first point of the rectangle
+        :param p2: (x, y) tuple of the second point of the rectangle
+        :param color: Color of the rectangle
+        :param thickness: Thickness of the rectangle, -1 fills it
+        """
+        self.operations.append((Canvas.RECTANGLE, (color, thickness), (Canvas._point(p1), Canvas._point(p2))))
+
+    def contours(self, contours, color, thickness=2):
+        """
+        Queues contours.
+        :param contours: List of contours
+        :param color: Color of the contours
+        :param thickness: Thickness of the contours
+        """
+        for c in contours:
+            self.operations.append((Canvas.CONTOURS, (color, thickness), c))
+
+    def text(self, text, pos, size=0.4, color=(0, 0, 0), thickness=1):
+        """
+        Queues text.
+        :param text: Text you want to draw
+        :param pos: xy-Coordinates as tuple the text will be drawn at
+        :param size: Size of the text
+        :param color: Color of the text
+        :param thickness: Thickness of the text
+        """
+        self.operations.append((Canvas.TEXT, (size, color, thickness), (text, Canvas._point(pos))))
+
+    def render(self, image, copy=True):
+        """
+        Draws all queued operations onto the given image.
+        :param image: The image everything is drawn onto
+        :param copy: Defines if the operations are drawn onto a copy of the image (True) or onto the image itself
+        :return: The image with all operations drawn onto
+        """
+        if copy:
+            image = image.copy()
+
+        for kind, style, items in self._batches():
+            if kind == Canvas.LINE:
+                color, thickness = style
+                cv2.polylines(image, items, False, color, thickness)
+
+            elif kind == Canvas.CONTOURS:
+                color, thickness = style
+                cv2.drawContours(image, items, -1, color, thickness)
+
+            elif kind == Canvas.RECTANGLE:
+                color, thickness = style
+                for p1, p2 in items:
+                    cv2.rectangle(image, p1, p2, color, thickness)
+
+            elif kind == Canvas.TEXT:
+                size, color, thickness = style
+                for text, pos in items:
+                    cv2.putText(image, text, pos, cv2.FONT_HERSHEY_SIMPLEX, size, color, thickness, cv2.LINE_AA)
+
+        return image
+
+    def _batches(self):
+        """
+        Groups consecutive operations of the same kind and style.
+        :return: List of tuples (kind, style, items)
+        """
+        batches = []
+        for kind, style, item in self.operations:
+            if batches and batches[-1][0] == kind and batches[-1][1] == style:
+                batches[-1][2].append(item)
+            else:
+                batches.append((kind, style, [item]))
+        return batches
+
+    @staticmethod
+    def _point(p):
+        return int(p[0]), int(p[1])
@@ -1,2 +1,66 @@
 DEFAULT_CONTOUR_EPSILON = 0.04
 """ Defines the Epsilon that is used to approximate contours. """
+
+CONTOUR_MODE_NONE = "none"
+""" Stores every boundary pixel of a contour (CHAIN_APPROX_NONE). """
+
+CONTOUR_MODE_SIMPLE = "simple"
+""" Compresses horizontal, vertical and diagonal segments of a contour to their end points (CHAIN_APPROX_SIMPLE). """
+
+CONTOUR_MODE_POLYGON = "polygon"
+""" Stores only the approximated polygon of a contour, which is computed once during detection. """
+
+CONTOUR_MODES = [CONTOUR_MODE_NONE, CONTOUR_MODE_SIMPLE, CONTOUR_MODE_POLYGON]
+
+DEFAULT_CONTOUR_MODE = CONTOUR_MODE_NONE
+""" Defines how the points of detected contours are stored. """
+
+LINE_BACKEND_LSD = "lsd"
+""" Line Segment Detector of OpenCV. """
+
+LINE_BACKEND_HOUGHP = "houghp"
+""" Probabilistic Hough transform on the Canny edges. """
+
+LINE_BACKEND_SKELETON = "skeleton"
+""" Traces the skeleton of the strokes. """
+
+LINE_BACKENDS = [LINE_BACKEND_LSD, LINE_BACKEND_HOUGHP, LINE_BACKEND_SKELETON]
+
+DEFAULT_LINE_BACKEND = LINE_BACKEND_LSD
+""" Defines how line segments are detected. """
+
+COLOR_MODE_COLOR = "color"
+""" Decodes the image with its colors and converts it to gray during preprocessing. """
+
+COLOR_MODE_GRAY = "gray"
+""" Decodes the image as single channel gray image and keeps it single channel until an exporter draws on it. """
+
+COLOR_MODES = [COLOR_MODE_COLOR, COLOR_MODE_GRAY]
+
+DEFAULT_COLOR_MODE = COLOR_MODE_COLOR
+""" Defines whether the image is processed with its colors or as gray image. """
+
+SCALE_MODE_FIXED = "fixed"
+""" Detects everything in the working copy, which is resized to a fixed width. """
+
+SCALE_MODE_PYRAMID = "pyramid"
+""" Detects the diagram in the working copy, that is not wider than the image, and processes only the regions around
+the associations and the classes again at full resolution. """
+
+SCALE_MODES = [SCALE_MODE_FIXED, SCALE_MODE_PYRAMID]
+
+DEFAULT_SCALE_MODE = SCALE_MODE_FIXED
+""" Defines at which resolutions the image is processed. """
+
+DEFAULT_TILE_SIZE = 0
+""" Width and height of the tiles the working copy is processed in, 0 to process the working copy at once. Has to be at
+least twice the tile overlap (see Tiler). """
+
+DEFAULT_TILE_OVERLAP = 128
+""" Pixels neighbouring tiles share. """
+
+DEFAULT_TILE_WORKERS = 1
+""" Amount of tiles that are processed in parallel. """
+
+DEFAULT_CONVERTER_WORKERS = 2
+""" Amount of converter tasks, like the association extraction and the OCR of the classes, that run at the same time. """
@@ -1,12 +1,20 @@
+import numpy as np
+
 from detector import util, draw_util
-from detector.constants import constants
+from detector.constants import constants, options
 from detector.detector.line_detector import LineDetector
 from detector.primitives.line import Line
+from detector.primitives.line_set import LineSet
+from detector.primitives.point import Point
+from detector.primitives.polyline import Polyline
 from detector.primitives.shape import Shape
+from detector.primitives.shape_table import ShapeTable
 from detector.primitives.shape_type import ShapeType
 from detector.util import log
 from detector.converter.diagram_converter import DiagramConverter
 from detector.primitives.generic_entity import GenericEntity
+from detector.spatial import BoxIndex
+from detector.task_graph import TaskGraph
 
 
 class ClassDiagramTypes:
@@ -24,20 +32,52 @@ class ClassDiagramConverter(DiagramConverter):
     MIN_AREA_CLASS_RECTANGLES = 50
     """ Defines the minimum area a rectangle needs to have in order to be noticed as part of a class"""
 
+    SYMBOL_SEARCH_MARGIN = 50
+    """ Defines how far around a class the symbols that touch the class are searched for """
+
+    LINE_END_SEARCH_MARGIN = 10
+    """ Defines how far around a line end the stroke is searched for at full resolution in the pyramid scale mode """
+
+    SMALL_SYMBOL_SEARCH_MARGIN = 15
+    """ Defines how far around a line end the symbols, that are too small for the working copy, are searched for at
+    full resolution in the pyramid scale mode """
+
     STR_ASSOC_FROM = "ASSOCIATION_FROM"
     STR_ASSOC_TO = "ASSOCIATION_TO"
     STR_ASSOC_PART = "ASSOCIATION_PART"
     STR_CLASS_NAME = "CLASS_NAME"
 
     def convert(self):
+        """
+        Converts the shapes into class diagram entities. The ocr task runs at the same time as the associations, refine
+        and join tasks: it only reads the classes and the pyramid and sets the texts of the class shapes, which the other
+        tasks do not use, while they add the associations to the thread safe EntityStore.
+        :return: An array of GenericEntities
+        """
         log("transform to class primitives")
-        self.generic_entities = self.generic_entities + self._extract_classes()
-        self.generic_entities = self.generic_entities + self._extract_associations()
-        self._join_lines_with_association_symbols()
-        self._link_associations_with_classes()
+        graph = TaskGraph(self.shape_detector.get_option('converter_workers', options.DEFAULT_CONVERTER_WORKERS))
+        graph.add("classes", lambda: self.entity_store.extend(self._extract_classes()))
+        graph.add("associations", lambda: self.entity_store.extend(self._extract_associations()), after=["classes"])
+        if self.shape_detector.get_option('ocr', False):
+            graph.add("ocr", self._recognize_class_texts, after=["classes"])
+        graph.add("refine", self._refine_at_full_resolution, after=["associations"])
+        graph.add("join", self._join_lines_with_association_symbols, after=["refine"])
+        graph.add("link", self._link_associations_with_classes, after=["join"])
+        graph.run()
+        log(f"Converter tasks: {graph.stats()}")
 
         return self.generic_entities
 
+    def _recognize_class_texts(self):
+        """
+        Recognizes the text of the compartments of all classes. Only depends on the classes, so it runs while the
+        associations are extracted. In the pyramid scale mode the compartments are cropped at full resolution.
+        """
+        pyramid = self.shape_detector.pyramid
+        for c in self.get_generic_entities(types=[ClassDiagramTypes.CLASS_ENTITY]):
+            for s in c.shapes:
+                s.ocr(pyramid.crop(s.bounding_box())[0] if pyramid is not None else None)
+
     def _extract_classes(self):
         """
         Extracts the class entities from a class diagram sketch.
@@ -50,26 +90,22 @@ class ClassDiagramConverter(DiagramConverter):
         log(f"Extract classes from {len(self.shape_detector.shapes)} shapes")
 
         found_classes = []
-        sorted_contours = self.shape_detector.sort_contours_by_parent()
+        table = self.shape_detector.shape_table
+        boxes = table.bounding_boxes()
         class_counter = 0
-        for k, v in sorted_contours.items():
-            v = [v for k,v in enumerate(v) if util.area_contour(v) > ClassDiagramConverter.MIN_AREA_CLASS_RECTANGLES]
-            contour_groups = util.group_contours_by_x_pos(v)
+        for parent, indices in table.group_by_parent().items():
+            indices = indices[table.features['area'][indices] > ClassDiagramConverter.MIN_AREA_CLASS_RECTANGLES]
 
-            for group_key, group_value in contour_groups.items():
+            # Group the compartments by the bounding boxes of the shape table
+            for group_positions in util.group_boxes_by_x_pos(boxes[indices]):
                 # Create class entities
-                if len(group_value) == 3:
+                if len(group_positions) == 3:
                     new_class = GenericEntity(ClassDiagramTypes.CLASS_ENTITY)
                     new_class.set(constants.STR_GENERIC_ENTITY_LABEL_NAME, f"Class {class_counter}")
 
-                    # Add shapes to class
-                    new_class.add_shape(self.shape_detector.create_shape(group_value[0]))
-                    new_class.add_shape(self.shape_detector.create_shape(group_value[1]))
-                    new_class.add_shape(self.shape_detector.create_shape(group_value[2]))
-
-                    # new_class.set("name_contour", group_value[0])
-                    # new_class.set("attribute_contour", group_value[1])
-                    # new_class.set("method_contour", group_value[2])
+                    # Add shapes to class, which are taken from the shape table instead of being created again
+                    for shape in table.shapes(indices[group_positions]):
+                        new_class.add_shape(shape)
 
                     found_classes.append(new_class)
                     class_counter += 1
@@ -82,24 +118,82 @@ class ClassDiagramConverter(DiagramConverter):
         Main method that calls the sub methods in order to extract all associations from the image.
         :return: An array of GenericEntities, were each GenericEntity contains an extracted association
         """
+        if self.shape_detector.tiler is not None:
+            return self._extract_associations_in_tiles(self.shape_detector.tiler)
+
         # Remove class entitites in order to find associations
-        img = util.remove_generic_entities_in_image(self.shape_detector.image, self.generic_entities, ClassDiagramTypes.CLASS_ENTITY)
-        advanced_associations = self._extract_advanced_associations(img)
+        img = util.remove_generic_entities_in_image(self.shape_detector.image, self.generic_entities, ClassDiagramTypes.CLASS_ENTITY,
+                                                    preprocessed_image=self.shape_detector.context.binary())
+        advanced_associations = self._extract_advanced_associations(img.shape[:2], lambda region: util.crop(img, region))
         img = util.remove_generic_entities_in_image(img, advanced_associations, ClassDiagramTypes.ASSOCIATION_SYMBOL, preprocess=False)
         simple_associations = self._extract_simple_associations(img)
 
         return simple_associations + advanced_associations
 
+    def _extract_associations_in_tiles(self, tiler):
+        """
+        Extracts the associations like _extract_associations, but the binary image without the classes and symbols is
+        only created for the regions that are processed, i.e. the tiles and the regions around the classes.
+        :param tiler: Tiler of the working copy
+        :return: An array of GenericEntities, were each GenericEntity contains an extracted association
+        """
+        boxes = [s.bounding_box() for e in self.get_generic_entities(types=[ClassDiagramTypes.CLASS_ENTITY])
+                 for s in e.shapes]
+        advanced_associations = self._extract_advanced_associations(
+            tiler.image.shape[:2], lambda region: util.remove_boxes_in_image(tiler.binary(region), boxes, region[:2]))
+
+        boxes = boxes + [s.bounding_box() for e in advanced_associations for s in e.shapes]
+        simple_associations = self._extract_simple_associations_in_tiles(
+            tiler, lambda region: util.remove_boxes_in_image(tiler.binary(region), boxes, region[:2]))
+
+        return simple_associations + advanced_associations
+
     def _extract_simple_associations(self, image):
         """
         Tries to extract the associations that are simple lines between classes.
         :param image: The image the associations are extracted from
         :return: An array of GenericEntities, were each GenericEntity contains the extracted association
         """
-        line_detector = LineDetector()
+        line_detector = LineDetector(self.shape_detector.get_option('line_backend', options.DEFAULT_LINE_BACKEND))
         line_detector.init(image)
         line_detector.find_lines()
-        lines = line_detector.merge_lines()
+        line_detector.fuse_parallel_edges()
+        return self._associations_of_lines(line_detector)
+
+    def _extract_simple_associations_in_tiles(self, tiler, crop):
+        """
+        Tries to extract the associations that are simple lines between classes tile by tile. Segments that end in the
+        overlap of two tiles are only kept by the tile that owns them (see Tiler.owns_segments), so segments made up by
+        a tile border are dropped. The segments of all tiles are fused afterwards, which joins the segments that were
+        cut by a tile border and the segments that were found twice in the overlap of two tiles.
+        :param tiler: Tiler of the working copy
+        :param crop: Function that returns the image of a (x1, y1, x2, y2) region, the associations are extracted from
+        :return: An array of GenericEntities, were each GenericEntity contains the extracted association
+        """
+        backend = self.shape_detector.get_option('line_backend', options.DEFAULT_LINE_BACKEND)
+
+        def detect(region):
+            tile_detector = LineDetector(backend)
+            tile_detector.init(crop(region))
+            tile_detector.find_lines()
+            tile_detector.fuse_parallel_edges()
+            segments = tile_detector.line_set.segments + np.array([region[0], region[1], region[0], region[1]])
+            return segments[tiler.owns_segments(region, segments)]
+
+        line_detector = LineDetector(backend)
+        line_detector.lines = LineSet(np.concatenate(tiler.map(detect)))
+        return self._associations_of_lines(line_detector)
+
+    def _associations_of_lines(self, line_detector):
+        """
+        Fuses and assembles the line segments of the given LineDetector into polylines and creates an association for
+        each polyline.
+        :param line_detector: LineDetector that holds the found segments
+        :return: An array of GenericEntities, were each GenericEntity contains the extracted association
+        """
+        line_detector.fuse_collinear_lines()
+        line_detector.merge_lines()
+        lines = line_detector.assemble_polylines()
         log(f"{len(lines)} lines found")
 
         found_associations = []
@@ -111,26 +205,215 @@ class ClassDiagramConverter(DiagramConverter):
         log(f"{len(found_associations)} simple associations found")
         return found_associations
 
-    def _extract_advanced_associations(self, image):
+    def _extract_advanced_associations(self, size, crop):
         """
         Tries to extract the associations such as inheritance, aggregation, composition between classes.
-        :param image: The image the associations are extracted from
+        :param size: (height, width) of the image the associations are extracted from
+        :param crop: Function that returns a (x1, y1, x2, y2) region of the image without classes
         :return: An array of GenericEntities, were each GenericEntity contains an extracted association
         """
         found_associations = []
 
         # Extract inheritance shapes
-        shapes, _, _ = self.shape_detector.find_shapes_in_image(image)
-        for shape in shapes:
-            if shape.shape is ShapeType.TRIANGLE or shape.shape is ShapeType.RECTANGLE:
-                log(f"Advanced association found: {shape}")
-                assoc = GenericEntity(ClassDiagramTypes.ASSOCIATION_SYMBOL)
-                assoc.add_shape(shape)
-                found_associations.append(assoc)
+        for shape in self._find_association_symbols(size, crop):
+            log(f"Advanced association found: {shape}")
+            assoc = GenericEntity(ClassDiagramTypes.ASSOCIATION_SYMBOL)
+            assoc.add_shape(shape)
+            found_associations.append(assoc)
 
         log(f"{len(found_associations)} advanced associations found")
         return found_associations
 
+    def _find_association_symbols(self, size, crop):
+        """
+        Finds the triangles and rectangles that are association symbols. The contours of the first detection pass are
+        reused for all symbols that are away from the removed class regions, because they are found unchanged in the
+        image without classes. Only the regions around the classes, where the removal cuts contours, are detected again.
+        :param size: (height, width) of the image the classes were removed from
+        :param crop: Function that returns a (x1, y1, x2, y2) region of the image the classes were removed from
+        :return: List of Shapes
+        """
+        table = self.shape_detector.shape_table
+        symbol_types = [ShapeType.TRIANGLE, ShapeType.RECTANGLE]
+
+        # Regions that were removed from the image (see util.remove_contours_in_image)
+        removed = BoxIndex()
+        class_regions = []
+        for c in self.get_generic_entities(types=[ClassDiagramTypes.CLASS_ENTITY]):
+            boxes = [util.grow_box(s.bounding_box(), util.EROSION_BY) for s in c.shapes if type(s) is Shape]
+            for box in boxes:
+                removed.add(box, len(class_regions))
+            class_regions.append(util.union_box(boxes))
+
+        def touches_removed(box):
+            return len(removed.intersecting(util.grow_box(box, 1))) > 0
+
+        # Symbols of the first pass
+        boxes = table.bounding_boxes()
+        candidates = np.flatnonzero(np.isin(table.features['shape_type'], symbol_types))
+        symbols = [table.shape(i) for i in candidates if not touches_removed(tuple(boxes[i]))]
+
+        # Symbols around the classes, that are detected again in small regions of interest
+        height, width = size
+        found = set()
+        for region in class_regions:
+            x, y, w, h = util.grow_box(region, ClassDiagramConverter.SYMBOL_SEARCH_MARGIN)
+            x1, y1, x2, y2 = max(x, 0), max(y, 0), min(x + w + 1, width), min(y + h + 1, height)
+
+            roi_shapes, _, _ = self.shape_detector.find_shapes_in_image(crop((x1, y1, x2, y2)), (x1, y1))
+            for shape in roi_shapes:
+                bx, by, bw, bh = box = shape.bounding_box()
+
+                # Shapes that reach a border of the region, which is not a border of the image, may be cut off
+                cut = (x1 > 0 and bx <= x1) or (y1 > 0 and by <= y1) or \
+                      (x2 < width and bx + bw >= x2) or (y2 < height and by + bh >= y2)
+                if shape.shape in symbol_types and not cut and touches_removed(box) and box not in found:
+                    found.add(box)
+                    symbols.append(shape)
+
+        return symbols
+
+    def _refine_at_full_resolution(self):
+        """
+        Processes the regions around the ends of the simple associations again at full resolution, which is only done
+        in the pyramid scale mode. The line ends are moved to where their strokes end and the symbols, that were too
+        small to be found in the working copy, are added. All findings are mapped back to the working copy.
+        """
+        pyramid = self.shape_detector.pyramid
+        if pyramid is None or pyramid.scale <= 1:
+            return
+
+        associations = self.get_generic_entities(types=[ClassDiagramTypes.ASSOCIATION_ENTITY])
+        for a in associations:
+            a.set_shape(0, self._refine_line_ends(pyramid, a.shapes[0]))
+
+        found_symbols = []
+        for shape in self._find_small_association_symbols(pyramid, associations):
+            log(f"Small association symbol found: {shape}")
+            symbol = GenericEntity(ClassDiagramTypes.ASSOCIATION_SYMBOL)
+            symbol.add_shape(shape)
+            found_symbols.append(symbol)
+        self.entity_store.extend(found_symbols)
+
+        log(f"{len(associations)} line ends refined and {len(found_symbols)} small symbols found, {pyramid.stats()}")
+
+    def _refine_line_ends(self, pyramid, line):
+        """
+        Refines both ends of the given line at full resolution.
+        :param pyramid: ImagePyramid of the image
+        :param line: Line or Polyline
+        :return: A new Line or Polyline with the refined ends
+        """
+        points = list(line.points) if isinstance(line, Polyline) else [line.start(), line.end()]
+        start = self._refine_line_end(pyramid, points[1], points[0])
+        end = self._refine_line_end(pyramid, points[-2], points[-1])
+        points[0], points[-1] = start, end
+
+        return Polyline(points) if isinstance(line, Polyline) else Line(start, end)
+
+    def _refine_line_end(self, pyramid, previous, end):
+        """
+        Moves the given line end to where its stroke ends in the full resolution image. The stroke pixels are searched
+        in a corridor along the last segment of the line, whose width is the maximum stroke width. The end is moved
+        along the segment to the farthest pixel that is connected to it and across the segment to the middle of the
+        stroke.
+        :param pyramid: ImagePyramid of the image
+        :param previous: Point before the end, which defines the direction of the last segment
+        :param end: Point of the end
+        :return: The refined end as Point in coordinates of the working copy
+        """
+        margin = ClassDiagramConverter.LINE_END_SEARCH_MARGIN
+        direction = np.array(end.get_xy_tuple(), dtype=np.float64) - previous.get_xy_tuple()
+        length = np.hypot(*direction)
+        if length == 0:
+            return end
+        direction /= length
+        normal = np.array([-direction[1], direction[0]])
+
+        ex, ey = end.get_xy_tuple()
+        context, (ox, oy) = pyramid.context((int(ex) - margin, int(ey) - margin, 2 * margin, 2 * margin))
+        ys, xs = np.nonzero(context.binary())
+
+        # Pixel centers in coordinates of the working copy, relative to the end
+        pixels = pyramid.to_coarse(np.stack([xs + ox + 0.5, ys + oy + 0.5], axis=1)) - 0.5 - (ex, ey)
+        along = pixels @ direction
+        across = pixels @ normal
+        in_corridor = (np.abs(across) <= LineDetector.max_stroke_width / 2) & (np.abs(along) <= margin)
+        if not in_corridor.any():
+            return end
+
+        # Runs of the stroke along the segment, that are separated by gaps of more than one pixel
+        values = np.sort(along[in_corridor])
+        runs = np.split(values, np.flatnonzero(np.diff(values) > 1) + 1)
+        reached = [i for i, run in enumerate(runs) if run[-1] >= -1]
+        if len(reached) == 0:
+            return end
+
+        # The stroke of the line is the run that reaches the end, unless the run only starts behind the end
+        i = reached[0]
+        if runs[i][0] > 1:
+            if i == 0:
+                return end
+            i -= 1
+        t = runs[i][-1]
+
+        behind = in_corridor & (along >= runs[i][0]) & (along <= 0)
+        offset = np.median(across[behind]) if behind.any() else 0
+
+        x, y = np.array([ex, ey]) + t * direction + offset * normal
+        return Point(float(x), float(y))
+
+    def _find_small_association_symbols(self, pyramid, associations):
+        """
+        Finds the triangles and rectangles at the ends of the given associations in the full resolution image. Ends
+        that already have a symbol of the working copy are skipped.
+        :param pyramid: ImagePyramid of the image
+        :param associations: Simple association entities, whose line ends are searched
+        :return: List of Shapes in coordinates of the working copy
+        """
+        margin = ClassDiagramConverter.SMALL_SYMBOL_SEARCH_MARGIN
+        symbol_types = [ShapeType.TRIANGLE, ShapeType.RECTANGLE]
+        full_height, full_width = pyramid.full.shape[:2]
+
+        known = BoxIndex()
+        for s in self.get_generic_entities(types=[ClassDiagramTypes.ASSOCIATION_SYMBOL]):
+            known.add(s.bounding_box(), s.bounding_box())
+
+        symbols = []
+        for a in associations:
+            line = a.shapes[0]
+            for end in (line.start_xy(), line.end_xy()):
+                if len(known.containing(end)) > 0:
+                    continue
+
+                region = (int(end[0]) - margin, int(end[1]) - margin, 2 * margin, 2 * margin)
+                context, offset = pyramid.context(region)
+                x1, y1, x2, y2 = pyramid.to_full(region)
+
+                contours, hierarchy = self.shape_detector.find_contours_in_image(context.binary(), offset)
+                table = ShapeTable(contours, hierarchy)
+                boxes = table.bounding_boxes()
+                candidates = table.where(min_area=ClassDiagramConverter.MIN_AREA_CLASS_RECTANGLES)
+                for i in candidates[np.isin(table.features['shape_type'][candidates], symbol_types)]:
+                    bx, by, bw, bh = boxes[i]
+
+                    # Shapes that reach a border of the region, which is not a border of the image, may be cut off
+                    if (x1 > 0 and bx <= x1) or (y1 > 0 and by <= y1) or \
+                            (x2 < full_width and bx + bw >= x2 - 1) or (y2 < full_height and by + bh >= y2 - 1):
+                        continue
+
+                    contour = np.round(pyramid.to_coarse(contours[i] + 0.5) - 0.5).astype(np.int32)
+                    shape = Shape(contour, shape_type=int(table.features['shape_type'][i]),
+                                  sides=int(table.features['vertices'][i]), source_image=self.shape_detector.image)
+                    box = shape.bounding_box()
+                    # The refined end may lie in the stroke of the class border behind the symbol
+                    if util.is_point_in_area(end, util.grow_box(box, LineDetector.max_stroke_width)) and \
+                            len(known.intersecting(box)) == 0:
+                        known.add(box, box)
+                        symbols.append(shape)
+
+        return symbols
+
     def _join_lines_with_association_symbols(self):
         """
         Joins the found lines with the advanced association shapes, such as inheritance, aggregation and so on.
@@ -138,14 +421,24 @@ class ClassDiagramConverter(DiagramConverter):
         """
         lines_entities = self.get_generic_entities(types=[ClassDiagramTypes.ASSOCIATION_ENTITY])
         symbol_entities = self.get_generic_entities(types=[ClassDiagramTypes.ASSOCIATION_SYMBOL])
+        if len(lines_entities) == 0:
+            return
+
+        # Index the symbols by their bounding boxes, so each line end is only checked against the symbols around it
+        symbol_bbs = [s.bounding_box() for s in symbol_entities]
+        symbol_index = BoxIndex()
+        for i, symbol_bb in enumerate(symbol_bbs):
+            symbol_index.add(symbol_bb, i)
 
         for l in lines_entities:
-            line = l.shapes[0]  # GenericEntity of type ASSOCIATION_ENTITY always has just one shape, which is a Line
+            line = l.shapes[0]  # GenericEntity of type ASSOCIATION_ENTITY always has just one shape, which is a Line or Polyline
             line_start = line.start_xy()
             line_end = line.end_xy()
 
-            for s in symbol_entities:
-                symbol_bb = s.bounding_box()
+            candidates = sorted(set(symbol_index.containing(line_start)) | set(symbol_index.containing(line_end)))
+            for i in candidates:
+                s = symbol_entities[i]
+                symbol_bb = symbol_bbs[i]
 
                 if util.is_point_in_area(line_start, symbol_bb) or util.is_point_in_area(line_end, symbol_bb):
                     s = s.shapes[0]    # TODO: Don't assume we have only one shape!
@@ -168,12 +461,29 @@ class ClassDiagramConverter(DiagramConverter):
         assoc_entities = self.get_generic_entities(types=[ClassDiagramTypes.ASSOCIATION_ENTITY])
         advanced_entities = self.get_generic_entities(types=[ClassDiagramTypes.ASSOCIATION_ENTITY_ADVANCED])
 
+        # Index the associations by the boxes of their shapes and the ends of their lines, so each class is only
+        # checked against the associations around it
+        advanced_index = BoxIndex()
+        for i, a in enumerate(advanced_entities):
+            for advanced_shape in a.shapes:
+                if type(advanced_shape) is Shape:
+                    advanced_index.add(advanced_shape.bounding_box(), i)
+                elif isinstance(advanced_shape, Line):
+                    advanced_index.add_point(advanced_shape.start_xy(), i)
+                    advanced_index.add_point(advanced_shape.end_xy(), i)
+
+        assoc_index = BoxIndex()
+        for i, a in enumerate(assoc_entities):
+            assoc_index.add_point(a.shapes[0].start_xy(), i)
+            assoc_index.add_point(a.shapes[0].end_xy(), i)
+
         # Link class entities with remaining associations
         for c in class_entities:
             class_bounding_box = c.bounding_box(adjustment=constants.BOUNDING_BOX_ADJUSTMENT)
 
             # ... with advanced associations
-            for a in advanced_entities:
+            for i in advanced_index.intersecting(class_bounding_box):
+                a = advanced_entities[i]
                 for advanced_shape in a.shapes:
                     if type(advanced_shape) is Shape:
                         advanced_bounding_box = advanced_shape.bounding_box()
@@ -181,7 +491,7 @@ class ClassDiagramConverter(DiagramConverter):
                         if util.do_bounding_boxes_intersect(advanced_bounding_box, class_bounding_box) or util.do_bounding_boxes_intersect(class_bounding_box, advanced_bounding_box):
                             a.set(ClassDiagramConverter.STR_ASSOC_FROM, c)
 
-                    elif type(advanced_shape) is Line:
+                    elif isinstance(advanced_shape, Line):
                         line_start = advanced_shape.start_xy()
                         line_end = advanced_shape.end_xy()
 
@@ -189,8 +499,9 @@ class ClassDiagramConverter(DiagramConverter):
                             a.set(ClassDiagramConverter.STR_ASSOC_TO, c)
 
             # ... with simple associations
-            for a in assoc_entities:
-                line = a.shapes[0]  # GenericEntity of type ASSOCIATION_ENTITY always has just one shape, which is a Line
+            for i in assoc_index.intersecting(class_bounding_box):
+                a = assoc_entities[i]
+                line = a.shapes[0]  # GenericEntity of type ASSOCIATION_ENTITY always has just one shape, which is a Line or Polyline
                 line_start = line.start_xy()
                 line_end = line.end_xy()
 
@@ -207,7 +518,7 @@ class ClassDiagramConverter(DiagramConverter):
         return True
 
     def get_attributes(self):
-        attributes = util.get_contour_children_for(self.shape.contour_index, self.shape_detector.hierarchy)
+        attributes = util.get_contour_children_for(self.shape.contour_index, self.shape_detector.hierarchy_index)
         return attributes
 
     def draw_class_entities_on_img(self, entities):
@@ -1,10 +1,14 @@
+from detector.primitives.entity_store import EntityStore
+
+
 class DiagramConverter(object):
     CONVERTER_TYPE = None
 
     def __init__(self, shape_detector):
         self.shape_detector = shape_detector
         """ Shape detector, that contains all detected shapes, the contours and the contour hierarchy. """
-        self.generic_entities = []
+        self.entity_store = EntityStore()
+        """ Stores the found entities, indexed by their ID and their type. """
 
     def convert(self):
         raise NotImplementedError()
@@ -12,8 +16,25 @@ class DiagramConverter(object):
     def is_diagram(self):
         raise NotImplementedError()
 
+    @property
+    def generic_entities(self):
+        """ All found entities in the order they were found. The list must not be modified, add entities to the store. """
+        return self.entity_store.entities
+
+    @generic_entities.setter
+    def generic_entities(self, entities):
+        self.entity_store = EntityStore(entities)
+
     def get_generic_entities(self, types=[]):
         if len(types) > 0:
-            return [e for e in self.generic_entities if e.type in types]
+            return self.entity_store.of_type(types)
         else:
             return self.generic_entities
+
+    def get_generic_entity(self, id):
+        """
+        Returns the entity with the given ID.
+        :param id: ID of the entity
+        :return: The GenericEntity or None
+        """
+        return self.entity_store.get(id)
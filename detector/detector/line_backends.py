@@ -0,0 +1,234 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from detector.constants import options
+
+
+class LineBackend:
+    """
+    Finds line segments in a single channel image. Engines that are expensive to create, like the LineSegmentDetector,
+    are created once per thread and reused by every detection of that thread.
+    """
+
+    name = None
+    """ Name the backend is selected by (see options.LINE_BACKENDS). """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def create_engine(self):
+        """
+        Creates the engine the backend detects with. Backends without engine return None.
+        """
+        return None
+
+    def engine(self):
+        """
+        Returns the engine of the current thread, which is created on first access.
+        """
+        if not hasattr(self._local, 'engine'):
+            self._local.engine = self.create_engine()
+        return self._local.engine
+
+    def detect(self, image):
+        """
+        Finds the line segments in the given image.
+        :param image: Single channel image, the foreground or the edges have to be non zero
+        :return: Array of shape (n, 4), where each row is (x1, y1, x2, y2)
+        """
+        raise NotImplementedError
+
+    def _segments(lines):
+        if lines is None:
+            return np.zeros((0, 4), dtype=np.float32)
+        return np.asarray(lines, dtype=np.float32).reshape(-1, 4)
+
+
+class LSDBackend(LineBackend):
+    """
+    Line Segment Detector of OpenCV. Finds both edges of a stroke, which fuse_parallel_edges joins again.
+    """
+
+    name = options.LINE_BACKEND_LSD
+
+    def create_engine(self):
+        return cv2.createLineSegmentDetector()
+
+    def detect(self, image):
+        lines, width, prec, nfa = self.engine().detect(image)
+        return LineBackend._segments(lines)
+
+
+class HoughPBackend(LineBackend):
+    """
+    Probabilistic Hough transform on the Canny edges of the image.
+    """
+
+    name = options.LINE_BACKEND_HOUGHP
+
+    def __init__(self, rho=1, theta=np.pi / 180, threshold=20, min_line_length=20, max_line_gap=5):
+        super().__init__()
+        self.rho = rho
+        self.theta = theta
+        self.threshold = threshold
+        self.min_line_length = min_line_length
+        self.max_line_gap = max_line_gap
+
+    def detect(self, image):
+        edges = cv2.Canny(image, 50, 200, apertureSize=3)
+        lines = cv2.HoughLinesP(edges, self.rho, self.theta, self.threshold, minLineLength=self.min_line_length,
+                                maxLineGap=self.max_line_gap)
+        return LineBackend._segments(lines)
+
+
+class SkeletonBackend(LineBackend):
+    """
+    Thins the foreground of the image to one pixel wide skeletons and traces them. Every traced pixel chain is
+    approximated by a polygon, whose edges are the segments. Strokes result in one centerline instead of two edges.
+    """
+
+    name = options.LINE_BACKEND_SKELETON
+
+    def __init__(self, epsilon=2.0):
+        super().__init__()
+        self.epsilon = epsilon
+        """ Maximum distance of a traced pixel from the segment it is approximated by. """
+
+    def detect(self, image):
+        skeleton = SkeletonBackend.thin(image > 0)
+        segments = []
+        for chain in SkeletonBackend.trace(skeleton):
+            if len(chain) < 2:
+                continue
+            points = cv2.approxPolyDP(np.array(chain, dtype=np.int32).reshape(-1, 1, 2), self.epsilon, False)
+            points = points.reshape(-1, 2)
+            segments.extend((*a, *b) for a, b in zip(points, points[1:]))
+        return LineBackend._segments(segments if len(segments) > 0 else None)
+
+    def thin(mask):
+        """
+        Thins the given mask with the Zhang-Suen algorithm. Each sub iteration removes all deletable border pixels at
+        once, which are found with shifted views of the whole mask.
+        :param mask: Boolean mask of the foreground
+        :return: Boolean mask of the skeleton
+        """
+        image = np.pad(mask, 1).astype(np.uint8)
+        while True:
+            changed = False
+            for step in (0, 1):
+                p = image
+                # Neighbours P2 to P9, clockwise starting at the top
+                n = [p[:-2, 1:-1], p[:-2, 2:], p[1:-1, 2:], p[2:, 2:], p[2:, 1:-1], p[2:, :-2], p[1:-1, :-2], p[:-2, :-2]]
+                count = sum(n)
+                transitions = sum((n[k] == 0) & (n[(k + 1) % 8] == 1) for k in range(8))
+                if step == 0:
+                    side = (n[0] * n[2] * n[4] == 0) & (n[2] * n[4] * n[6] == 0)
+                else:
+                    side = (n[0] * n[2] * n[6] == 0) & (n[0] * n[4] * n[6] == 0)
+                delete = (p[1:-1, 1:-1] == 1) & (count >= 2) & (count <= 6) & (transitions == 1) & side
+                if delete.any():
+                    image[1:-1, 1:-1][delete] = 0
+                    changed = True
+            if not changed:
+                return image[1:-1, 1:-1].astype(bool)
+
+    def trace(skeleton):
+        """
+        Traces the given skeleton into chains of pixels. A chain runs between pixels that do not have exactly two
+        neighbours, i.e. loose ends and junctions. The remaining pixels form closed loops.
+        :param skeleton: Boolean mask of a one pixel wide skeleton
+        :return: List of chains, where each chain is a list of (x, y) tuples
+        """
+        ys, xs = np.nonzero(skeleton)
+        pixels = set(zip(xs.tolist(), ys.tolist()))
+        offsets = [(-1, -1), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0)]
+
+        def neighbours(p):
+            # Diagonal neighbours that are also reached through a direct neighbour are skipped, so staircases of the
+            # skeleton do not look like junctions
+            x, y = p
+            return [(x + dx, y + dy) for dx, dy in offsets if (x + dx, y + dy) in pixels and
+                    (dx == 0 or dy == 0 or ((x + dx, y) not in pixels and (x, y + dy) not in pixels))]
+
+        degree = {p: len(neighbours(p)) for p in pixels}
+        visited = set()
+        chains = []
+
+        def walk(start, first):
+            chain = [start, first]
+            visited.add(frozenset((start, first)))
+            previous, current = start, first
+            while degree[current] == 2:
+                following = [q for q in neighbours(current) if q != previous and frozenset((current, q)) not in visited]
+                if len(following) == 0:
+                    break
+                previous, current = current, following[0]
+                visited.add(frozenset((previous, current)))
+                chain.append(current)
+            return chain
+
+        for p in sorted(pixels, key=lambda p: (p[1], p[0])):
+            if degree[p] != 2:
+                for q in neighbours(p):
+                    if frozenset((p, q)) not in visited:
+                        chains.append(walk(p, q))
+
+        for p in sorted(pixels, key=lambda p: (p[1], p[0])):
+            for q in neighbours(p):
+                if frozenset((p, q)) not in visited:
+                    chains.append(walk(p, q))
+
+        return chains
+
+
+BACKENDS = {
+    options.LINE_BACKEND_LSD: LSDBackend,
+    options.LINE_BACKEND_HOUGHP: HoughPBackend,
+    options.LINE_BACKEND_SKELETON: SkeletonBackend
+}
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def get(name=options.DEFAULT_LINE_BACKEND):
+    """
+    Returns the shared instance of the backend with the given name, so its per thread engines are reused by all
+    LineDetectors.
+    :param name: Name of the backend (see options.LINE_BACKENDS)
+    :return: The LineBackend
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown line backend '{name}', expected one of {options.LINE_BACKENDS}")
+
+    with _shared_lock:
+        if name not in _shared:
+            _shared[name] = BACKENDS[name]()
+        return _shared[name]
+
+
+def compare(image, names=None, repeat=3):
+    """
+    Detects the segments of the same image with each of the given backends.
+    :param image: Single channel image
+    :param names: Names of the backends that are compared, default: all
+    :param repeat: How often each backend detects the image, the fastest run is reported
+    :return: List of (name, segment count, seconds, segments per second) tuples
+    """
+    results = []
+    for name in options.LINE_BACKENDS if names is None else names:
+        backend = get(name)
+        backend.engine()
+
+        seconds = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            segments = backend.detect(image)
+            duration = time.perf_counter() - start
+            seconds = duration if seconds is None else min(seconds, duration)
+
+        results.append((name, len(segments), seconds, len(segments) / seconds if seconds > 0 else 0))
+    return results
@@ -1,18 +1,45 @@
 from detector.primitives.line import Line
+from detector.primitives.line_set import LineSet
 from detector.primitives.point import Point
+from detector.constants import options
+from detector.detector import line_backends
+from detector.detector.polyline_assembler import PolylineAssembler
+from detector.spatial import BoxIndex, PointGrid
 from detector.util import *
 import detector.util as util
 import math
+import numpy as np
 
 
 class LineDetector:
     max_point_distance = 30
     """ Defines the maximum distance two points can have in order to be seen as one point """
 
-    def __init__(self):
+    max_snap_distance = 10
+    """ Defines the maximum distance of two line ends in order to be joined into one polyline """
+
+    collinear_angle_tolerance = 3
+    """ Defines the maximum angle in degrees between two segments in order to be seen as collinear """
+
+    collinear_offset_tolerance = 3
+    """ Defines the maximum perpendicular distance two segments can have in order to be seen as collinear """
+
+    collinear_max_gap = 10
+    """ Defines the maximum gap between two collinear segments in order to be fused into one segment """
+
+    max_stroke_width = 8
+    """ Defines the maximum distance of the two parallel edges of a stroke in order to be fused into its centerline """
+
+    min_edge_overlap = 0.5
+    """ Defines how much of the shorter of two parallel edges needs to lie beside the other one, as fraction of its length """
+
+    def __init__(self, backend=options.DEFAULT_LINE_BACKEND):
         self.edge_image = None
-        self.lines = []
-        self.LSD = None
+        self.line_set = LineSet()
+        """ Holds all found line segments. """
+
+        self.backend = line_backends.get(backend) if isinstance(backend, str) else backend
+        """ LineBackend that finds the line segments (see options.LINE_BACKENDS). """
 
         util.log("LineDetector initialized")
 
@@ -22,10 +49,18 @@ class LineDetector:
         Canny Edge'd by this method.
         :param image: Image that will be processed.
         """
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = util.to_gray(image)
         gauss = cv2.GaussianBlur(gray, (9, 9), 0)
         self.edge_image = cv2.Canny(gauss, 100, 150)
 
+    def init_with_context(self, context):
+        """
+        Initializes the Line Detector with the edges of the image of the given ImageContext, which are computed like
+        in init_with_image, but only once per image.
+        :param context: ImageContext of the image that will be processed.
+        """
+        self.edge_image = context.edges(100, 150, (9, 9))
+
     def init(self, canny_image):
         """
         Initializes the Line Detector with an image that already contains only its edges.
@@ -34,23 +69,23 @@ class LineDetector:
         """
         self.edge_image = canny_image
 
+    @property
+    def lines(self):
+        """ The found line segments as list of Line objects, which are views on the rows of the line set. """
+        return self.line_set.lines()
+
+    @lines.setter
+    def lines(self, lines):
+        self.line_set = LineSet.of(lines)
+
     def find_lines(self):
         """
-        Creates a LineSegmentDetector and finds lines in the image, which are stored and returned.
+        Finds lines in the image with the line backend, which are stored and returned.
         :return: List of Line objects
         """
-        self.lines = []
-        self.LSD = cv2.createLineSegmentDetector()
-        lines, width, prec, nfa = self.LSD.detect(self.edge_image)
-        # self.LSD.drawSegments(image, lines)
-
-        if lines is not None:
-            for i in range(len(lines)):
-                for x1, y1, x2, y2 in lines[i]:
-                    line = Line(Point(x1, y1), Point(x2, y2))
-                    self.lines.append(line)
+        self.line_set = LineSet(self.backend.detect(self.edge_image))
 
-        log(f"{len(self.lines)} lines found")
+        log(f"{len(self.line_set)} lines found with {self.backend.name}")
         return self.lines
 
     def is_same_point(point_a, point_b):
@@ -75,7 +110,7 @@ class LineDetector:
         return close
 
     def is_point_close(p1, p2):
-        return LineDetector.is_close(*p1.get_xy_tuple(), *p2.get_xy_tuple()) #and is_close(*p2.get_xy_tuple(), *p1.get_xy_tuple())
+        return LineDetector.is_close(*p1.get_xy_tuple(), *p2.get_xy_tuple(), max_distance=LineDetector.max_point_distance) #and is_close(*p2.get_xy_tuple(), *p1.get_xy_tuple())
 
     def is_close(x1, y1, x2, y2, max_distance=30):
         s1 = math.pow(x2 - x1, 2)
@@ -83,35 +118,322 @@ class LineDetector:
         d = math.sqrt(s1 + s2)
         return d <= max_distance
 
-    def is_line_in(lines, line):
-        for l in lines:
+    def is_line_in(lines, line, index=None):
+        """
+        Checks if the given lines contain a line that could be the same as the given line.
+        :param lines: Lines that are checked
+        :param line: Line we look for
+        :param index: PointGrid over the end points of the given lines (see index_lines). If it is given, only the
+                      lines with an end point near the start of the given line are checked.
+        :return: True if one of the lines could be the same line, False otherwise
+        """
+        for l in LineDetector._candidates(lines, line.start_xy(), index):
             if LineDetector.could_be_same_line(l, line):
                 return True
         return False
 
+    def index_lines(lines):
+        """
+        Creates a PointGrid over the start and end points of the given lines, that contains the line indices.
+        :param lines: Lines that are indexed
+        :return: The PointGrid
+        """
+        index = PointGrid(LineDetector.max_point_distance)
+        for i, l in enumerate(lines):
+            LineDetector._add_to_index(index, l, i)
+        return index
+
+    def _add_to_index(index, line, i):
+        index.add(line.start_xy(), i)
+        index.add(line.end_xy(), i)
+
+    def _candidates(lines, point, index=None):
+        """
+        Returns the lines that can have an end point close to the given point, in the order of the given lines.
+        :param lines: All lines
+        :param point: (x, y) tuple
+        :param index: PointGrid over the end points of the lines or None to return all lines
+        :return: List of lines
+        """
+        if index is None:
+            return lines
+        return [lines[i] for i in sorted(set(index.near(point)))]
+
     def merge_lines(self):
-        self.lines = self._merge_lines(self.lines)
+        self.line_set = self.line_set.select(self._merge_indices(self.line_set))
+        log(f"{len(self.line_set)} merged lines")
         return self.lines
 
-    def filter_lines(self, **args):
-        self.lines = self._filter_lines(self.lines, **args)
+    def fuse_parallel_edges(self, max_width=None, angle_tolerance=None):
+        """
+        Replaces the two parallel edges, that LSD finds on both sides of a thick stroke, with the centerline of the
+        stroke.
+        :param max_width: Maximum distance of the two edges, default: max_stroke_width
+        :param angle_tolerance: Maximum angle in degrees between the two edges, default: collinear_angle_tolerance
+        :return: List of Line objects
+        """
+        max_width = LineDetector.max_stroke_width if max_width is None else max_width
+        angle_tolerance = LineDetector.collinear_angle_tolerance if angle_tolerance is None else angle_tolerance
+
+        n = len(self.line_set)
+        self.line_set = LineDetector._fuse_parallel_edges(self.line_set, max_width, angle_tolerance, LineDetector.min_edge_overlap)
+        reduction = 1 - len(self.line_set) / n if n > 0 else 0
+        log(f"{n} lines fused into {len(self.line_set)} centerlines, reduction: {reduction:.1%}")
         return self.lines
 
-    def _filter_by_angle(lines, min_angle=0):
-        lines = [(l1, l2) for l1 in lines for l2 in lines if util.angle_between_lines(l1, l2) >= min_angle and LineDetector.are_lines_close(l1, l2)]
-        log(f"{len(lines)} angle lines")
-        return lines
+    def _fuse_parallel_edges(line_set, max_width, angle_tolerance, min_overlap):
+        """
+        Fuses pairs of antiparallel segments into their centerlines. LSD orients every segment by the gradient, so the
+        two edges of a stroke point into opposite directions. Candidates are the segments whose bounding boxes are at
+        most the maximum width apart, which are found with a BoxIndex, and every candidate pair is measured along the
+        direction of its own first segment. Each segment is paired with its closest antiparallel candidate that lies
+        beside it, and a pair is fused if both segments chose each other.
+
+        :param line_set: LineSet that will be fused
+        :param max_width: Maximum distance of the two segments of a pair
+        :param angle_tolerance: Maximum angle in degrees between one segment and the reversed other segment of a pair
+        :param min_overlap: Fraction of the shorter segment that needs to lie beside the other segment
+        :return: LineSet with the centerlines and the unpaired segments, in the order of the first segment of each
+                 centerline
+        """
+        n = len(line_set)
+        if n < 2:
+            return line_set
+
+        starts = line_set.starts().astype(np.float64)
+        ends = line_set.ends().astype(np.float64)
+        lengths = line_set.lengths()
+        directed = (ends - starts) / np.maximum(lengths, 1e-9)[:, None]
+        mids = (starts + ends) / 2
+
+        index = LineDetector._segment_index(line_set)
+        pairs = [(a, b) for a, box in enumerate(line_set.bounding_boxes().tolist())
+                 for b in index.intersecting(util.grow_box(box, max_width)) if b > a]
+        if len(pairs) == 0:
+            return line_set
+        i, j = np.array(pairs, dtype=np.intp).T
+
+        # Antiparallel segments, that lie beside each other, measured along the first segment of each pair
+        antiparallel = np.sum(directed[i] * directed[j], axis=1) < -np.cos(np.radians(angle_tolerance))
+        u = directed[i]
+        normals = np.stack([-u[:, 1], u[:, 0]], axis=1)
+        distances = np.absolute(np.sum((mids[j] - mids[i]) * normals, axis=1))
+
+        t_starts = np.sum((starts[j] - mids[i]) * u, axis=1)
+        t_ends = np.sum((ends[j] - mids[i]) * u, axis=1)
+        overlap = np.minimum(lengths[i] / 2, np.maximum(t_starts, t_ends)) - \
+            np.maximum(-lengths[i] / 2, np.minimum(t_starts, t_ends))
+        shorter = np.minimum(lengths[i], np.absolute(t_ends - t_starts))
+        beside = overlap >= min_overlap * shorter
+
+        candidates = antiparallel & (distances <= max_width) & beside & (shorter > 0)
+        i, j, distances = i[candidates], j[candidates], distances[candidates]
+
+        # Closest partner of every segment, pairs are kept if they are mutual
+        first = np.concatenate([i, j])
+        second = np.concatenate([j, i])
+        by_distance = np.lexsort((np.concatenate([distances, distances]), first))
+        chosen = np.unique(first[by_distance], return_index=True)[1]
+        partner = np.full(n, -1, dtype=np.intp)
+        partner[first[by_distance][chosen]] = second[by_distance][chosen]
+
+        pair_i = np.flatnonzero((partner >= 0) & (np.arange(n) < partner))
+        pair_i = pair_i[partner[partner[pair_i]] == pair_i]
+        pair_j = partner[pair_i]
+
+        # Centerlines run along the mean direction of their pair, which is the direction of the first segment
+        direction = directed[pair_i] - directed[pair_j]
+        direction /= np.maximum(np.linalg.norm(direction, axis=1), 1e-9)[:, None]
+        center = (mids[pair_i] + mids[pair_j]) / 2
+        t = np.stack([np.sum((points[pair] - center) * direction, axis=1)
+                      for points in (starts, ends) for pair in (pair_i, pair_j)], axis=1)
+        fused = np.hstack([center + t.min(axis=1)[:, None] * direction, center + t.max(axis=1)[:, None] * direction])
+
+        segments = line_set.segments.astype(np.float64)
+        segments[pair_i] = fused
+
+        keep = np.ones(n, dtype=bool)
+        keep[pair_j] = False
+        return LineSet(segments[keep])
+
+    def fuse_collinear_lines(self, angle_tolerance=None, offset_tolerance=None, max_gap=None):
+        """
+        Fuses the found lines that lie on the same straight line and overlap or nearly touch into one line each.
+        :param angle_tolerance: Maximum angle in degrees between collinear lines, default: collinear_angle_tolerance
+        :param offset_tolerance: Maximum perpendicular distance of collinear lines, default: collinear_offset_tolerance
+        :param max_gap: Maximum gap between two fused lines, default: collinear_max_gap
+        :return: List of Line objects
+        """
+        angle_tolerance = LineDetector.collinear_angle_tolerance if angle_tolerance is None else angle_tolerance
+        offset_tolerance = LineDetector.collinear_offset_tolerance if offset_tolerance is None else offset_tolerance
+        max_gap = LineDetector.collinear_max_gap if max_gap is None else max_gap
 
-    def _filter_lines(self, lines, min_length=None, max_length=None):
-        filtered_lines = lines
+        n = len(self.line_set)
+        self.line_set = LineDetector._fuse_collinear(self.line_set, angle_tolerance, offset_tolerance, max_gap)
+        log(f"{n} lines fused into {len(self.line_set)} collinear lines")
+        return self.lines
 
-        if min_length is not None:
-            filtered_lines = [l for l in filtered_lines if l.length() >= min_length]
+    def _fuse_collinear(line_set, angle_tolerance, offset_tolerance, max_gap):
+        """
+        Fuses collinear segments. The segments are visited from the longest to the shortest and each segment, that is
+        not fused yet, seeds a group on its own line. The group takes the segments, whose angle differs by at most the
+        angle tolerance from the seed, whose midpoints lie at most the offset tolerance beside the line of the seed and
+        which overlap or nearly touch the group along it. The group grows until no further segment reaches it, so it
+        is one run of segments. Candidates are only taken from a BoxIndex over the segments around the group, so a
+        group does not depend on the segments elsewhere in the image. Each group becomes one segment along the length
+        weighted mean direction of its own segments, that spans the whole run.
+
+        :param line_set: LineSet that will be fused
+        :param angle_tolerance: Maximum angle in degrees between a segment and the seed of its group
+        :param offset_tolerance: Maximum distance of the midpoint of a segment from the line of the seed of its group
+        :param max_gap: Maximum gap between two segments of a run
+        :return: LineSet with the fused segments, in the order of the first segment of each run
+        """
+        n = len(line_set)
+        if n < 2:
+            return line_set
+
+        starts = line_set.starts().astype(np.float64)
+        ends = line_set.ends().astype(np.float64)
+        lengths = line_set.lengths()
+        directed = (ends - starts) / np.maximum(lengths, 1e-9)[:, None]
+        mids = (starts + ends) / 2
+        min_cos = np.cos(np.radians(angle_tolerance))
+        index = LineDetector._segment_index(line_set)
+
+        segments = line_set.segments.astype(np.float64)
+        keep = np.ones(n, dtype=bool)
+        grouped = np.zeros(n, dtype=bool)
+        for seed in np.argsort(-lengths, kind='stable'):
+            if grouped[seed]:
+                continue
+            grouped[seed] = True
+            u = directed[seed]
+            normal = np.array([-u[1], u[0]])
+            t0, t1 = -lengths[seed] / 2, lengths[seed] / 2
+            members = [seed]
+
+            # Grow the group along the line of the seed, until no further segment reaches it
+            while True:
+                corridor = mids[seed] + np.outer([t0 - max_gap, t1 + max_gap], u)
+                x, y = corridor.min(axis=0)
+                w, h = corridor.max(axis=0) - (x, y)
+                candidates = np.array(index.intersecting(util.grow_box((x, y, w, h), offset_tolerance)), dtype=np.intp)
+                candidates = candidates[~grouped[candidates]]
+
+                c_starts = (starts[candidates] - mids[seed]) @ u
+                c_ends = (ends[candidates] - mids[seed]) @ u
+                c0 = np.minimum(c_starts, c_ends)
+                c1 = np.maximum(c_starts, c_ends)
+                accepted = (np.absolute(directed[candidates] @ u) >= min_cos) & \
+                           (np.absolute((mids[candidates] - mids[seed]) @ normal) <= offset_tolerance) & \
+                           (c0 <= t1 + max_gap) & (c1 >= t0 - max_gap)
+                if not accepted.any():
+                    break
+
+                grouped[candidates[accepted]] = True
+                members.extend(candidates[accepted].tolist())
+                t0 = min(t0, c0[accepted].min())
+                t1 = max(t1, c1[accepted].max())
+
+            # Segments that were not fused with any other segment are kept as they are
+            if len(members) == 1:
+                continue
+
+            # Angles are doubled for the mean, so 1 and 179 degrees average to 0
+            members = np.array(members, dtype=np.intp)
+            weights = lengths[members]
+            doubled = 2 * np.arctan2(directed[members, 1], directed[members, 0])
+            direction = 0.5 * np.arctan2(np.sum(weights * np.sin(doubled)), np.sum(weights * np.cos(doubled)))
+            group_u = np.array([np.cos(direction), np.sin(direction)])
+            group_normal = np.array([-group_u[1], group_u[0]])
+
+            offset = np.sum(weights * (mids[members] @ group_normal)) / max(np.sum(weights), 1e-9)
+            t = np.concatenate([starts[members] @ group_u, ends[members] @ group_u])
+            fused = np.concatenate([t.min() * group_u + offset * group_normal, t.max() * group_u + offset * group_normal])
+
+            # Fused segments take the direction most of their length points in, which does not depend on the order
+            # the segments were found in, e.g. tile by tile
+            first = members.min()
+            if np.sum(weights * (directed[members] @ group_u)) < 0:
+                fused = fused[[2, 3, 0, 1]]
+            segments[first] = fused
+            keep[members] = False
+            keep[first] = True
+
+        return LineSet(segments[keep])
+
+    def _segment_index(line_set):
+        """
+        Creates a BoxIndex over the bounding boxes of the given segments, that contains the segment indices.
+        :param line_set: LineSet that is indexed
+        :return: The BoxIndex
+        """
+        index = BoxIndex()
+        for i, box in enumerate(line_set.bounding_boxes().tolist()):
+            index.add(tuple(box), i)
+        return index
 
-        if max_length is not None:
-            filtered_lines = [l for l in filtered_lines if l.length() < max_length]
+    def assemble_polylines(self, snap_distance=None):
+        """
+        Joins the found lines, whose ends are close to each other, into ordered polylines.
+        :param snap_distance: Maximum distance of two line ends in order to be joined, default: max_snap_distance
+        :return: List of Polyline objects
+        """
+        snap_distance = LineDetector.max_snap_distance if snap_distance is None else snap_distance
+        polylines = PolylineAssembler(snap_distance).assemble(self.line_set)
+        log(f"{len(self.line_set)} lines assembled into {len(polylines)} polylines")
+        return polylines
 
-        return filtered_lines
+    def filter_lines(self, **args):
+        self.line_set = self.line_set.select(self._filter_lines(self.line_set, **args))
+        return self.lines
+
+    def _filter_by_angle(lines, min_angle=0):
+        """
+        Returns all pairs of the given lines that enclose at least the given angle and have close end points. The end
+        points are indexed in a PointGrid, so only the pairs of close end points are compared.
+        :param lines: LineSet or list of lines
+        :param min_angle: Minimum angle in degrees between the two lines of a pair
+        :return: List of (line a, line b) tuples
+        """
+        line_set = LineSet.of(lines)
+        n = len(line_set)
+        points = np.vstack([line_set.starts(), line_set.ends()]).astype(np.float64)
+        owners = np.concatenate([np.arange(n), np.arange(n)])
+
+        index = PointGrid(LineDetector.max_point_distance)
+        for k, point in enumerate(points.tolist()):
+            index.add(point, k)
+        a, b = [], []
+        for k, point in enumerate(points.tolist()):
+            near = index.near(point)
+            a.extend([k] * len(near))
+            b.extend(near)
+        a = np.array(a, dtype=np.intp)
+        b = np.array(b, dtype=np.intp)
+
+        d = points[a] - points[b]
+        close = np.sqrt(d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1]) <= LineDetector.max_point_distance
+        pairs = np.unique(np.stack([owners[a[close]], owners[b[close]]], axis=1).reshape(-1, 2), axis=0)
+
+        angles = np.mod(line_set.angles(), 180)
+        between = np.absolute(angles[pairs[:, 0]] - angles[pairs[:, 1]])
+        between = np.minimum(between, 180 - between)
+
+        pairs = [(line_set[i], line_set[j]) for i, j in pairs[between >= min_angle].tolist()]
+        log(f"{len(pairs)} angle lines")
+        return pairs
+
+    def _filter_lines(self, lines, min_length=None, max_length=None):
+        """
+        Filters the given lines by their length.
+        :param lines: LineSet or list of lines that will be filtered
+        :param min_length: Minimum length a line needs to have (None to ignore)
+        :param max_length: Length a line needs to be shorter than (None to ignore)
+        :return: Boolean mask of the lines that pass the filter
+        """
+        return LineSet.of(lines).mask(min_length=min_length, max_length=max_length)
 
     def _merge_lines(self, lines):
         """
@@ -121,10 +443,8 @@ class LineDetector:
         :param lines: The lines you want to merge.
         :return: list of merged lines
         """
-        merged_lines = []
-        for line in lines:
-            if not LineDetector.is_line_in(merged_lines, line):
-                merged_lines.append(line)
+        line_set = LineSet.of(lines)
+        merged_lines = [line_set[i] for i in self._merge_indices(line_set)]
         log(f"{len(merged_lines)} merged lines")
         return merged_lines
 
@@ -137,41 +457,90 @@ class LineDetector:
         :param min_line_length: Minimum length a line needs to pass the check
         :return: list of pruged lines
         """
-        purged_lines = []
-        for line in lines:
-            if not LineDetector.is_line_in(purged_lines, line):
-                # Check line length
-                if line.length() >= min_line_length:
-                    purged_lines.append(line)
-
-        return purged_lines
-
-    def _same_slope_lines(self):
-        # Get lines with the same slope
-        same_slope_lines = []
-
-        for i in range(len(self.lines)):
-            for j in range(i + 1, len(self.lines)):
-                l1 = self.lines[i]
-                l2 = self.lines[j]
+        line_set = LineSet.of(lines)
+        return [line_set[i] for i in self._merge_indices(line_set, min_line_length)]
 
-                if l1 is not l2:
-                    slope1 = l1.slope()
-                    slope2 = l2.slope()
-
-                    tol = 5
-
-                    if slope1-tol <= slope2 <= slope1+tol or slope2-tol <= slope1 <= slope2+tol:
-                        longest = l1 if l1.length() > l2.length() else l2
-                        same_slope_lines.append(longest)
+    def _merge_indices(self, line_set, min_line_length=None):
+        """
+        Merges the segments of the given line set. A segment is dropped if one of the already kept segments could be
+        the same line (see could_be_same_line). The kept segments are indexed by their end points, so each segment is
+        only compared with the kept segments close to it.
 
-        return same_slope_lines
+        :param line_set: LineSet that will be merged
+        :param min_line_length: Minimum length a segment needs to be kept (None to ignore)
+        :return: Array with the indices of the kept segments
+        """
+        starts = line_set.starts()
+        ends = line_set.ends()
+        length_mask = line_set.mask(min_length=min_line_length)
+
+        kept = []
+        index = PointGrid(LineDetector.max_point_distance)
+        for i in np.flatnonzero(length_mask):
+            candidates = np.array([kept[k] for k in set(index.near(starts[i]))], dtype=np.intp)
+
+            if len(candidates) > 0:
+                same = (LineDetector._are_close(starts[candidates], starts[i]) &
+                        LineDetector._are_close(ends[candidates], ends[i])) | \
+                       (LineDetector._are_close(starts[candidates], ends[i]) &
+                        LineDetector._are_close(ends[candidates], starts[i]))
+                if same.any():
+                    continue
+
+            index.add(starts[i], len(kept))
+            index.add(ends[i], len(kept))
+            kept.append(i)
+
+        return np.array(kept, dtype=np.intp)
+
+    def _are_close(points, point):
+        """
+        Vectorized version of is_close, that checks the given points against one point.
+        :param points: Array of shape (n, 2)
+        :param point: Array of shape (2,)
+        :return: Boolean mask of the points that are within max_point_distance of the point
+        """
+        d = (points - point).astype(np.float64)
+        return np.sqrt(d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1]) <= LineDetector.max_point_distance
 
-    def get_line_end_point_in_other_line(point, lines):
-        for l in lines:
-            if LineDetector.is_close(*point, *l.start_xy()):
+    def _same_slope_lines(self, tol=5):
+        """
+        Returns the longer line of every pair of found lines whose slopes differ by at most the given tolerance.
+        The slopes are sorted, so each line is only compared with the lines within the tolerance.
+        :param tol: Maximum difference of the slopes
+        :return: List of Line objects, one per pair in the order of the pairs
+        """
+        lines = self.lines
+        slopes = np.array([l.slope() for l in lines], dtype=np.float64)
+        lengths = self.line_set.lengths()
+
+        order = np.argsort(slopes, kind='stable')
+        sorted_slopes = slopes[order]
+        upper = np.searchsorted(sorted_slopes, sorted_slopes + tol, side='right')
+
+        # Every sorted position is paired with the following positions up to its upper bound
+        counts = upper - np.arange(len(order)) - 1
+        a = np.repeat(np.arange(len(order)), counts)
+        b = a + 1 + np.arange(len(a)) - np.repeat(np.cumsum(counts) - counts, counts)
+        i = np.minimum(order[a], order[b])
+        j = np.maximum(order[a], order[b])
+        pairs = np.lexsort((j, i))
+
+        longest = np.where(lengths[i[pairs]] > lengths[j[pairs]], i[pairs], j[pairs])
+        return [lines[k] for k in longest]
+
+    def get_line_end_point_in_other_line(point, lines, index=None):
+        """
+        Returns the first end point of the given lines that is close to the given point.
+        :param point: (x, y) tuple
+        :param lines: Lines that are checked
+        :param index: PointGrid over the end points of the given lines (see index_lines) or None to check all lines
+        :return: (x, y) tuple of the found end point or None
+        """
+        for l in LineDetector._candidates(lines, point, index):
+            if LineDetector.is_close(*point, *l.start_xy(), max_distance=LineDetector.max_point_distance):
                 return l.start_xy()
-            elif LineDetector.is_close(*point, *l.end_xy()):
+            elif LineDetector.is_close(*point, *l.end_xy(), max_distance=LineDetector.max_point_distance):
                 return l.end_xy()
         return None
 
@@ -198,6 +567,10 @@ class LineDetector:
         return None
 
     def get_next_line_with_corresponding_point(point, lines):
+        """
+        Follows the lines that are connected to the given point recursively and returns the last reached point.
+        Use assemble_polylines in order to join all connected lines at once.
+        """
         if point is None:
             return None
         else:
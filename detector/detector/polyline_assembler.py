@@ -0,0 +1,124 @@
+import numpy as np
+
+from detector.primitives.line_set import LineSet
+from detector.primitives.point import Point
+from detector.primitives.polyline import Polyline
+from detector.spatial import PointGrid
+from detector.union_find import UnionFind
+
+
+class PolylineAssembler:
+    """
+    Assembles line segments into ordered polylines. End points that are closer than the snap distance are snapped
+    into one vertex with a union-find over a PointGrid of all end points, which makes the segments edges of a graph
+    between these vertices. Chains of edges are then walked from their loose ends. A polyline ends at a vertex that
+    does not connect exactly two segments, so branches and crossings split the polylines. A polyline runs in the
+    direction most of the length of its segments runs in, so it does not depend on the order of the segments.
+    """
+
+    def __init__(self, snap_distance):
+        self.snap_distance = snap_distance
+        """ Maximum distance of two end points in order to be snapped into one vertex. """
+
+    def assemble(self, lines):
+        """
+        Assembles the given line segments into polylines.
+        :param lines: LineSet or list of lines
+        :return: List of Polyline objects
+        """
+        line_set = LineSet.of(lines)
+        if len(line_set) == 0:
+            return []
+
+        vertices, positions = self._snap(line_set)
+        adjacency = self._adjacency(vertices)
+
+        polylines = []
+        used = vertices[:, 0] == vertices[:, 1]
+
+        # Open chains start at vertices that do not continue a chain, i.e. loose ends, branches and crossings
+        for vertex, edges in adjacency.items():
+            if len(edges) != 2:
+                for segment, _ in edges:
+                    if not used[segment]:
+                        polylines.append(self._walk(vertex, segment, vertices, adjacency, used))
+
+        # All remaining segments are part of closed loops
+        for segment in np.flatnonzero(~used):
+            if not used[segment]:
+                polylines.append(self._walk(int(vertices[segment][0]), segment, vertices, adjacency, used))
+
+        lengths = line_set.lengths()
+        chains = []
+        for chain, segments in polylines:
+            forward = np.array([vertices[s][0] == v for s, v in zip(segments, chain)])
+            if np.sum(np.where(forward, lengths[segments], -lengths[segments])) < 0:
+                chain = chain[::-1]
+            chains.append(chain)
+
+        return [Polyline([Point(*positions[v]) for v in chain]) for chain in chains]
+
+    def _snap(self, line_set):
+        """
+        Snaps the end points of the given segments into vertices.
+        :return: A tuple containing (vertices, positions), where vertices is an array of shape (n, 2) with the start
+                 and end vertex of every segment and positions maps each vertex to its (x, y) position, which is the
+                 mean of all end points that were snapped into it
+        """
+        points = np.concatenate([line_set.starts(), line_set.ends()]).astype(np.float64)
+        n = len(line_set)
+
+        index = PointGrid(self.snap_distance)
+        union_find = UnionFind(len(points))
+        for i, p in enumerate(points):
+            for j in index.near(p):
+                d = points[j] - p
+                if d[0] * d[0] + d[1] * d[1] <= self.snap_distance * self.snap_distance:
+                    union_find.union(i, j)
+            index.add(p, i)
+
+        roots = union_find.roots()
+        keys, inverse = np.unique(roots, return_inverse=True)
+        counts = np.bincount(inverse)
+        xs = np.bincount(inverse, weights=points[:, 0]) / counts
+        ys = np.bincount(inverse, weights=points[:, 1]) / counts
+        positions = {int(k): (x, y) for k, x, y in zip(keys, xs, ys)}
+
+        return np.stack([roots[:n], roots[n:]], axis=1), positions
+
+    def _adjacency(self, vertices):
+        """
+        Maps each vertex to the segments that connect it, as list of (segment, other vertex). Segments whose end points
+        were snapped into the same vertex are shorter than the snap distance and are not part of any polyline.
+        """
+        adjacency = {}
+        for segment, (a, b) in enumerate(vertices):
+            if a == b:
+                continue
+            adjacency.setdefault(int(a), []).append((segment, int(b)))
+            adjacency.setdefault(int(b), []).append((segment, int(a)))
+        return adjacency
+
+    def _walk(self, vertex, segment, vertices, adjacency, used):
+        """
+        Walks from the given vertex along the given segment and continues as long as the reached vertex connects
+        exactly two segments.
+        :return: A tuple containing (vertices, segments), the ordered lists of the visited vertices and segments
+        """
+        chain = [vertex]
+        segments = []
+        while segment is not None:
+            used[segment] = True
+            segments.append(segment)
+            a, b = vertices[segment]
+            vertex = int(b) if a == vertex else int(a)
+            chain.append(vertex)
+
+            segment = None
+            edges = adjacency[vertex]
+            if len(edges) == 2:
+                for next_segment, _ in edges:
+                    if not used[next_segment]:
+                        segment = next_segment
+
+        return chain, segments
@@ -1,13 +1,19 @@
 from detector.util import *
 import numpy as np
+from detector.constants import options
+from detector.image_context import ImageContext
+from detector.image_pyramid import ImagePyramid
 from detector.primitives.shape import Shape
+from detector.primitives.shape_table import ShapeTable
+from detector.tiling import Tiler
 import detector.util as util
 
 
 class ShapeDetector:
-    def __init__(self, image=None, options=None):
+    def __init__(self, image=None, options=None, preprocess=True):
         self.orig_image = None
-        """ Reference to the original image. A working copy will be created from this image. """
+        """ Reference to the original image, which is only kept with the 'keep_original' option. Otherwise the working
+        copy is decoded at a reduced resolution. """
 
         self.image = None
         """ Working copy of the original image. All image processing happens will be applied on this image. """
@@ -18,60 +24,154 @@ class ShapeDetector:
         self.preprocessed_image = None
         """ Preprocessed working copy image. """
 
+        self.context = None
+        """ ImageContext of the working copy, that shares the derived images with the converters and exporters. """
+
+        self.pyramid = None
+        """ ImagePyramid of the original and the working copy, which is only created with the 'pyramid' scale mode. """
+
+        self.tiler = None
+        """ Tiler of the working copy, which is only created with the 'tile_size' option. The preprocessed image is
+        then only created tile by tile and the preprocessed_image attribute stays None (see get_preprocessed_image). """
+
         self.shapes = []
         """ Holds all found shapes. """
 
+        self.shape_table = None
+        """ Holds the features of all found shapes as ShapeTable. """
+
         self.contours = None
         self.hierarchy = None
 
+        self.hierarchy_index = None
+        """ Index over the contour hierarchy, which is built once per detection. """
+
         if image is not None:
             self._load(image)
+            if preprocess:
+                self.preprocess()
 
         util.log("ShapeDetector initialized")
 
     def _load(self, image_path):
         log(f"ShapeDetector: load image '{image_path}' and create working copy")
-        self.orig_image = cv2.imread(image_path)
-        self.load(self.orig_image)
+        gray = self.get_option('color_mode', options.DEFAULT_COLOR_MODE) == options.COLOR_MODE_GRAY
+        width = self.get_option('working_width', util.WORKING_COPY_WIDTH)
+        if self.get_option('scale_mode', options.DEFAULT_SCALE_MODE) == options.SCALE_MODE_PYRAMID:
+            self.orig_image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE if gray else cv2.IMREAD_COLOR)
+            self._set_working_copy(util.resize(self.orig_image, width=min(self.orig_image.shape[1], width)))
+            self.pyramid = ImagePyramid(self.orig_image, self.image)
+            log(f"ShapeDetector: working copy is 1/{self.pyramid.scale:.2f} of the original")
+        elif self.get_option('keep_original', False):
+            self.orig_image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE if gray else cv2.IMREAD_COLOR)
+            self._set_working_copy(util.create_working_copy_of_image(self.orig_image, width))
+        else:
+            self._set_working_copy(util.load_image(image_path, width=width, gray=gray))
 
     def load(self, image):
-        self.image = util.create_working_copy_of_image(image)
-        self.preprocessed_image = util.preprocess_image(self.image)
+        self._set_working_copy(util.create_working_copy_of_image(
+            image, self.get_option('working_width', util.WORKING_COPY_WIDTH)))
+        self.preprocess()
+
+    def preprocess(self):
+        """
+        Creates the preprocessed image of the working copy. With tiles the preprocessed image is only created tile by
+        tile during the detection, so nothing is done.
+        """
+        if self.tiler is None and self.preprocessed_image is None:
+            self.preprocessed_image = self.context.binary()
+
+    def get_preprocessed_image(self):
+        """
+        Returns the preprocessed image of the whole working copy, which is created if it does not exist yet. With tiles
+        it is never created, so the methods that need it can not be used.
+        :return: Preprocessed image
+        """
+        if self.tiler is not None:
+            raise ValueError("The preprocessed image of the whole working copy does not exist with tiles, set the "
+                             "'tile_size' option to 0")
+        self.preprocess()
+        return self.preprocessed_image
+
+    def _set_working_copy(self, image):
+        self.image = image
+        self.preprocessed_image = None
+        self.context = ImageContext(self.image)
+
+        tile_size = self.get_option('tile_size', options.DEFAULT_TILE_SIZE)
+        if tile_size > 0:
+            self.tiler = Tiler(self.image, tile_size, self.get_option('tile_overlap', options.DEFAULT_TILE_OVERLAP),
+                               self.get_option('tile_workers', options.DEFAULT_TILE_WORKERS))
+            log(f"ShapeDetector: process the working copy in {len(self.tiler.tiles())} tiles")
+
+    def get_option(self, name, default=None):
+        """
+        Returns the value of the given option.
+        :param name: Name of the option
+        :param default: Value that is returned if the option was not passed
+        :return: The value of the option
+        """
+        if self.options is None or name not in self.options:
+            return default
+        return self.options[name]
 
     def get_shapes(self):
         return self.shapes
 
     def find_shapes(self):
-        found_shapes, cons, hierarchy = self.find_shapes_in_image(self.preprocessed_image)
+        if self.tiler is not None:
+            found_shapes, cons, hierarchy = self.find_shapes_in_tiles()
+        else:
+            found_shapes, cons, hierarchy = self.find_shapes_in_image(self.preprocessed_image)
 
         self.shapes = found_shapes
+        self.shape_table = found_shapes
         self.contours = cons
         self.hierarchy = hierarchy
+        self.hierarchy_index = found_shapes.hierarchy_index
 
-        log(f"{len(found_shapes)} shapes found")
+        log(f"{len(found_shapes)} shapes found, their contours occupy {util.contours_nbytes(cons)} bytes")
         return found_shapes
 
-    def find_shapes_in_image(self, image):
+    def find_shapes_in_image(self, image, offset=(0, 0)):
+        """
+        Looks for contours in the given image which are then transformed into Shapes. The features of all contours are
+        computed in one batched pass and stored in a ShapeTable, which creates the Shapes of its rows on access.
+
+        :param image: Image, or region of interest of the working image, the shapes are found in
+        :param offset: (x, y) position of the region of interest in the working image
+        :return: ShapeTable with all found shapes
         """
-        Looks for contours in the given image which are then transformed into Shapes. All found Shapes are then
-        returned as an array.
+        cnts, hierarchy = self.find_contours_in_image(image, offset)
+        return self._shape_table(cnts, hierarchy)
 
-        :return: Array with all found shapes
+    def find_shapes_in_tiles(self):
         """
-        im, cnts, hierarchy = detect_contours(image)
+        Looks for the contours of the working copy tile by tile (see Tiler.find_contours), which are then transformed
+        into Shapes like in find_shapes_in_image.
 
-        # Try creating bounding rect for all contours in order to then get all contours for which we could create
-        # a bounding rect
-        bounding_boxes = [cv2.boundingRect(c) for c in cnts]
-        cons = [cnts[i] for i, v in enumerate(bounding_boxes)]
+        :return: ShapeTable with all found shapes
+        """
+        cnts, hierarchy = self.tiler.find_contours(self.get_option('contour_mode', options.DEFAULT_CONTOUR_MODE))
+        return self._shape_table(cnts, hierarchy)
+
+    def _shape_table(self, cnts, hierarchy):
+        store_polygons = self.get_option('contour_mode', options.DEFAULT_CONTOUR_MODE) == options.CONTOUR_MODE_POLYGON
+        found_shapes = ShapeTable(cnts, hierarchy, self.image, store_polygons=store_polygons)
+
+        return found_shapes, found_shapes.contours, hierarchy
 
-        found_shapes = []
-        for (i, c) in enumerate(cons):
-            shape = self.create_shape(c)
-            shape.contour_index = i
-            found_shapes.append(shape)
+    def find_contours_in_image(self, image, offset=(0, 0)):
+        """
+        Looks for contours in the given image without creating any Shapes. Use this instead of find_shapes_in_image,
+        if only the contours are needed.
 
-        return found_shapes, cons, hierarchy
+        :param image: Image, or region of interest of the working image, the contours are found in
+        :param offset: (x, y) position of the region of interest in the working image
+        :return: A tuple containing (contours, hierarchy)
+        """
+        _, cnts, hierarchy = detect_contours(image, self.get_option('contour_mode', options.DEFAULT_CONTOUR_MODE), offset)
+        return cnts, hierarchy
 
     def label_contours(self):
         self.image = util.label_contours_in_image(self.contours, self.image)
@@ -94,7 +194,7 @@ class ShapeDetector:
         return lines
 
     def get_canny_edge_image(self, min=100, max=200):
-        return util.create_canny_edge_image(self.image, min, max)
+        return self.context.edges(min, max)
 
     def save_found_shapes(self):
         for k, shape in enumerate(self.shapes):
@@ -106,7 +206,7 @@ class ShapeDetector:
         :param contours_to_be_removed: The contours that should not be included in the image that is returned.
         :return: Image without the shapes of the given contours removed.
         """
-        image = self.preprocessed_image.copy()
+        image = self.get_preprocessed_image().copy()
 
         erosion_factor = 5
         for c in contours_to_be_removed:
@@ -123,8 +223,12 @@ class ShapeDetector:
         :param shape_type: Shape type the found shapes are filtered by.
         :return: An array that contains the filtered shapes.
         """
-        shapes = [s for s in self.shapes if s.shape == shape_type]
-        shapes_contours = [s.contour for s in shapes]
+        if self.shape_table is None:
+            return [], []
+
+        indices = self.shape_table.where(shape_type=shape_type)
+        shapes = self.shape_table.shapes(indices)
+        shapes_contours = [self.contours[i] for i in indices]
 
         return shapes, shapes_contours
 
@@ -145,23 +249,21 @@ class ShapeDetector:
         :return: image that contains only shape types of the given shape type
         """
         img = self.get_image_remove_shape_type(shape_type)
-        _, contours_remove, _ = self.find_shapes_in_image(img)
+        contours_remove, _ = self.find_contours_in_image(img)
         return self.get_image_remove_contours(contours_remove)
 
     def sort_contours_by_parent(self):
-        return util.get_sorted_contours_by_parent(self.contours, self.hierarchy)
+        return util.get_sorted_contours_by_parent(self.contours, self.hierarchy_index)
 
     def create_shape(self, contour):
         """
-        Creates a new Shape instance with its image section and contour.
+        Creates a new Shape instance with its image section and contour. The shape type and the image section are
+        determined lazily on first access.
         :param image:
         :param contour:
         :return: A Shape instance
         """
-        shape = Shape(contour)
-        x, y, w, h = shape.bounding_box()
-        shape.set_image(self.image[y:y + h, x:x + w])
-        return shape
+        return Shape(contour, source_image=self.image)
 
     def show_result(self):
         """
@@ -1,17 +1,31 @@
 import cv2
 
 from detector import util
+from detector.canvas import Canvas
 from detector.constants import constants
 from detector.primitives.line import Line
+from detector.primitives.polyline import Polyline
 from detector.primitives.shape import Shape
+from detector.primitives.shape_type import ShapeType
 
 
 def draw_line(image, l, color=constants.COLOR_RED):
-    image = image.copy()
-    start = l.start_xy()
-    end = l.end_xy()
-    cv2.line(image, start, end, color, 2)
-    return image
+    canvas = Canvas()
+    add_line(canvas, l, color)
+    return canvas.render(image)
+
+
+def add_line(canvas, l, color=constants.COLOR_RED):
+    """
+    Queues the given line on the given canvas.
+    :param canvas: Canvas the line is queued on
+    :param l: Line you want to draw
+    :param color: Color of the line
+    """
+    if isinstance(l, Polyline):
+        canvas.polyline(l.points_xy(), color, 2)
+    else:
+        canvas.line(l.start_xy(), l.end_xy(), color, 2)
 
 
 def draw_text(image, text, pos, size=0.4, color=(0,0,0), thickness=1):
@@ -26,9 +40,9 @@ def draw_text(image, text, pos, size=0.4, color=(0,0,0), thickness=1):
     :param thickness: Thickness of the text, default: 1
     :return: Copy of the given image with the text drawn onto.
     """
-    image = image.copy()
-    cv2.putText(image, text, pos, cv2.FONT_HERSHEY_SIMPLEX, size, color, thickness, cv2.LINE_AA)
-    return image
+    canvas = Canvas()
+    canvas.text(text, pos, size, color, thickness)
+    return canvas.render(image)
 
 
 def draw_rectangle(image, p1, p2, color=(0, 0, 255), thickness=2):
@@ -42,9 +56,9 @@ def draw_rectangle(image, p1, p2, color=(0, 0, 255), thickness=2):
     :param thickness: Thickness of the rectangle
     :return: Copy of the given image with the rectangle drawn onto.
     """
-    image = image.copy()
-    cv2.rectangle(image, p1, p2, color, thickness)
-    return image
+    canvas = Canvas()
+    canvas.rectangle(p1, p2, color, thickness)
+    return canvas.render(image)
 
 
 def draw_shapes_on_image(image, shapes):
@@ -54,10 +68,8 @@ def draw_shapes_on_image(image, shapes):
     :param image: Image the shapes are drawn onto.
     :return: A copy of the image with the shapes drawn onto.
     """
-    image = image.copy()
     contours = [s.contour for s in shapes]
-    image = draw_contours_on_image(contours, image)
-    return image
+    return draw_contours_on_image(contours, image)
 
 
 def draw_contours_on_image(contours, image, color=(0, 255, 0)):
@@ -67,25 +79,27 @@ def draw_contours_on_image(contours, image, color=(0, 255, 0)):
     :param image: The image the contours are being drawn onto.
     :return:
     """
-    image = image.copy()
     util.log(f"Draw {len(contours)} contours")
-    cv2.drawContours(image, contours, -1, color, 2)
-    return image
+    canvas = Canvas()
+    canvas.contours(contours, color, 2)
+    return canvas.render(image)
 
 
 def draw_labeled_contours(contours, hierachy, image, color=(0, 0, 255)):
+    canvas = Canvas()
+
     # Draw contours
-    draw_contours_on_image(contours, image, color)
-    image = image.copy()
+    canvas.contours(contours, color, 2)
 
     # Draw shape names beside contour
     for i, c in enumerate(contours):
         (x, y, w, h) = cv2.boundingRect(c)
-        shape_name = detect_shape(c)
+        shape_name = util.detect_shape(c)
         parent_id = hierachy[0][i][3]
         txt = f"{ShapeType.to_s(shape_name)} ({parent_id})"
-        cv2.putText(image, txt, (int(x+w/2), int(y+h/2)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1, cv2.LINE_AA)
-    return image
+        canvas.text(txt, (int(x+w/2), int(y+h/2)), 0.5, color, 1)
+
+    return canvas.render(image)
 
 
 def draw_labeled_lines(image, lines, color=(0, 0, 255), line_width=2, draw_lines=True, draw_labels=True):
@@ -99,20 +113,18 @@ def draw_labeled_lines(image, lines, color=(0, 0, 255), line_width=2, draw_lines
     :param toggle_label_drawing: Defines if the labels will be drawn (true => draw labels, false => draw no labels)
     :return:
     """
-    image = image.copy()
+    canvas = Canvas()
     for i,l in enumerate(lines):
         start = l.start_xy()
         end = l.end_xy()
 
         if draw_lines:
-            cv2.line(image, start, end, color, line_width)
+            canvas.line(start, end, color, line_width)
 
         if draw_labels:
-            x = int(start[0])
-            y = int(start[1])
-            cv2.putText(image, str(i), (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,0,255), 1, cv2.LINE_AA)
+            canvas.text(str(i), start, 0.5, (0,0,255), 1)
 
-    return image
+    return canvas.render(image)
 
 
 def draw_entities_on_image(image, generic_entities, color=constants.COLOR_BLUE):
@@ -122,15 +134,24 @@ def draw_entities_on_image(image, generic_entities, color=constants.COLOR_BLUE):
     :param generic_entities: The generic entities we extract the shapes and its contours from
     :return: A copy of the image that contains the drawn contours.
     """
-    image = image.copy()
+    canvas = Canvas()
+    add_entities(canvas, generic_entities, color)
+    return canvas.render(image)
+
+
+def add_entities(canvas, generic_entities, color=constants.COLOR_BLUE):
+    """
+    Queues the contours and lines of all contained shapes of the given generic entities on the given canvas.
+    :param canvas: Canvas the contours and lines are queued on
+    :param generic_entities: The generic entities we extract the shapes and its contours from
+    :param color: Color of the contours and lines
+    """
     for e in generic_entities:
         for s in e.shapes:
             if type(s) is Shape:
-                image = draw_contours_on_image([s.contour], image, color=color)
-            elif type(s) is Line:
-                image = draw_line(image, s, color=color)
-
-    return image
+                canvas.contours([s.contour], color, 2)
+            elif isinstance(s, Line):
+                add_line(canvas, s, color=color)
 
 
 def draw_labels(image, generic_entities, adjustment=constants.DRAWN_BOUNDING_BOX_ADJUSTMENT):
@@ -141,14 +162,24 @@ def draw_labels(image, generic_entities, adjustment=constants.DRAWN_BOUNDING_BOX
     :param adjustment: Bounding Box adjustment
     :return: A copy of the given image that contains the drawn labels
     """
-    image = image.copy()
+    canvas = Canvas()
+    add_labels(canvas, generic_entities, adjustment)
+    return canvas.render(image)
+
+
+def add_labels(canvas, generic_entities, adjustment=constants.DRAWN_BOUNDING_BOX_ADJUSTMENT):
+    """
+    Queues the entity names of the generic entities on the given canvas.
+    :param canvas: Canvas the labels are queued on
+    :param generic_entities: The generic entities you want the names to be drawn of
+    :param adjustment: Bounding Box adjustment
+    """
     for e in generic_entities:
         bb_x, bb_y, bb_w, bb_h = e.bounding_box(adjustment=adjustment)
         for s in e.shapes:
             name = "" if not e.get(constants.STR_GENERIC_ENTITY_LABEL_NAME) else e.get(
                 constants.STR_GENERIC_ENTITY_LABEL_NAME)
-            image = draw_text(image, f"{name}", (bb_x, bb_y - 5))
-    return image
+            canvas.text(f"{name}", (bb_x, bb_y - 5))
 
 
 def draw_bounding_boxes(image, generic_entities, adjustment=constants.DRAWN_BOUNDING_BOX_ADJUSTMENT, color=constants.COLOR_BLUE, labels=False):
@@ -160,22 +191,31 @@ def draw_bounding_boxes(image, generic_entities, adjustment=constants.DRAWN_BOUN
     :param labels: Boolean that defines if labels should be drawn (True), or not (False)
     :return: A copy of the given image that contains the drawn bounding boxes
     """
-    image = image.copy()
+    canvas = Canvas()
+    add_bounding_boxes(canvas, generic_entities, adjustment, color, labels)
+    return canvas.render(image)
+
 
+def add_bounding_boxes(canvas, generic_entities, adjustment=constants.DRAWN_BOUNDING_BOX_ADJUSTMENT, color=constants.COLOR_BLUE, labels=False):
+    """
+    Queues the bounding boxes of the given entities on the given canvas.
+    :param canvas: Canvas the bounding boxes are queued on
+    :param generic_entities: The entities you want the bounding boxes to be drawn of. Only entities from type Shape are considered
+    :param adjustment: Will be applied to the bounding box size. Can be used to make the drawn bounding box smaller or bigger
+    :param labels: Boolean that defines if labels should be drawn (True), or not (False)
+    """
     for e in generic_entities:
         for s in e.shapes:
             if type(s) is Shape:
                 bb_x, bb_y, bb_w, bb_h = e.bounding_box(adjustment=adjustment)
-                image = draw_rectangle(image, (bb_x, bb_y), (bb_x + bb_w, bb_y + bb_h), color=color)
+                canvas.rectangle((bb_x, bb_y), (bb_x + bb_w, bb_y + bb_h), color, 2)
 
                 if labels:
                     name = "" if not e.get(constants.STR_GENERIC_ENTITY_LABEL_NAME) else e.get(constants.STR_GENERIC_ENTITY_LABEL_NAME)
-                    image = draw_text(image, f"{name}", (bb_x, bb_y - 5))
-
-            elif type(s) is Line:
-                image = draw_line(image, s, color)
+                    canvas.text(f"{name}", (bb_x, bb_y - 5))
 
-    return image
+            elif isinstance(s, Line):
+                add_line(canvas, s, color)
 
 
 def draw(image, generic_entities, draw_label=True, draw_bounding_box=True, draw_contour=False):
@@ -188,15 +228,25 @@ def draw(image, generic_entities, draw_label=True, draw_bounding_box=True, draw_
     :param draw_contour: Defines whether the contours of the entitites are being drawn
     :return: A copy of the given image that everything is drawn of
     """
-    image = image.copy()
+    canvas = Canvas()
+    add(canvas, generic_entities, draw_label, draw_bounding_box, draw_contour)
+    return canvas.render(image)
 
+
+def add(canvas, generic_entities, draw_label=True, draw_bounding_box=True, draw_contour=False):
+    """
+    Generic method to queue labels, bounding boxes and the contours of the given entities on the given canvas.
+    :param canvas: Canvas everything is queued on
+    :param generic_entities: The entities
+    :param draw_label: Defines whether labels are being drawn
+    :param draw_bounding_box: Defines whether the bounding boxes of the entities are being drawn
+    :param draw_contour: Defines whether the contours of the entitites are being drawn
+    """
     if draw_label:
-        image = draw_labels(image, generic_entities)
+        add_labels(canvas, generic_entities)
 
     if draw_bounding_box:
-        image = draw_bounding_boxes(image, generic_entities)
+        add_bounding_boxes(canvas, generic_entities)
 
     if draw_contour:
-        image = draw_entities_on_image(image, generic_entities)
-
-    return image
+        add_entities(canvas, generic_entities)
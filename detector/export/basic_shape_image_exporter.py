@@ -1,5 +1,6 @@
 from detector.constants import constants
 from detector import util, draw_util
+from detector.canvas import Canvas
 from detector.export.exporter import Exporter
 from detector.primitives.generic_entity import GenericEntity
 from detector.util import log
@@ -12,13 +13,18 @@ class BasicShapeImageExporter(Exporter):
         log("Exporting image with labeled basic shapes")
 
         entities = []
+        hierarchy_index = self.shape_detector.hierarchy_index
         for s in self.shape_detector.get_shapes():
-            if util.has_no_contour_children(s.contour_index, self.shape_detector.hierarchy):
+            if util.has_no_contour_children(s.contour_index, hierarchy_index):
                 ge = GenericEntity()
                 ge.add_shape(s)
                 ge.set(constants.STR_GENERIC_ENTITY_LABEL_NAME, s.shape_name())
                 entities.append(ge)
 
-        self.image = draw_util.draw(self.image, entities)
+        canvas = Canvas()
+        draw_util.add(canvas, entities)
+        self.image = canvas.render(self.image, copy=False)
+
+        log(f"Image context: {self.shape_detector.context.stats()}")
 
         return self.image
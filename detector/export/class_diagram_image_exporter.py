@@ -2,6 +2,7 @@ from detector.constants import constants
 from detector.converter.class_diagram_converter import ClassDiagramConverter, ClassDiagramTypes
 from detector.export.diagram_exporter import DiagramExporter
 from detector import util, draw_util
+from detector.canvas import Canvas
 from detector.util import log
 
 
@@ -10,27 +11,36 @@ class ClassDiagramImageExporter(DiagramExporter):
 
     def export(self):
         log("Exporting class diagram to image")
+        canvas = Canvas()
+
         #   Label classes
         class_entities = self.converter.get_generic_entities(types=[ClassDiagramTypes.CLASS_ENTITY])
         log(f"\t... with {len(class_entities)} classes")
-        self.image = draw_util.draw_bounding_boxes(self.image, class_entities, labels=True)
+        draw_util.add_bounding_boxes(canvas, class_entities, labels=True)
 
-        # Extract text from class entities
+        # Extract text from class entities, unless the converter already recognized it
         if 'ocr' in self.opts and self.opts['ocr']:
+            pyramid = self.converter.shape_detector.pyramid
             for c in class_entities:
                 for s in c.shapes:
-                    s.ocr()
+                    if s.text is None:
+                        s.ocr(pyramid.crop(s.bounding_box())[0] if pyramid is not None else None)
 
         #   Draw bounding boxes of advanced associations
         advanced_association_entities = self.converter.get_generic_entities(
             types=[ClassDiagramTypes.ASSOCIATION_ENTITY_ADVANCED])
         log(f"\t... with {len(advanced_association_entities)} advanced associations")
-        self.image = draw_util.draw_bounding_boxes(self.image, advanced_association_entities, color=constants.COLOR_RED, labels=True)
+        draw_util.add_bounding_boxes(canvas, advanced_association_entities, color=constants.COLOR_RED, labels=True)
 
         #   Draw normal entities
         association_entities = self.converter.get_generic_entities(types=[ClassDiagramTypes.ASSOCIATION_ENTITY])
         log(f"\t... with {len(association_entities)} normal associations")
-        self.image = draw_util.draw_entities_on_image(self.image, association_entities, color=constants.COLOR_YELLOW)
+        draw_util.add_entities(canvas, association_entities, color=constants.COLOR_YELLOW)
+
+        #   Rasterize everything in one pass
+        self.image = canvas.render(self.image, copy=False)
+
+        log(f"Image context: {self.converter.shape_detector.context.stats()}")
 
         #   Print relations between classes
         association_entities = association_entities + advanced_association_entities
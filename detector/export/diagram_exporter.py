@@ -1,9 +1,11 @@
+from detector import util
 from detector.export.exporter import Exporter
 
 
 class DiagramExporter(Exporter):
     def __init__(self, image, converter, options):
-        self.image = image.copy()
+        self.image = util.to_color(image)
+        """ BGR copy of the image the overlays are drawn on. """
         self.converter = converter
         self.opts = options
 
@@ -1,8 +1,12 @@
+from detector import util
+
+
 class Exporter(object):
     EXPORTER_ID = None
 
     def __init__(self, image, shape_detector):
-        self.image = image.copy()
+        self.image = util.to_color(image)
+        """ BGR copy of the image the overlays are drawn on. """
         self.shape_detector = shape_detector
 
     def export(self):
@@ -0,0 +1,83 @@
+import threading
+
+import cv2
+
+from detector import util
+
+
+class ImageContext:
+    """
+    Holds one image and the feature planes that are derived from it, such as the gray, blurred, binary and edge images.
+    Every plane is computed on first access and cached under its name and parameters, so the detectors, converters and
+    exporters that work on the same image share the planes instead of computing them again. A plane is computed once,
+    even if several threads access it at the same time (see TaskGraph).
+    """
+
+    def __init__(self, image):
+        self.image = image
+        """ The image all planes are derived from. """
+
+        self.planes = {}
+        """ Computed planes by their key, which is a tuple of the plane name and its parameters. """
+
+        self.hits = 0
+        """ Amount of plane accesses that were served from the cache. """
+
+        self.misses = 0
+        """ Amount of plane accesses that computed the plane. """
+
+        self._lock = threading.RLock()
+
+    def plane(self, key, compute):
+        """
+        Returns the plane with the given key, which is computed with the given function if it is not cached yet.
+        :param key: Tuple of the plane name and all parameters the plane depends on
+        :param compute: Function without arguments that computes the plane
+        :return: The plane
+        """
+        with self._lock:
+            if key in self.planes:
+                self.hits += 1
+                return self.planes[key]
+
+            self.misses += 1
+            plane = compute()
+            self.planes[key] = plane
+            return plane
+
+    def gray(self):
+        """
+        Returns the image as single channel gray image.
+        """
+        return self.plane(('gray',), lambda: util.to_gray(self.image))
+
+    def blurred(self, ksize=(5, 5), gray=False):
+        """
+        Returns the image blurred with a gaussian kernel of the given size.
+        :param ksize: Size of the kernel
+        :param gray: Defines whether the gray image is blurred instead of the image itself
+        """
+        return self.plane(('blurred', tuple(ksize), gray),
+                          lambda: cv2.GaussianBlur(self.gray() if gray else self.image, tuple(ksize), 0))
+
+    def binary(self):
+        """
+        Returns the preprocessed binary image, in which the shapes are found (see util.preprocess_image).
+        """
+        return self.plane(('binary',), lambda: util.binarize(util.to_gray(self.blurred((5, 5)))))
+
+    def edges(self, low=100, high=200, ksize=None):
+        """
+        Returns the Canny edges of the image.
+        :param low: First threshold of the hysteresis procedure
+        :param high: Second threshold of the hysteresis procedure
+        :param ksize: Size of the gaussian kernel the gray image is blurred with before, None to use the image as is
+        """
+        return self.plane(('edges', low, high, None if ksize is None else tuple(ksize)),
+                          lambda: cv2.Canny(self.image if ksize is None else self.blurred(ksize, gray=True), low, high))
+
+    def stats(self):
+        """
+        Returns a short summary of the cache usage.
+        """
+        return f"{len(self.planes)} planes, {self.hits} hits, {self.misses} misses"
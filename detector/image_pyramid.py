@@ -0,0 +1,80 @@
+import math
+import threading
+
+import numpy as np
+
+from detector.image_context import ImageContext
+
+
+class ImagePyramid:
+    """
+    Holds two levels of one image: the coarse working copy, in which the whole diagram is detected, and the full
+    resolution image, from which only small regions of interest are processed again. All results are kept in
+    coordinates of the coarse level. Regions are mapped to the full level and their findings back, so the cost at full
+    resolution depends on the amount of regions instead of the size of the image.
+    """
+
+    def __init__(self, full, coarse):
+        self.full = full
+        """ The image in full resolution. """
+
+        self.coarse = coarse
+        """ The working copy, whose coordinates all results are given in. """
+
+        self.scale = full.shape[1] / coarse.shape[1]
+        """ Factor from coarse to full coordinates. """
+
+        self.processed_pixels = 0
+        """ Amount of full resolution pixels that were cropped as regions of interest. """
+
+        self._lock = threading.Lock()
+
+    def to_full(self, box):
+        """
+        Maps the given box of the coarse level to the full level and clips it to the image.
+        :param box: Bounding box as tuple (x, y, w, h) in coarse coordinates
+        :return: The box as tuple (x1, y1, x2, y2) of full resolution pixels, where x2 and y2 are exclusive
+        """
+        x, y, w, h = box
+        height, width = self.full.shape[:2]
+        x1 = min(max(int(math.floor(x * self.scale)), 0), width)
+        y1 = min(max(int(math.floor(y * self.scale)), 0), height)
+        x2 = min(max(int(math.ceil((x + w + 1) * self.scale)), x1), width)
+        y2 = min(max(int(math.ceil((y + h + 1) * self.scale)), y1), height)
+        return x1, y1, x2, y2
+
+    def to_coarse(self, points):
+        """
+        Maps the given points of the full level to the coarse level.
+        :param points: Array of (x, y) positions in full coordinates, of any shape that ends with 2
+        :return: Array of the same shape with float coordinates
+        """
+        return np.asarray(points, dtype=np.float64) / self.scale
+
+    def crop(self, box):
+        """
+        Crops the given box of the coarse level from the full resolution image.
+        :param box: Bounding box as tuple (x, y, w, h) in coarse coordinates
+        :return: A tuple containing (image, offset), where offset is the (x, y) position of the crop in full coordinates
+        """
+        x1, y1, x2, y2 = self.to_full(box)
+        with self._lock:
+            self.processed_pixels += (x2 - x1) * (y2 - y1)
+        return self.full[y1:y2, x1:x2], (x1, y1)
+
+    def context(self, box):
+        """
+        Crops the given box of the coarse level from the full resolution image and wraps it in an ImageContext.
+        :param box: Bounding box as tuple (x, y, w, h) in coarse coordinates
+        :return: A tuple containing (context, offset), where offset is the (x, y) position of the crop in full coordinates
+        """
+        image, offset = self.crop(box)
+        return ImageContext(image), offset
+
+    def stats(self):
+        """
+        Returns a short summary of the share of the full resolution image that was processed.
+        """
+        total = self.full.shape[0] * self.full.shape[1]
+        return f"scale {self.scale:.2f}, {self.processed_pixels} of {total} full resolution pixels processed " \
+               f"({100 * self.processed_pixels / total:.1f}%)"
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+
+class Manifest:
+    """
+    Records the state of every image of a batch in a SQLite database, so a batch that was interrupted can be started
+    again and only processes the images that are not done yet. An image is identified by its path and the options it
+    is detected with, and is detected again if its content changed. The database is opened in WAL mode, so the
+    progress can be queried from another process while the batch writes to it.
+    """
+
+    PENDING = "pending"
+    """ The image was not detected yet, or its detection was interrupted. """
+
+    DONE = "done"
+    """ The image was detected and its result was saved. """
+
+    FAILED = "failed"
+    """ The last detection of the image failed. """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS options (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            prepared_at REAL
+        );
+        CREATE TABLE IF NOT EXISTS items (
+            path TEXT NOT NULL,
+            options TEXT NOT NULL REFERENCES options (key),
+            hash TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            output TEXT,
+            error TEXT,
+            seconds REAL,
+            finished_at REAL,
+            PRIMARY KEY (path, options)
+        );
+        CREATE INDEX IF NOT EXISTS items_status ON items (options, status);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        """ Path of the database file. """
+
+        self.key = None
+        """ Key of the options of the last prepare call, the results are recorded for. """
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(Manifest.SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def options_key(opts):
+        """
+        Returns the key of the given options, which is the same for equal options.
+        :param opts: Dictionary of the options
+        :return: Short hash of the options
+        """
+        return hashlib.sha1(json.dumps(opts, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def content_hash(path):
+        """
+        Returns the SHA-256 hash of the content of the given file.
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def prepare(self, img_paths, opts):
+        """
+        Adds the given images to the manifest and returns the ones that need to be detected. Images that are done
+        with the same content are skipped. The content is only hashed again if the size or the modification time of
+        a file changed. Missing files are returned as well, so their failure is recorded.
+        :param img_paths: Paths of the images
+        :param opts: Options the images are detected with
+        :return: List of the image paths that need to be detected, in the given order
+        """
+        key = Manifest.options_key(opts)
+        known = {row[0]: row[1:] for row in self.connection.execute(
+            "SELECT path, hash, size, mtime, status FROM items WHERE options = ?", (key,))}
+
+        todo = []
+        rows = []
+        touched = []
+        for path in img_paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                todo.append(path)
+                rows.append((path, key, "", -1, -1, Manifest.PENDING))
+                continue
+
+            digest, size, mtime, status = known.get(path, (None, None, None, None))
+            if size != stat.st_size or mtime != stat.st_mtime_ns:
+                digest = None
+            content_hash = digest or Manifest.content_hash(path)
+
+            if path not in known or content_hash != known[path][0] or status not in (Manifest.DONE, Manifest.FAILED):
+                todo.append(path)
+                rows.append((path, key, content_hash, stat.st_size, stat.st_mtime_ns, Manifest.PENDING))
+                continue
+
+            # Same content, e.g. after a touch or a copy: store the new size and time, so it is not hashed again
+            if digest is None:
+                touched.append((stat.st_size, stat.st_mtime_ns, path, key))
+            if status == Manifest.FAILED:
+                todo.append(path)
+
+        with self.connection:
+            self.connection.execute("INSERT INTO options (key, value, prepared_at) VALUES (?, ?, ?) "
+                                    "ON CONFLICT (key) DO UPDATE SET prepared_at = excluded.prepared_at",
+                                    (key, json.dumps(opts, sort_keys=True), time.time()))
+            self.connection.executemany(
+                "INSERT INTO items (path, options, hash, size, mtime, status) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (path, options) DO UPDATE SET hash = excluded.hash, size = excluded.size, "
+                "mtime = excluded.mtime, status = excluded.status, attempts = 0, output = NULL, error = NULL", rows)
+            self.connection.executemany("UPDATE items SET size = ?, mtime = ? WHERE path = ? AND options = ?", touched)
+
+        self.key = key
+        return todo
+
+    def record(self, img_path, output, seconds, error=None):
+        """
+        Records the result of one detection of the given image, with the options of the last prepare call.
+        :param img_path: Path of the image
+        :param output: Path of the saved result, None if the detection failed
+        :param seconds: Duration of the detection
+        :param error: Error of the failed detection, None if it succeeded
+        """
+        status = Manifest.DONE if error is None else Manifest.FAILED
+        with self.connection:
+            self.connection.execute(
+                "UPDATE items SET status = ?, attempts = attempts + 1, output = ?, error = ?, seconds = ?, "
+                "finished_at = ? WHERE path = ? AND options = ?",
+                (status, output, error, seconds, time.time(), img_path, self.key))
+
+    def last_options_key(self):
+        """
+        Returns the key of the options the last batch was prepared with, None if the manifest is empty.
+        """
+        row = self.connection.execute("SELECT key FROM options ORDER BY prepared_at DESC LIMIT 1").fetchone()
+        return row[0] if row is not None else None
+
+    def progress(self, opts=None):
+        """
+        Counts the images of each status. Only reads the status index, so it is cheap while a batch is running.
+        :param opts: Options the images are detected with, None for the options of the last prepared batch
+        :return: Dictionary with the amount of images per status
+        """
+        key = Manifest.options_key(opts) if opts is not None else self.last_options_key()
+        rows = self.connection.execute("SELECT status, COUNT(*) FROM items WHERE options = ? GROUP BY status", (key,))
+        counts = {Manifest.PENDING: 0, Manifest.DONE: 0, Manifest.FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def failures(self, limit=20, opts=None):
+        """
+        Returns the latest failed images.
+        :param limit: Maximum amount of returned images
+        :param opts: Options the images are detected with, None for the options of the last prepared batch
+        :return: List of (path, attempts, error) tuples
+        """
+        key = Manifest.options_key(opts) if opts is not None else self.last_options_key()
+        return self.connection.execute(
+            "SELECT path, attempts, error FROM items WHERE options = ? AND status = ? ORDER BY finished_at DESC "
+            "LIMIT ?", (key, Manifest.FAILED, limit)).fetchall()
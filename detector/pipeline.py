@@ -0,0 +1,146 @@
+import queue
+import threading
+import time
+import traceback
+
+
+class Stage:
+    """
+    One step of a Pipeline. It is run by its own worker threads, which take the items from the bounded input queue of
+    the stage and pass them on to the next stage. OpenCV releases the GIL while it decodes, processes or encodes an
+    image, so the stages overlap.
+    """
+
+    def __init__(self, name, fn, workers=1, queue_size=4):
+        self.name = name
+        """ Name of the stage in the metrics. """
+
+        self.fn = fn
+        """ Function (item, value) -> value, that gets the input item and the value of the previous stage. """
+
+        self.workers = workers
+        """ Amount of threads that run the stage. """
+
+        self.queue_size = queue_size
+        """ Maximum amount of items that wait for the stage. A full queue blocks the previous stage. """
+
+        self.items = 0
+        """ Amount of items the stage processed. """
+
+        self.busy = 0.0
+        """ Seconds the workers spent in the function of the stage. """
+
+        self.starved = 0.0
+        """ Seconds the workers waited for items from the previous stage. """
+
+        self.blocked = 0.0
+        """ Seconds the workers waited for space in the queue of the next stage, i.e. the backpressure of the next
+        stage. """
+
+        self.depth = 0
+        """ Sum of the queue length the workers found when they took an item, used for the mean queue length. """
+
+        self._lock = threading.Lock()
+
+    def _add(self, busy=0.0, starved=0.0, blocked=0.0, depth=0, items=0):
+        with self._lock:
+            self.busy += busy
+            self.starved += starved
+            self.blocked += blocked
+            self.depth += depth
+            self.items += items
+
+    def metrics(self):
+        """
+        Returns the metrics of the stage as string.
+        """
+        mean_depth = self.depth / self.items if self.items > 0 else 0
+        return f"{self.name}: {self.items} items, {self.workers} workers, busy {self.busy:.2f}s, " \
+               f"starved {self.starved:.2f}s, blocked {self.blocked:.2f}s, mean queue {mean_depth:.1f}/{self.queue_size}"
+
+
+class Pipeline:
+    """
+    Runs items through a sequence of stages, that are connected by bounded queues. Each stage works on a different
+    item at the same time, e.g. the image after the current one is decoded while the current one is detected and the
+    one before is encoded. The bounded queues keep fast stages from running ahead, so only a few items are in memory.
+    An error of a stage is passed on with its item, the following stages skip the item.
+    """
+
+    _END = object()
+
+    def __init__(self, stages):
+        self.stages = stages
+        """ The stages in the order the items run through them. """
+
+    def run(self, items):
+        """
+        Runs the given items through all stages.
+        :param items: Iterable of the input items, which is consumed by a separate thread
+        :return: Generator of (item, value, error, seconds) tuples in the order the items leave the last stage, where
+                 value is the result of the last stage, error the traceback of a failed stage or None and seconds the
+                 time the item spent in the stage functions
+        """
+        queues = [queue.Queue(s.queue_size) for s in self.stages] + [queue.Queue()]
+        remaining = [s.workers for s in self.stages]
+        lock = threading.Lock()
+
+        def feed():
+            for item in items:
+                queues[0].put((item, item, None, 0.0))
+            for _ in range(self.stages[0].workers):
+                queues[0].put(Pipeline._END)
+
+        def work(i):
+            stage = self.stages[i]
+            source, target = queues[i], queues[i + 1]
+            while True:
+                depth = source.qsize()
+                start = time.perf_counter()
+                task = source.get()
+                starved = time.perf_counter() - start
+
+                if task is Pipeline._END:
+                    stage._add(starved=starved)
+                    with lock:
+                        remaining[i] -= 1
+                        last = remaining[i] == 0
+                    if last:
+                        for _ in range(self.stages[i + 1].workers if i + 1 < len(self.stages) else 1):
+                            target.put(Pipeline._END)
+                    return
+
+                item, value, error, seconds = task
+                busy = 0.0
+                if error is None:
+                    start = time.perf_counter()
+                    try:
+                        value = stage.fn(item, value)
+                    except Exception:
+                        value, error = None, traceback.format_exc()
+                    busy = time.perf_counter() - start
+
+                start = time.perf_counter()
+                target.put((item, value, error, seconds + busy))
+                stage._add(busy, starved, time.perf_counter() - start, depth, 1)
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        for i, stage in enumerate(self.stages):
+            threads.extend(threading.Thread(target=work, args=(i,), daemon=True) for _ in range(stage.workers))
+        for t in threads:
+            t.start()
+
+        while True:
+            task = queues[-1].get()
+            if task is Pipeline._END:
+                break
+            yield task
+
+        for t in threads:
+            t.join()
+
+    def metrics(self):
+        """
+        Returns the metrics of all stages, one line per stage.
+        """
+        return [s.metrics() for s in self.stages]
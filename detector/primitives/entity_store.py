@@ -0,0 +1,93 @@
+import threading
+
+
+class EntityStore:
+    """
+    Stores GenericEntities in the order they were added and indexes them by ID and by type. Every added entity gets
+    the next ID, so sorting by ID restores the order of the entities. The entities notify their store when their type
+    changes, which moves them to the index of the new type. The store can be used by several threads, e.g. by the tasks
+    of a converter (see TaskGraph).
+    """
+
+    def __init__(self, entities=None):
+        self.entities = []
+        """ All entities in the order they were added. Use add and extend to add entities, so they are indexed. """
+
+        self._by_id = {}
+        self._by_type = {}
+        self._sorted = {}
+        self._lock = threading.RLock()
+
+        if entities is not None:
+            self.extend(entities)
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __iter__(self):
+        return iter(self.entities)
+
+    def add(self, entity):
+        """
+        Adds the given entity to the store and assigns its ID.
+        :param entity: GenericEntity
+        :return: The ID of the entity
+        """
+        with self._lock:
+            entity.id = len(self.entities)
+            entity.store = self
+            self.entities.append(entity)
+            self._by_id[entity.id] = entity
+            self._index(entity, entity.type)
+            return entity.id
+
+    def extend(self, entities):
+        with self._lock:
+            for e in entities:
+                self.add(e)
+
+    def get(self, id):
+        """
+        Returns the entity with the given ID.
+        :param id: ID of the entity
+        :return: The GenericEntity or None if there is no entity with the given ID
+        """
+        return self._by_id.get(id)
+
+    def of_type(self, types):
+        """
+        Returns the entities of the given types in the order they were added.
+        :param types: List of types
+        :return: List of GenericEntities
+        """
+        with self._lock:
+            if len(types) == 1:
+                return list(self._entities_of(types[0]))
+
+            entities = [e for t in set(types) for e in self._entities_of(t)]
+        return sorted(entities, key=lambda e: e.id)
+
+    def retype(self, entity, previous):
+        """
+        Moves the given entity from the index of its previous type to the index of its current type. Is called by the
+        entity when its type is set.
+        :param entity: GenericEntity whose type changed
+        :param previous: The previous type of the entity
+        """
+        with self._lock:
+            del self._by_type[previous][entity.id]
+            self._sorted.pop(previous, None)
+            self._index(entity, entity.type)
+
+    def _index(self, entity, type):
+        self._by_type.setdefault(type, {})[entity.id] = entity
+        self._sorted.pop(type, None)
+
+    def _entities_of(self, type):
+        """
+        Returns the entities of the given type sorted by their ID. The sorted list is cached until the type changes.
+        """
+        if type not in self._sorted:
+            by_id = self._by_type.get(type, {})
+            self._sorted[type] = [by_id[id] for id in sorted(by_id)]
+        return self._sorted[type]
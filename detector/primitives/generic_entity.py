@@ -5,12 +5,41 @@ from detector.primitives.shape import Shape
 
 class GenericEntity:
     def __init__(self, type=None):
-        self.type = type
+        self._type = type
         self.data = {}
         self.shapes = []
 
+        self.id = None
+        """ ID of the entity in the EntityStore it was added to. """
+
+        self.store = None
+        """ EntityStore the entity was added to, which is notified when the type changes. """
+
+        self._bounding_box = None
+
+    @property
+    def type(self):
+        return self._type
+
+    @type.setter
+    def type(self, type):
+        previous = self._type
+        self._type = type
+        if self.store is not None and previous != type:
+            self.store.retype(self, previous)
+
     def add_shape(self, shape):
         self.shapes.append(shape)
+        self._bounding_box = None
+
+    def set_shape(self, index, shape):
+        """
+        Replaces the shape at the given index, e.g. with a refined version of it.
+        :param index: Index of the shape in the shapes list
+        :param shape: The new shape
+        """
+        self.shapes[index] = shape
+        self._bounding_box = None
 
     def get_all_contours(self):
         return [s.contour for s in self.shapes]
@@ -28,21 +57,26 @@ class GenericEntity:
 
     def bounding_box(self, adjustment=constants.BOUNDING_BOX_ADJUSTMENT):
         """
-        Returns the bounding box of this GenericEntity by considering all contained shapes.
+        Returns the bounding box of this GenericEntity by considering all contained shapes. The bounding box is
+        computed once and cached until a shape is added.
         :param adjustment: Pixels that will be applied to the xy-coordinates and the width and height of bounding box,
                             in order to adjust the size of the bounding box.
         :return: A tuple containing the xy-coordinates, width and height of the bounding box (x, y, w, h)
         """
-        shapes = [s for s in self.shapes if type(s) is Shape]
+        if self._bounding_box is None:
+            shapes = [s for s in self.shapes if type(s) is Shape]
+
+            min_y_shape = min(shapes, key=lambda shape: shape.y)
+            max_y_shape = max(shapes, key=lambda shape: shape.y)
 
-        min_y_shape = min(shapes, key=lambda shape: shape.y)
-        max_y_shape = max(shapes, key=lambda shape: shape.y)
+            x = min(shapes, key=lambda shape: shape.x).x
+            w = max(shapes, key=lambda shape: shape.w).w
+            y = min_y_shape.y
+            h = max_y_shape.y + max_y_shape.h - min_y_shape.y
 
-        x = min(shapes, key=lambda shape: shape.x).x
-        w = max(shapes, key=lambda shape: shape.w).w
-        y = min_y_shape.y
-        h = max_y_shape.y + max_y_shape.h - min_y_shape.y
+            self._bounding_box = (x, y, w, h)
 
+        x, y, w, h = self._bounding_box
         return x-adjustment,\
                y-adjustment,\
                w+adjustment*2,\
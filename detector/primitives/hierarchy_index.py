@@ -0,0 +1,115 @@
+import numpy as np
+
+
+class HierarchyIndex:
+    """
+    Index over a contour hierarchy as returned by findContours. It is built once and answers the questions about
+    parents, children and leaves of a contour in O(1) respectively O(k) for k children, instead of scanning the whole
+    hierarchy on every call.
+
+    hierarchy[0][i][0] -> Next
+    hierarchy[0][i][1] -> Previous
+    hierarchy[0][i][2] -> First_Child
+    hierarchy[0][i][3] -> Parent
+    """
+
+    def __init__(self, hierarchy):
+        self.rows = np.zeros((0, 4), dtype=np.int32) if hierarchy is None else np.asarray(hierarchy[0])
+        """ Hierarchy data of all contours, one row per contour. """
+
+        self.parents = self.rows[:, 3]
+        """ Parent index of every contour, -1 for contours without parent. """
+
+        self.first_children = self.rows[:, 2]
+        """ First child index of every contour, -1 for contours without children. """
+
+        self.leaves = self.first_children == -1
+        """ Bitmap that is True for every contour without children. """
+
+        # Children of all contours in one array, sorted by parent. The children of a parent p are stored in
+        # _children[_offsets[p + 1]:_offsets[p + 2]], where p = -1 are the contours without parent.
+        self._children = np.argsort(self.parents, kind='stable')
+        self._offsets = np.searchsorted(self.parents[self._children], np.arange(-1, len(self.rows) + 1))
+        self._depths = None
+
+    @staticmethod
+    def of(hierarchy):
+        """
+        Returns the given hierarchy as HierarchyIndex. If it already is one, it is returned as is.
+        :param hierarchy: Hierarchy as returned by findContours or a HierarchyIndex
+        :return: A HierarchyIndex of the given hierarchy
+        """
+        if isinstance(hierarchy, HierarchyIndex):
+            return hierarchy
+        return HierarchyIndex(hierarchy)
+
+    @property
+    def depths(self):
+        """ Depth of every contour in the hierarchy, contours without parent have depth 0. Computed on first access. """
+        if self._depths is None:
+            self._depths = self._compute_depths()
+        return self._depths
+
+    def _compute_depths(self):
+        depths = np.zeros(len(self.rows), dtype=np.int32)
+        level = self.children(-1)
+        depth = 0
+        while len(level) > 0:
+            depths[level] = depth
+            level = np.concatenate([self.children(i) for i in level])
+            depth += 1
+        return depths
+
+    def __len__(self):
+        return len(self.rows)
+
+    def children(self, contour_index):
+        """
+        Returns the indexes of the contours that have the given contour as parent.
+        :param contour_index: Index of the parent contour, -1 returns all contours without parent
+        :return: Array with the indexes of the child contours in ascending order
+        """
+        return self._children[self._offsets[contour_index + 1]:self._offsets[contour_index + 2]]
+
+    def parent(self, contour_index):
+        return int(self.parents[contour_index])
+
+    def depth(self, contour_index):
+        return int(self.depths[contour_index])
+
+    def has_children(self, contour_index):
+        return not self.leaves[contour_index]
+
+    def is_leaf(self, contour_index):
+        return bool(self.leaves[contour_index])
+
+    def contours_w_first_child(self, child_index):
+        """
+        Returns the indexes of the contours that have the given child_index as "First_Child" index.
+        :param child_index: The child index we want to look for, -1 returns all contours without children
+        :return: Array with the indexes of the contours
+        """
+        if child_index == -1:
+            return np.flatnonzero(self.leaves)
+
+        if 0 <= child_index < len(self.rows):
+            parent = self.parents[child_index]
+            if parent > -1 and self.first_children[parent] == child_index:
+                return np.array([parent])
+
+        return np.array([], dtype=np.intp)
+
+    def group_by_parent(self, discard_contours_without_parent=True):
+        """
+        Groups the contour indexes by their parent.
+        :param discard_contours_without_parent: Defines if contours without parent (-1) are dropped
+        :return: Dictionary that contains the parent ids as key and the indexes of their children as array. The keys
+                 are ordered by the first appearance of a parent in the hierarchy.
+        """
+        parents = np.unique(self.parents)
+        if discard_contours_without_parent:
+            parents = parents[parents != -1]
+
+        groups = [(int(p), self.children(p)) for p in parents]
+        groups.sort(key=lambda group: group[1][0])
+        return dict(groups)
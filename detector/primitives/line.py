@@ -1,3 +1,5 @@
+import math
+
 from detector.util import distance_between
 
 
@@ -59,11 +61,13 @@ class Line:
         Calculates the slope between the given two points.
         :param a: Point a
         :param b: Point b
-        :return: Slope between two points
+        :return: Slope between two points, infinity for vertical lines
         """
         x1, y1 = a.get_xy_tuple()
         x2, y2 = b.get_xy_tuple()
-        return y2 - y1 / x2 - x1
+        if x2 == x1:
+            return math.inf
+        return (y2 - y1) / (x2 - x1)
 
     def __str__(self):
         return f"start: {self.start()}, end: {self.end()}, length: {self.length()}, slope: {self.slope()}"
@@ -0,0 +1,117 @@
+import numpy as np
+
+from detector.primitives.line import Line
+from detector.primitives.point import Point
+
+
+class LineSet:
+    """
+    Set of line segments that is backed by one array of shape (n, 4), where each row is (x1, y1, x2, y2). Lengths,
+    angles, bounding boxes and end points are computed for all segments at once. A Line is only created when a row is
+    accessed, it remains as per-row view for code that works on single lines.
+    """
+
+    def __init__(self, segments=None):
+        self.segments = np.zeros((0, 4), dtype=np.float32) if segments is None else \
+            np.asarray(segments, dtype=np.float32).reshape(-1, 4)
+        """ Array of shape (n, 4) with the start and end point of each segment. """
+
+        self._lines = [None] * len(self.segments)
+
+    @staticmethod
+    def of(lines):
+        """
+        Returns the given lines as LineSet. If they already are one, they are returned as is.
+        :param lines: LineSet or list of Line objects
+        :return: A LineSet
+        """
+        if isinstance(lines, LineSet):
+            return lines
+        return LineSet([(*l.start_xy(), *l.end_xy()) for l in lines] if len(lines) > 0 else None)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __getitem__(self, index):
+        return self.line(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.line(i)
+
+    def line(self, index):
+        """
+        Returns the Line of the given row, which is created on first access.
+        :param index: Index of the row
+        :return: The Line of the row
+        """
+        line = self._lines[index]
+        if line is None:
+            x1, y1, x2, y2 = self.segments[index]
+            line = Line(Point(x1, y1), Point(x2, y2))
+            self._lines[index] = line
+        return line
+
+    def lines(self):
+        """
+        Returns the Lines of all rows.
+        :return: List of Line objects
+        """
+        return list(self)
+
+    def select(self, selection):
+        """
+        Returns a new LineSet that only contains the selected rows.
+        :param selection: Boolean mask or array of row indices
+        :return: A LineSet with the selected rows
+        """
+        return LineSet(self.segments[selection])
+
+    def starts(self):
+        return self.segments[:, 0:2]
+
+    def ends(self):
+        return self.segments[:, 2:4]
+
+    def lengths(self):
+        """
+        Returns the length of every segment.
+        :return: Array with the lengths
+        """
+        d = (self.ends() - self.starts()).astype(np.float64)
+        return np.sqrt(d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1])
+
+    def angles(self):
+        """
+        Returns the direction of every segment from its start to its end point.
+        :return: Array with the angles in degrees in the range (-180, 180]
+        """
+        d = (self.ends() - self.starts()).astype(np.float64)
+        return np.degrees(np.arctan2(d[:, 1], d[:, 0]))
+
+    def bounding_boxes(self):
+        """
+        Returns the bounding box of every segment.
+        :return: Array of shape (n, 4), where each row is (x, y, w, h)
+        """
+        top_left = np.minimum(self.starts(), self.ends())
+        bottom_right = np.maximum(self.starts(), self.ends())
+        return np.hstack([top_left, bottom_right - top_left])
+
+    def mask(self, min_length=None, max_length=None):
+        """
+        Returns a mask of the segments whose length is within the given bounds.
+        :param min_length: Minimum length a segment needs to have (None to ignore)
+        :param max_length: Length a segment needs to be shorter than (None to ignore)
+        :return: Boolean mask
+        """
+        lengths = self.lengths()
+        mask = np.ones(len(self), dtype=bool)
+
+        if min_length is not None:
+            mask &= lengths >= min_length
+
+        if max_length is not None:
+            mask &= lengths < max_length
+
+        return mask
@@ -0,0 +1,28 @@
+from detector.primitives.line import Line
+from detector.util import distance_between
+
+
+class Polyline(Line):
+    """
+    Line that runs through an ordered list of points, e.g. a bent association that was assembled from several line
+    segments. Start and end are the first and the last point, so it can be used wherever a Line is expected.
+    """
+
+    def __init__(self, points):
+        super().__init__(points[0], points[-1])
+        self.points = points
+        """ Ordered list of the Points the polyline runs through. """
+
+    def points_xy(self):
+        return [p.get_xy_tuple() for p in self.points]
+
+    def length(self):
+        return sum(distance_between(a, b) for a, b in zip(self.points, self.points[1:]))
+
+    def bounding_box(self):
+        xs = [p.x for p in self.points]
+        ys = [p.y for p in self.points]
+        return min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
+
+    def __str__(self):
+        return f"start: {self.start()}, end: {self.end()}, points: {len(self.points)}, length: {self.length()}"
@@ -5,25 +5,76 @@ from detector.primitives.shape_type import ShapeType
 
 
 class Shape:
-    def __init__(self, contour):
-        self.image = None
+    __slots__ = ('contour', 'contour_index', 'text', 'source_image', '_shape', '_sides', '_bounding_box', '_image',
+                 '_moments')
+
+    def __init__(self, contour, shape_type=None, bounding_box=None, sides=None, source_image=None):
         self.contour = contour
         self.contour_index = -1
         """ Defines the contour index in the hierarchy list """
 
-        self.shape = util.detect_shape(contour)
         self.text = None
 
-        (x, y, w, h) = self.bounding_box()
-        self.w = w
-        self.h = h
-        self.x = x
-        self.y = y
+        self.source_image = source_image
+        """ Image the image section of this shape is cropped from on first access """
+
+        self._shape = shape_type
+        self._sides = sides
+        self._bounding_box = bounding_box
+        self._image = None
+        self._moments = None
+
+    @property
+    def shape(self):
+        """ The ShapeType of this contour. Is detected on first access, if it was not passed on creation. """
+        if self._shape is None:
+            self._shape = util.detect_shape(self.contour)
+        return self._shape
+
+    @shape.setter
+    def shape(self, shape_type):
+        self._shape = shape_type
+
+    @property
+    def sides(self):
+        """ Amount of sides of the approximated contour, if it was already computed (e.g. by a ShapeTable) """
+        return self._sides
+
+    @property
+    def image(self):
+        """ Image section of this shape. Is cropped from the source image on first access. """
+        if self._image is None and self.source_image is not None:
+            x, y, w, h = self.bounding_box()
+            self._image = self.source_image[y:y + h, x:x + w]
+        return self._image
 
-    def ocr(self):
+    @property
+    def x(self):
+        return self.bounding_box()[0]
+
+    @property
+    def y(self):
+        return self.bounding_box()[1]
+
+    @property
+    def w(self):
+        return self.bounding_box()[2]
+
+    @property
+    def h(self):
+        return self.bounding_box()[3]
+
+    def ocr(self, image=None):
+        """
+        Recognizes the text of the shape.
+        :param image: Image section the text is recognized in, e.g. the shape cropped at full resolution. Default: the
+                      image of the shape
+        :return: The recognized text
+        """
+        image = self.image if image is None else image
         filename = f"{self.shape_name()}_{util.random_str()}.png"
-        self.save_image(f"{filename}")
-        self.text = util.ocr(self.image)
+        util.save_image(image, filename)
+        self.text = util.ocr(image)
         return self.text
 
     def save_image(self, filename):
@@ -43,28 +94,32 @@ class Shape:
         os.remove(self.output_filename)
 
     def set_image(self, image):
-        self.image = image
+        self._image = image
 
     def area(self):
         """
         Returns the area of thisthis contour.
         :return:
         """
-        return util.area_contour(self.contour)
+        return self.w * self.h
 
     def bounding_box(self):
         """
         Returns the bounding rectangle of this contour.
         :return: Returns a touple in the form of (x, y, w, h)
         """
-        return cv2.boundingRect(self.contour)
+        if self._bounding_box is None:
+            self._bounding_box = cv2.boundingRect(self.contour)
+        return self._bounding_box
 
     def moments(self):
         """
-        Returns the moments array of this contour.
+        Returns the moments array of this contour. Is computed on first access.
         :return:
         """
-        return cv2.moments(self.contour)
+        if self._moments is None:
+            self._moments = cv2.moments(self.contour)
+        return self._moments
 
     def shape_name(self):
         return ShapeType.to_s(self.shape)
@@ -78,4 +133,6 @@ class Shape:
 
 
     def __str__(self):
-        return util.get_contour_details(self.contour)
+        if self.sides is None:
+            return util.get_contour_details(self.contour)
+        return util.format_contour_details(self.shape, self.sides, *self.bounding_box())
@@ -0,0 +1,163 @@
+import cv2
+import numpy as np
+
+from detector import util
+from detector.primitives.hierarchy_index import HierarchyIndex
+from detector.primitives.shape import Shape
+
+
+class ShapeTable:
+    """
+    Columnar storage of the features of all contours found in one detection pass. The features are computed once in a
+    batched pass over the contours and kept in a NumPy structured array, so that converters and exporters can filter
+    and group contours without creating a Shape for each contour. Shapes are only materialized when a row is accessed.
+    """
+
+    FEATURES = np.dtype([
+        ('x', np.int32),
+        ('y', np.int32),
+        ('w', np.int32),
+        ('h', np.int32),
+        ('area', np.int64),
+        ('perimeter', np.float64),
+        ('vertices', np.int32),
+        ('shape_type', np.int8),
+        ('parent', np.int32)
+    ])
+    """ Layout of a row of the table. The area is the area of the bounding box, as in util.area_contour. """
+
+    def __init__(self, contours, hierarchy=None, image=None, epsilon=util.EPSILON_FACTOR, store_polygons=False):
+        self.contours = contours
+        """ Contours the features were computed of. Row i of the table belongs to contour i. If store_polygons is set,
+        the contours are replaced by their approximated polygons. """
+
+        self.hierarchy = hierarchy
+        """ Hierarchy of the contours as returned by findContours. """
+
+        self.hierarchy_index = HierarchyIndex.of(hierarchy)
+        """ Index over the hierarchy of the contours. """
+
+        self.image = image
+        """ Image the shapes are cropped from when they are materialized. """
+
+        self.features, approximations = ShapeTable.extract_features(contours, self.hierarchy_index, epsilon)
+        """ Structured array with one row of FEATURES per contour. """
+
+        if store_polygons:
+            self.contours = approximations
+
+        self._shapes = [None] * len(contours)
+
+    @staticmethod
+    def extract_features(contours, hierarchy=None, epsilon=util.EPSILON_FACTOR):
+        """
+        Computes the features of all given contours in one pass.
+        :param contours: Contours the features are computed of
+        :param hierarchy: Hierarchy or HierarchyIndex of the contours, used for the parent column
+        :param epsilon: Factor of the perimeter that is used to approximate the contours
+        :return: A tuple containing (features, approximations), where features is a structured array with one row of
+                 FEATURES per contour and approximations is a list with the approximated polygon of each contour
+        """
+        features = np.zeros(len(contours), dtype=ShapeTable.FEATURES)
+        if len(contours) == 0:
+            return features, []
+
+        boxes = np.array([cv2.boundingRect(c) for c in contours], dtype=np.int32)
+        perimeters = np.array([cv2.arcLength(c, True) for c in contours], dtype=np.float64)
+        approximations = [cv2.approxPolyDP(c, epsilon * p, True) for c, p in zip(contours, perimeters)]
+        approx_boxes = np.array([cv2.boundingRect(a) for a in approximations], dtype=np.float64)
+
+        features['x'] = boxes[:, 0]
+        features['y'] = boxes[:, 1]
+        features['w'] = boxes[:, 2]
+        features['h'] = boxes[:, 3]
+        features['area'] = boxes[:, 2].astype(np.int64) * boxes[:, 3]
+        features['perimeter'] = perimeters
+        features['vertices'] = [len(a) for a in approximations]
+        features['shape_type'] = util.classify_shapes(features['vertices'], approx_boxes[:, 2] / approx_boxes[:, 3])
+        features['parent'] = HierarchyIndex.of(hierarchy).parents if hierarchy is not None else -1
+
+        return features, approximations
+
+    def __len__(self):
+        return len(self.features)
+
+    def __getitem__(self, index):
+        return self.shape(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.shape(i)
+
+    def shape(self, index):
+        """
+        Returns the Shape of the given row. The Shape is created from the precomputed features on first access.
+        :param index: Index of the row, which is the contour index as well
+        :return: The Shape of the given row
+        """
+        shape = self._shapes[index]
+        if shape is None:
+            row = self.features[index]
+            x, y, w, h = int(row['x']), int(row['y']), int(row['w']), int(row['h'])
+
+            shape = Shape(self.contours[index], shape_type=int(row['shape_type']), bounding_box=(x, y, w, h),
+                          sides=int(row['vertices']), source_image=self.image)
+            shape.contour_index = index
+
+            self._shapes[index] = shape
+        return shape
+
+    def shapes(self, indices):
+        """
+        Returns the Shapes of the given rows.
+        :param indices: Indices of the rows
+        :return: List of Shapes
+        """
+        return [self.shape(int(i)) for i in indices]
+
+    def bounding_boxes(self):
+        """
+        Returns the bounding boxes of all contours.
+        :return: Array of shape (n, 4), where each row is (x, y, w, h)
+        """
+        return np.stack([self.features['x'], self.features['y'], self.features['w'], self.features['h']], axis=1)
+
+    def where(self, shape_type=None, min_area=None, parent=None):
+        """
+        Returns the indices of the rows that match all given conditions.
+        :param shape_type: ShapeType the rows need to have (None to ignore)
+        :param min_area: Area a row needs to exceed (None to ignore)
+        :param parent: Index of the parent contour the rows need to have (None to ignore)
+        :return: Array of row indices
+        """
+        mask = np.ones(len(self), dtype=bool)
+
+        if shape_type is not None:
+            mask &= self.features['shape_type'] == shape_type
+
+        if min_area is not None:
+            mask &= self.features['area'] > min_area
+
+        if parent is not None:
+            mask &= self.features['parent'] == parent
+
+        return np.flatnonzero(mask)
+
+    def group_by_parent(self, discard_contours_without_parent=True):
+        """
+        Groups the row indices by the parent contour of each row.
+        :param discard_contours_without_parent: Defines if rows without parent (-1) are dropped
+        :return: Dictionary that contains the parent ids as key and the indices of their children as array. The keys
+                 are ordered by the first appearance of a parent, as in util.get_sorted_contours_by_parent.
+        """
+        return self.hierarchy_index.group_by_parent(discard_contours_without_parent)
+
+    def details(self, index):
+        """
+        Returns the details of the given row as string, without recomputing any feature.
+        :param index: Index of the row
+        :return: String containing the details
+        """
+        row = self.features[index]
+        return util.format_contour_details(int(row['shape_type']), int(row['vertices']),
+                                           int(row['x']), int(row['y']), int(row['w']), int(row['h']))
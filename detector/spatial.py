@@ -0,0 +1,124 @@
+import math
+
+
+class PointGrid:
+    """
+    Uniform grid over points. Every point is stored in the cell it falls into, so that all points within the distance
+    of one cell size around a position can be found by looking at the 3x3 neighbouring cells, instead of comparing the
+    position with every stored point.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+        """ Width and height of a cell. Has to be at least the maximum distance that is queried. """
+
+        self.cells = {}
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def add(self, point, item):
+        """
+        Stores the given item at the given point.
+        :param point: (x, y) tuple
+        :param item: The item that is returned by queries, e.g. an index into a list of lines
+        """
+        cell = self._cell(*point)
+        if cell not in self.cells:
+            self.cells[cell] = []
+        self.cells[cell].append(item)
+
+    def near(self, point):
+        """
+        Returns all items that are stored at points within one cell size around the given point. The result can
+        contain items that are further away, so the distance still needs to be checked, and it contains an item
+        multiple times, if it was added at multiple points near the given point.
+        :param point: (x, y) tuple
+        :return: List of items
+        """
+        cx, cy = self._cell(*point)
+        items = []
+        for x in range(cx - 1, cx + 2):
+            for y in range(cy - 1, cy + 2):
+                cell = self.cells.get((x, y))
+                if cell is not None:
+                    items.extend(cell)
+        return items
+
+
+class BoxIndex:
+    """
+    Uniform grid over axis aligned boxes. Every box is stored in all cells it overlaps, so the boxes that contain a
+    point or intersect another box are found by looking only at the cells the query covers. Points can be stored as
+    boxes without width and height. Boxes are (x, y, w, h) tuples and the borders belong to the box, as in
+    util.is_point_in_area and util.do_bounding_boxes_intersect.
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = float(cell_size)
+        """ Width and height of a cell. Should be about the size of the stored boxes. """
+
+        self.cells = {}
+        self.boxes = []
+        self.items = []
+
+    def _cells(self, box):
+        x, y, w, h = box
+        x1, y1 = int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+        x2, y2 = int(math.floor((x + w) / self.cell_size)), int(math.floor((y + h) / self.cell_size))
+        for cx in range(x1, x2 + 1):
+            for cy in range(y1, y2 + 1):
+                yield cx, cy
+
+    def add(self, box, item):
+        """
+        Stores the given item with the given box.
+        :param box: (x, y, w, h) tuple
+        :param item: The item that is returned by queries, e.g. an index into a list of entities
+        """
+        entry = len(self.boxes)
+        self.boxes.append(box)
+        self.items.append(item)
+        for cell in self._cells(box):
+            if cell not in self.cells:
+                self.cells[cell] = []
+            self.cells[cell].append(entry)
+
+    def add_point(self, point, item):
+        """
+        Stores the given item at the given point.
+        :param point: (x, y) tuple
+        :param item: The item that is returned by queries
+        """
+        self.add((point[0], point[1], 0, 0), item)
+
+    def intersecting(self, box):
+        """
+        Returns the items whose boxes intersect the given box, in the order they were added. An item that was added
+        with multiple boxes is returned once.
+        :param box: (x, y, w, h) tuple
+        :return: List of items
+        """
+        x, y, w, h = box
+        entries = set()
+        for cell in self._cells(box):
+            entries.update(self.cells.get(cell, ()))
+
+        items = []
+        seen = set()
+        for entry in sorted(entries):
+            bx, by, bw, bh = self.boxes[entry]
+            if bx <= x + w and x <= bx + bw and by <= y + h and y <= by + bh:
+                item = self.items[entry]
+                if item not in seen:
+                    seen.add(item)
+                    items.append(item)
+        return items
+
+    def containing(self, point):
+        """
+        Returns the items whose boxes contain the given point, in the order they were added.
+        :param point: (x, y) tuple
+        :return: List of items
+        """
+        return self.intersecting((point[0], point[1], 0, 0))
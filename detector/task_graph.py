@@ -0,0 +1,95 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from detector.util import log
+
+
+class TaskError(RuntimeError):
+    """
+    Raised by TaskGraph.run when a task raised an error. The error of the task is the cause of this error.
+    """
+
+    def __init__(self, task, error):
+        super().__init__(f"Task {task} failed: {error!r}")
+        self.task = task
+        """ Name of the task that failed. """
+
+
+class TaskGraph:
+    """
+    Runs tasks, that depend on each other, on a thread pool. A task is started as soon as all tasks it depends on are
+    finished, so independent tasks run at the same time. OpenCV and tesseract release the GIL, so tasks that mainly
+    process images overlap. With one worker the tasks run one after another in the order they were added.
+
+    The graph does not protect the data the tasks share. Tasks that are not ordered by their dependencies may only share
+    data that is safe to use from several threads, like the EntityStore and the ImageContext, or data that none of them
+    changes.
+    """
+
+    def __init__(self, workers=1):
+        self.workers = workers
+        """ Amount of tasks that run at the same time. """
+
+        self.tasks = {}
+        """ Dictionary of the tasks by their name, each with its function and the names of the tasks it depends on. """
+
+        self.seconds = {}
+        """ Duration of each finished task. """
+
+    def add(self, name, fn, after=()):
+        """
+        Adds a task to the graph.
+        :param name: Unique name of the task
+        :param fn: Function without arguments, that runs the task
+        :param after: Names of the tasks that have to be finished before this task is started. These tasks have to be
+                      added before.
+        """
+        for dependency in after:
+            if dependency not in self.tasks:
+                raise ValueError(f"Task {name} depends on unknown task {dependency}")
+        self.tasks[name] = (fn, tuple(after))
+
+    def run(self):
+        """
+        Runs all tasks. If a task raises an error, no further tasks are started and a TaskError with the name of the task
+        is raised once the running tasks are finished.
+        :return: Dictionary of the results of the tasks by their name
+        """
+        results = {}
+        if self.workers <= 1:
+            for name, (fn, _) in self.tasks.items():
+                results[name] = self._run_task(name, fn)
+            return results
+
+        pending = dict(self.tasks)
+        with ThreadPoolExecutor(self.workers) as pool:
+            running = {}
+            while pending or running:
+                for name, (fn, after) in list(pending.items()):
+                    if all(dependency in results for dependency in after):
+                        running[pool.submit(self._run_task, name, fn)] = name
+                        del pending[name]
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        wait(running)
+                        raise future.exception()
+                    results[name] = future.result()
+        return results
+
+    def _run_task(self, name, fn):
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            raise TaskError(name, e) from e
+        self.seconds[name] = time.perf_counter() - start
+        return result
+
+    def stats(self):
+        """
+        Returns the duration of each finished task as string.
+        """
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.seconds.items())
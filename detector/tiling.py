@@ -0,0 +1,334 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from detector import util
+from detector.constants import options
+from detector.image_context import ImageContext
+from detector.spatial import BoxIndex
+from detector.util import log
+
+
+class Tiler:
+    """
+    Splits an image into overlapping tiles, which are processed one after another or in parallel. The planes derived
+    from the image, like the gray, blurred and binary image, only exist for the tiles that are processed at the moment,
+    so their memory is bounded by the tile size instead of the image size. All results are given in coordinates of the
+    whole image and are stitched back together: contours that are complete in a tile are kept once, contours that are
+    cut by tile borders are joined from the pieces each tile traced in its core. The contours are the same as the
+    contours of the whole image. Line segments are only close to the segments of the whole image: the
+    LineSegmentDetector orders its seed pixels by a sort that depends on the whole image, so a tile can miss or add a
+    short segment and move a line end by a few pixels.
+    """
+
+    PADDING = 4
+    """ Pixels a region is padded with before it is binarized. The binarization only looks 3 pixels around each pixel
+    (5x5 blur, 3x3 erosion), so the binary image of a padded region equals the region of the binary whole image. """
+
+    MIN_OVERLAP = 8
+    """ Minimum overlap of neighbouring tiles. The pieces of a cut contour are joined by the points a tile traced up to
+    3 pixels outside of its core, which is half of the overlap, and these points need to be away from the tile border
+    to be traced like in the whole image. """
+
+    GRID = 5
+    """ The tiles start at multiples of this amount of pixels. The LineSegmentDetector scales its image by 0.8 = 4/5,
+    so only then the pixels of a tile are sampled like the pixels of the whole image and the segments of a tile are
+    found at the same positions. The overlap is widened until the step between the tiles is such a multiple. """
+
+    def __init__(self, image, tile_size=2048, overlap=128, workers=1):
+        if overlap < Tiler.MIN_OVERLAP:
+            raise ValueError(f"Tile overlap must be at least {Tiler.MIN_OVERLAP} pixels")
+        if tile_size < 2 * overlap:
+            raise ValueError(f"Tile size must be at least twice the tile overlap ({2 * overlap} pixels)")
+        overlap = tile_size - (tile_size - overlap) // Tiler.GRID * Tiler.GRID
+
+        self.image = image
+        """ The image that is split into tiles. """
+
+        self.tile_size = tile_size
+        """ Width and height of a tile. """
+
+        self.overlap = overlap
+        """ Pixels neighbouring tiles share, at least the given overlap (see GRID). Should be wider than the longest gap
+        the line fusion closes. """
+
+        self.workers = workers
+        """ Amount of tiles that are processed in parallel. """
+
+    def tiles(self):
+        """
+        Returns the regions of all tiles, row by row.
+        :return: List of (x1, y1, x2, y2) tuples, where x2 and y2 are exclusive
+        """
+        height, width = self.image.shape[:2]
+        step = max(self.tile_size - self.overlap, 1)
+        xs = range(0, max(width - self.tile_size, 0) + step, step)
+        ys = range(0, max(height - self.tile_size, 0) + step, step)
+        return [(x, y, min(x + self.tile_size, width), min(y + self.tile_size, height)) for y in ys for x in xs]
+
+    def core(self, region):
+        """
+        Returns the core of the given tile, which is the part of the tile that no other tile owns. The overlaps of
+        neighbouring tiles are split in their middle, so the cores of all tiles cover the image exactly once.
+        :param region: (x1, y1, x2, y2) tuple of a tile
+        :return: (x1, y1, x2, y2) tuple, where x2 and y2 are exclusive
+        """
+        x1, y1, x2, y2 = region
+        height, width = self.image.shape[:2]
+        half = self.overlap // 2
+        return (x1 + half if x1 > 0 else 0, y1 + half if y1 > 0 else 0,
+                x2 - (self.overlap - half) if x2 < width else width, y2 - (self.overlap - half) if y2 < height else height)
+
+    def owns_segments(self, region, segments):
+        """
+        Checks which of the line segments, that were found in the given tile, belong to it. A segment that ends in the
+        overlap with a neighbouring tile may be cut off or made up by the tile border and is found by the neighbouring
+        tile as well, so it only belongs to the tile whose core contains its midpoint. All other segments belong to the
+        tile that found them.
+        :param region: (x1, y1, x2, y2) tuple of the tile
+        :param segments: Array of shape (n, 4) with (x1, y1, x2, y2) segments in coordinates of the whole image
+        :return: Boolean array of shape (n,)
+        """
+        x1, y1, x2, y2 = region
+        height, width = self.image.shape[:2]
+        inner = (x1 + self.overlap if x1 > 0 else 0, y1 + self.overlap if y1 > 0 else 0,
+                 x2 - self.overlap if x2 < width else width, y2 - self.overlap if y2 < height else height)
+        ends = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+        return (in_box(ends[:, 0], inner) & in_box(ends[:, 1], inner)) | in_box(ends.mean(axis=1), self.core(region))
+
+    def binary(self, region):
+        """
+        Returns the binary image of the given region (see ImageContext.binary). The region is padded before it is
+        binarized, so the result is the same as if the whole image was binarized.
+        :param region: (x1, y1, x2, y2) tuple
+        :return: Binary image of the region
+        """
+        x1, y1, x2, y2 = region
+        height, width = self.image.shape[:2]
+        px1, py1 = max(x1 - Tiler.PADDING, 0), max(y1 - Tiler.PADDING, 0)
+        px2, py2 = min(x2 + Tiler.PADDING, width), min(y2 + Tiler.PADDING, height)
+
+        binary = ImageContext(self.image[py1:py2, px1:px2]).binary()
+        return np.ascontiguousarray(binary[y1 - py1:y2 - py1, x1 - px1:x2 - px1])
+
+    def map(self, fn, regions=None):
+        """
+        Calls the given function for each region. With more than one worker the regions are processed by a thread
+        pool, OpenCV releases the GIL while it processes an image.
+        :param fn: Function that is called with a (x1, y1, x2, y2) tuple
+        :param regions: Regions the function is called for, default: all tiles
+        :return: List with the result of each region, in the order of the regions
+        """
+        regions = self.tiles() if regions is None else regions
+        if self.workers > 1 and len(regions) > 1:
+            with ThreadPoolExecutor(self.workers) as pool:
+                return list(pool.map(fn, regions))
+        return [fn(r) for r in regions]
+
+    def is_cut(self, box, region):
+        """
+        Checks if the given bounding box reaches a border of the given region, which is not a border of the image.
+        The contour of such a box may continue in the neighbouring region.
+        :param box: (x, y, w, h) tuple
+        :param region: (x1, y1, x2, y2) tuple
+        :return: True if the box may be cut off, False otherwise
+        """
+        x, y, w, h = box
+        x1, y1, x2, y2 = region
+        height, width = self.image.shape[:2]
+        return (x1 > 0 and x <= x1 + 1) or (y1 > 0 and y <= y1 + 1) or \
+               (x2 < width and x + w >= x2 - 1) or (y2 < height and y + h >= y2 - 1)
+
+    def find_contours(self, mode=options.CONTOUR_MODE_NONE):
+        """
+        Finds the contours of the whole image tile by tile, which are the same as the contours of findContours on the
+        whole image. Contours that are complete in a tile are kept, a contour found in several overlapping tiles only
+        once. Contours that are cut by tile borders are joined from their pieces (see _stitch), so no region larger
+        than a tile is binarized, even if a connected diagram spans the whole image. The hierarchy is built from the
+        containment of the contours, like findContours with RETR_TREE.
+        :param mode: Contour mode (see options.CONTOUR_MODES). The tiles are traced with all points, which are
+                     compressed afterwards like CHAIN_APPROX_SIMPLE in the simple and polygon mode.
+        :return: A tuple containing (contours, hierarchy) in coordinates of the whole image
+        """
+        contours = []
+        keys = set()
+        pieces = []
+
+        def detect_region(region):
+            _, cnts, _ = util.detect_contours(self.binary(region), options.CONTOUR_MODE_NONE, region[:2])
+            return region, cnts
+
+        tiles = self.tiles()
+        for region, cnts in self.map(detect_region, tiles):
+            self._collect(region, cnts, contours, keys, pieces)
+
+        stitched = self._stitch(pieces)
+        for c in stitched:
+            self._add(c, contours, keys)
+
+        if mode != options.CONTOUR_MODE_NONE:
+            contours = [compress_contour(c) for c in contours]
+
+        log(f"{len(contours)} contours found in {len(tiles)} tiles, {len(stitched)} cut contours were stitched from "
+            f"{len(pieces)} pieces")
+        return contours, containment_hierarchy(contours)
+
+    def _collect(self, region, cnts, contours, keys, pieces):
+        """
+        Adds the contours of the given region, that are not cut and were not found before, to the given contours.
+        :param pieces: List the (region, contour) tuples of the cut contours are added to
+        """
+        for c in cnts:
+            if self.is_cut(cv2.boundingRect(c), region):
+                pieces.append((region, c))
+            else:
+                self._add(c, contours, keys)
+
+    def _add(self, contour, contours, keys):
+        # Overlapping tiles find complete contours with the same points, stitched contours may start at another point
+        points = contour.reshape(-1, 2)
+        key = (cv2.boundingRect(contour), len(points), tuple(points[np.lexsort((points[:, 0], points[:, 1]))[0]]))
+        if key not in keys:
+            keys.add(key)
+            contours.append(contour)
+
+    def _stitch(self, pieces):
+        """
+        Joins the pieces of the cut contours. Each tile contributes the runs of points of its cut contours, that lie in
+        its core, as chains. The cores cover the image exactly once and their borders are half an overlap away from
+        the tile borders, so a tile traces its chains like the whole image. A chain is followed by the chain of the
+        neighbouring core, that starts with the next points the tile traced after its end. Chains that form a cycle
+        are a contour, chains that do not belong to a contour that is complete in another tile and was kept there.
+        :param pieces: List of (region, contour) tuples
+        :return: List of the stitched contours
+        """
+        chains = []
+        starts = {}
+        for region, c in pieces:
+            points = c.reshape(-1, 2)
+            n = len(points)
+            inside = in_box(points, self.core(region))
+            run_starts = np.flatnonzero(inside & ~np.roll(inside, 1))
+            run_ends = np.flatnonzero(inside & ~np.roll(inside, -1))
+            if len(run_starts) == 0:
+                continue
+            if run_ends[0] < run_starts[0]:
+                run_ends = np.roll(run_ends, -1)
+
+            def key(i):
+                return tuple(map(tuple, points[[(i - 1) % n, i % n, (i + 1) % n]].tolist()))
+
+            for s, e in zip(run_starts.tolist(), run_ends.tolist()):
+                starts[key(s)] = len(chains)
+                chains.append((points[np.arange(s, e + 1 if e >= s else e + n + 1) % n], key(e + 1)))
+
+        contours = []
+        used = np.zeros(len(chains), dtype=bool)
+        for first in range(len(chains)):
+            if used[first]:
+                continue
+            path = []
+            chain = first
+            while chain is not None and not used[chain]:
+                used[chain] = True
+                path.append(chain)
+                chain = starts.get(chains[chain][1])
+            if chain == first:
+                contours.append(canonical_contour(np.concatenate([chains[k][0] for k in path])))
+        return contours
+
+
+def containment_hierarchy(contours):
+    """
+    Builds the hierarchy of the given contours in the format findContours returns with RETR_TREE. The parent of a
+    contour is the smallest other contour of the other kind that contains it, e.g. the hole of a class compartment is
+    the parent of the text inside the compartment and the outer contour of the class is the parent of the hole. Holes
+    are told from outer contours by their orientation (see canonical_contour).
+    :param contours: Contours of one image
+    :return: Hierarchy array of shape (1, n, 4) or None if there are no contours
+    """
+    n = len(contours)
+    if n == 0:
+        return None
+
+    boxes = np.array([cv2.boundingRect(c) for c in contours], dtype=np.int64).reshape(-1, 4)
+    areas = boxes[:, 2] * boxes[:, 3]
+    holes = np.array([cv2.contourArea(c, oriented=True) > 0 for c in contours])
+    parents = np.full(n, -1, dtype=np.int32)
+
+    # Contours are added from the largest to the smallest box, so all possible parents are indexed before a contour.
+    # The hole of a line that is one pixel wide has the same box as its outer contour, which is added first.
+    index = BoxIndex(256)
+    for i in np.lexsort((holes, -areas)):
+        x, y, w, h = boxes[i]
+        point = tuple(float(v) for v in contours[i][0][0])
+        candidates = [j for j in index.intersecting((x, y, w, h)) if holes[j] != holes[i] and
+                      (areas[j] > areas[i] or holes[i] and areas[j] == areas[i]) and
+                      boxes[j][0] <= x and boxes[j][1] <= y and
+                      boxes[j][0] + boxes[j][2] >= x + w and boxes[j][1] + boxes[j][3] >= y + h]
+        for j in sorted(candidates, key=lambda j: areas[j]):
+            if cv2.pointPolygonTest(contours[j], point, False) >= 0:
+                parents[i] = j
+                break
+        index.add((x, y, w, h), int(i))
+
+    hierarchy = np.full((1, n, 4), -1, dtype=np.int32)
+    hierarchy[0][:, 3] = parents
+    last_child = {}
+    for i in range(n):
+        previous = last_child.get(parents[i], -1)
+        if previous > -1:
+            hierarchy[0][previous][0] = i
+            hierarchy[0][i][1] = previous
+        elif parents[i] > -1:
+            hierarchy[0][parents[i]][2] = i
+        last_child[parents[i]] = i
+    return hierarchy
+
+
+def in_box(points, box):
+    """
+    Checks which of the given points lie in the given box.
+    :param points: Array of shape (n, 2)
+    :param box: (x1, y1, x2, y2) tuple, where x2 and y2 are exclusive
+    :return: Boolean array of shape (n,)
+    """
+    x1, y1, x2, y2 = box
+    return (points[:, 0] >= x1) & (points[:, 0] < x2) & (points[:, 1] >= y1) & (points[:, 1] < y2)
+
+
+def canonical_contour(points):
+    """
+    Rotates the points of a closed contour, so it starts at the point findContours starts it at. An outer border is
+    started at its first point in raster order, a hole border at its first point in raster order, whose right
+    neighbour lies in the hole. findContours traces outer borders with negative and hole borders with positive
+    oriented area.
+    :param points: Array of shape (n, 2) with the points of the contour
+    :return: The contour as array of shape (n, 1, 2)
+    """
+    contour = points.reshape(-1, 1, 2).astype(np.int32)
+    order = np.lexsort((points[:, 0], points[:, 1]))
+    start = order[0]
+    if cv2.contourArea(contour, oriented=True) > 0:
+        on_contour = set(map(tuple, points.tolist()))
+        for i in order:
+            x, y = points[i]
+            if (x + 1, y) not in on_contour and cv2.pointPolygonTest(contour, (float(x + 1), float(y)), False) > 0:
+                start = i
+                break
+    return np.roll(contour, -start, axis=0)
+
+
+def compress_contour(contour):
+    """
+    Compresses a contour with all points like CHAIN_APPROX_SIMPLE, so only the end points of its horizontal, vertical
+    and diagonal runs are kept.
+    :param contour: Contour of shape (n, 1, 2) with all points
+    :return: Compressed contour of shape (m, 1, 2)
+    """
+    points = contour.reshape(-1, 2)
+    steps = np.diff(np.vstack([points, points[:1]]), axis=0)
+    keep = np.any(steps != np.roll(steps, 1, axis=0), axis=1)
+    keep[0] |= not keep.any()
+    return contour[keep]
@@ -0,0 +1,49 @@
+import numpy as np
+
+
+class UnionFind:
+    """
+    Disjoint-set forest over the integers 0..n-1 with path compression and union by size.
+    """
+
+    def __init__(self, size):
+        self.parents = list(range(size))
+        self.sizes = [1] * size
+
+    def find(self, i):
+        """
+        Returns the representative of the set that contains i.
+        """
+        root = i
+        while self.parents[root] != root:
+            root = self.parents[root]
+
+        while self.parents[i] != root:
+            parent = self.parents[i]
+            self.parents[i] = root
+            i = parent
+
+        return root
+
+    def union(self, a, b):
+        """
+        Merges the sets that contain a and b.
+        :return: The representative of the merged set
+        """
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return a
+
+        if self.sizes[a] < self.sizes[b]:
+            a, b = b, a
+        self.parents[b] = a
+        self.sizes[a] += self.sizes[b]
+        return a
+
+    def roots(self):
+        """
+        Returns the representative of every element.
+        :return: Array with the representative of each element
+        """
+        return np.array([self.find(i) for i in range(len(self.parents))], dtype=np.intp)
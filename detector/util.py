@@ -4,8 +4,9 @@ import time
 import string
 import random
 
-from detector.constants import constants
+from detector.constants import constants, options
 from detector.primitives.shape_type import ShapeType
+from detector.primitives.hierarchy_index import HierarchyIndex
 import pytesseract
 from PIL import Image
 import numpy as np
@@ -20,6 +21,19 @@ EROSION_BY = 8
 CONTOUR_REMOVAL_COLOR = (0,0,0)
 """ Color that is used to remove shapes and contours. Default is white (255, 255, 255). """
 
+WORKING_COPY_WIDTH = 1024
+""" Width of the working copy all detection happens on. """
+
+REDUCED_READ_FLAGS = {
+    (2, False): cv2.IMREAD_REDUCED_COLOR_2,
+    (4, False): cv2.IMREAD_REDUCED_COLOR_4,
+    (8, False): cv2.IMREAD_REDUCED_COLOR_8,
+    (2, True): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (4, True): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (8, True): cv2.IMREAD_REDUCED_GRAYSCALE_8
+}
+""" imread flags that decode an image at 1/2, 1/4 or 1/8 of its size, by (factor, gray). """
+
 def aspect_ratio(c):
     """
     Calculates the aspect ratio of the given contour.
@@ -61,9 +75,22 @@ def get_contour_details(c):
     sides = len(approx)
 
     shape_type = detect_shape(c)
-    shape = ShapeType.to_s(shape_type=shape_type)
+    return format_contour_details(shape_type, sides, x, y, w, h)
 
-    return f"Contour - shape: {shape}, sides: {sides}, ratio: {aspect_ratio(c)}, x: {x}, y: {y}, w: {w}, h: {h}, area: {area_contour(c)}"
+
+def format_contour_details(shape_type, sides, x, y, w, h):
+    """
+    Formats the details of a contour whose features have already been computed.
+    :param shape_type: The detected ShapeType of the contour
+    :param sides: Amount of sides of the approximated contour
+    :param x: x coordinate of the bounding box
+    :param y: y coordinate of the bounding box
+    :param w: width of the bounding box
+    :param h: height of the bounding box
+    :return: String containing the details
+    """
+    shape = ShapeType.to_s(shape_type=shape_type)
+    return f"Contour - shape: {shape}, sides: {sides}, ratio: {float(w) / h}, x: {x}, y: {y}, w: {w}, h: {h}, area: {w * h}"
 
 
 def print_image_details(image):
@@ -77,15 +104,28 @@ def print_image_details(image):
     log(f"Image - width: {width}, height: {height}, area: {width*height}")
 
 
-def detect_contours(image):
+def detect_contours(image, mode=options.CONTOUR_MODE_NONE, offset=(0, 0)):
     """
     Detects the contours of the given image.
     :param image: Image you want the contours of
+    :param mode: Contour mode (see options.CONTOUR_MODES) that defines which points of the contours are stored. The
+                 polygon mode detects the contours like the simple mode, the polygons are approximated afterwards.
+    :param offset: (x, y) offset that is added to every contour point, e.g. the position of a region of interest
     :return: A tuple containg (img, contours, hierarchy)
     """
     #   cv2.RETR_TREE --> Relationships between contours
     #   cv2.RETR_EXTERNAL --> Ohne doppelte Konturen
-    return cv2.findContours(image, cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)
+    method = cv2.CHAIN_APPROX_NONE if mode == options.CONTOUR_MODE_NONE else cv2.CHAIN_APPROX_SIMPLE
+    return cv2.findContours(image, cv2.RETR_TREE, method, offset=tuple(offset))
+
+
+def contours_nbytes(contours):
+    """
+    Returns the amount of memory the points of the given contours occupy.
+    :param contours: Contours you want the size of
+    :return: The size in bytes
+    """
+    return sum(c.nbytes for c in contours)
 
 
 def detect_shape(c):
@@ -98,24 +138,38 @@ def detect_shape(c):
     approx = cv2.approxPolyDP(c, EPSILON_FACTOR * peri, True)
     edges = len(approx)
 
-    if edges == 3: return ShapeType.TRIANGLE
-
-    elif edges == 4:
-        (x, y, w, h) = cv2.boundingRect(approx)
-        ratio = w / float(h)
-
-        if 0.9 <= ratio <= 1.1:
-            return ShapeType.SQUARE
-        else:
-            return ShapeType.RECTANGLE
-
-    elif edges == 5: return ShapeType.PENTAGON
-    elif edges == 6: return ShapeType.HEXAGON
-    elif edges == 7: return ShapeType.HEPTAGON
-    elif edges == 8: return ShapeType.OCTAGON
-    elif 9 <= edges < 100: return ShapeType.CIRCLE
-
-    return ShapeType.UNIDENTIFIED
+    (x, y, w, h) = cv2.boundingRect(approx)
+    return int(classify_shapes(np.array([edges]), np.array([w / float(h)]))[0])
+
+
+def classify_shapes(edges, ratios):
+    """
+    Identifies the shape types for the given amount of edges of approximated contours. Works on whole arrays at once.
+    :param edges: Array with the amount of edges of each approximated contour
+    :param ratios: Array with the aspect ratio of the bounding box of each approximated contour
+    :return: Array with the ShapeType of each contour
+    """
+    conditions = [
+        edges == 3,
+        (edges == 4) & (0.9 <= ratios) & (ratios <= 1.1),
+        edges == 4,
+        edges == 5,
+        edges == 6,
+        edges == 7,
+        edges == 8,
+        (9 <= edges) & (edges < 100)
+    ]
+    choices = [
+        ShapeType.TRIANGLE,
+        ShapeType.SQUARE,
+        ShapeType.RECTANGLE,
+        ShapeType.PENTAGON,
+        ShapeType.HEXAGON,
+        ShapeType.HEPTAGON,
+        ShapeType.OCTAGON,
+        ShapeType.CIRCLE
+    ]
+    return np.select(conditions, choices, default=ShapeType.UNIDENTIFIED)
 
 
 def label_entities_in_image(entities, image):
@@ -161,13 +215,14 @@ def put_text_in_img(image, text, x, y, size=0.5, color=(0,0,0), thickness=1):
     cv2.putText(image, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, size, color, thickness, cv2.LINE_AA)
 
 
-def save_image(image, filename):
+def save_image(image, filename, output_path=constants.OUTPUT_PATH):
     """
     Saves the given image to the disk.
     :param filename: Name of the saved file.
+    :param output_path: Directory the file is saved in, default: constants.OUTPUT_PATH
     :return:
     """
-    cv2.imwrite(f"{constants.OUTPUT_PATH}{filename}", image)
+    cv2.imwrite(os.path.join(output_path, filename), image)
 
 
 def ocr(image):
@@ -250,13 +305,50 @@ def create_shape_hierarchy(image):
     return contour_map, cnts
 
 
-def create_working_copy_of_image(image):
+def create_working_copy_of_image(image, width=WORKING_COPY_WIDTH):
     """
     Creates a resized copy of the given image.
     :param image: Image the copy is created from.
+    :param width: Width of the copy
     :return: Returns the resized image
     """
-    return resize(image, width=1024)
+    return resize(image, width=width)
+
+
+def load_image(path, width=WORKING_COPY_WIDTH, gray=False):
+    """
+    Loads the working copy of the image at the given path. The size of the image is read from its header, so the image
+    can be decoded at the smallest of 1/2, 1/4 or 1/8 of its size, that is still at least as wide as the working copy.
+    JPEG images are scaled down while they are decoded, so the full resolution is never held in memory. Only the
+    remainder is resized like in create_working_copy_of_image.
+    :param path: Path of the image
+    :param width: Width of the working copy
+    :param gray: Defines whether the image is decoded as single channel gray image
+    :return: The working copy of the image
+    """
+    try:
+        with Image.open(path) as header:
+            full_width = header.size[0]
+    except OSError:
+        full_width = 0
+
+    factor = max([f for f in (2, 4, 8) if full_width // f >= width] or [1])
+    flags = REDUCED_READ_FLAGS[(factor, gray)] if factor > 1 else \
+        cv2.IMREAD_GRAYSCALE if gray else cv2.IMREAD_COLOR
+
+    log(f"Decode image at 1/{factor} of its width {full_width}")
+    return resize(cv2.imread(path, flags), width=width)
+
+
+def crop(image, region):
+    """
+    Returns the given region of the image as view.
+    :param image: Image the region is cropped from
+    :param region: (x1, y1, x2, y2) tuple, where x2 and y2 are exclusive
+    :return: The region of the image
+    """
+    x1, y1, x2, y2 = region
+    return image[y1:y2, x1:x2]
 
 
 def resize(image, width=None, height=None):
@@ -285,7 +377,7 @@ def resize(image, width=None, height=None):
 def preprocess_image(image):
     """
     Preprocesses the image in order to properly detect shapes. Applies gaussian blur, converts the color to b/w and
-    creates a binary image from it, that is returned.
+    creates a binary image from it, that is returned. Use ImageContext.binary to share the result.
     :param image: Image that is gonna be preprocessed
     :return: Binary image of the given image.
     """
@@ -294,11 +386,42 @@ def preprocess_image(image):
     image = cv2.GaussianBlur(image, (5,5), 0)
 
     # Grayscale image
-    image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    image = to_gray(image)
     #cv2.imshow("gray", image)
 
+    return binarize(image)
+
+
+def to_gray(image):
+    """
+    Converts the given image to a gray image. Images that already have a single channel are returned as they are.
+    :param image: BGR or gray image
+    :return: Gray image
+    """
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def to_color(image):
+    """
+    Returns a BGR copy of the given image, e.g. in order to draw colored overlays onto a gray image.
+    :param image: BGR or gray image
+    :return: New BGR image
+    """
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    return image.copy()
+
+
+def binarize(gray):
+    """
+    Erodes and thresholds the given gray image into the inverted binary image the shapes are found in.
+    :param gray: Gray image
+    :return: Binary image, where the dark strokes are white
+    """
     # Erode
-    image = erode(image, kernel=np.ones((3,3)))
+    image = erode(gray, kernel=np.ones((3,3)))
 
     # Threshold image
     _, image = cv2.threshold(image, 127, 255, cv2.THRESH_BINARY_INV)
@@ -322,11 +445,10 @@ def has_contour_children(contour_index, hierarchy):
     Checks if the given index appears as parent_index in the given hierarchy.
 
     :param contour_index: Index of the contour we want to check, whether it has some children.
-    :param hierarchy: Hierarchy, we want to check the given contour_index
+    :param hierarchy: Hierarchy or HierarchyIndex, we want to check the given contour_index
     :return: True if given contour has children, False otherwise
     """
-    all_parent_ids = [hierarchy[i][3] for i, v in enumerate(hierarchy)]
-    return contour_index in all_parent_ids[0]
+    return HierarchyIndex.of(hierarchy).has_children(contour_index)
 
 
 def has_no_contour_children(contour_index, hierarchy):
@@ -334,7 +456,8 @@ def has_no_contour_children(contour_index, hierarchy):
     Checks if the given index appears as child_index in the given hierarchy.
 
     :param contour_index: Index of the contour we want to check, whether it has some children.
-    :param hierarchy: Hierarchy, we want to check the given contour_index
+    :param hierarchy: Hierarchy or HierarchyIndex, we want to check the given contour_index. Pass a HierarchyIndex
+                        when calling this for many contours, otherwise the index is built on every call.
                         hierarchy[0][i][0] -> Next
                         hierarchy[0][i][1] -> Previous
                         hierarchy[0][i][2] -> First_Child
@@ -342,15 +465,14 @@ def has_no_contour_children(contour_index, hierarchy):
 
     :return: True if given contour has children, False otherwise
     """
-    all_contours_w_no_children = get_contours_w_child(hierarchy, -1)
-    return contour_index in all_contours_w_no_children
+    return HierarchyIndex.of(hierarchy).is_leaf(contour_index)
 
 
 def get_contours_w_child(hierarchy, child_index):
     """
     Returns the indexes of the contours that have the given child_index as "First_Child" index
 
-    :param hierarchy: Hierachy that contains all contours
+    :param hierarchy: Hierachy or HierarchyIndex that contains all contours
                         hierarchy[0][i][0] -> Next
                         hierarchy[0][i][1] -> Previous
                         hierarchy[0][i][2] -> First_Child
@@ -359,15 +481,14 @@ def get_contours_w_child(hierarchy, child_index):
     :param child_index: The child index we want to look for
     :return: A list, that contains the indexes of the contours
     """
-    contours = [i for i, v in enumerate(hierarchy[0]) if hierarchy[0][i][2] == child_index]
-    return contours
+    return HierarchyIndex.of(hierarchy).contours_w_first_child(child_index).tolist()
 
 
 def get_contours_w_parent(hierarchy, parent_index):
     """
     Returns the indexes of the contours that have the given parent_index as "Parent" index
 
-    :param hierarchy: Hierachy that contains all contours
+    :param hierarchy: Hierachy or HierarchyIndex that contains all contours
                         hierarchy[0][i][0] -> Next
                         hierarchy[0][i][1] -> Previous
                         hierarchy[0][i][2] -> First_Child
@@ -376,76 +497,81 @@ def get_contours_w_parent(hierarchy, parent_index):
     :param parent_index: The parent index we want to look for
     :return: A list, that contains the indexes of the contours
     """
-    contours = [i for i, v in enumerate(hierarchy[0]) if hierarchy[0][i][3] == parent_index]
-    return contours
+    return HierarchyIndex.of(hierarchy).children(parent_index).tolist()
 
 
 def get_contour_children_for(contour_index, hierarchy):
     """
     Returns the hierachy data of all child contours of the given contour_index from the given hierarchy.
     :param contour_index: Index of the contour we want to have all children returned.
-    :param hierarchy: Hierarchy we want to check against.
+    :param hierarchy: Hierarchy or HierarchyIndex we want to check against.
     :return: List of the hierarchy data of all children
     """
-    children = {}
-    for i, h in enumerate(hierarchy[0]):
-        if contour_index == h[3]:   # index 3 represents parent contour
-            key = str(i)
-            children[key] = h
-
-    return children
+    index = HierarchyIndex.of(hierarchy)
+    return {str(i): index.rows[i] for i in index.children(contour_index)}
 
 
 def get_sorted_contours_by_parent(contours, hierarchy, discard_contours_without_parent=True):
     """
     Maps the given contours by their parent and groups them together.
     :param contours: Contours you want to sort
-    :param hierarchy: Hierarchy of the contours
+    :param hierarchy: Hierarchy or HierarchyIndex of the contours
     :param discard_contours_without_parent: Defines if contours without parent (-1) are dropped
                 true    => skip those contours
                 false   => keep those contours
     :return: Dictionary that contains the parent ids as key and their contours as list
     """
-    sorted_contours = {}
-    for i, hierarchy_entry in enumerate(hierarchy[0]):
-        contour = contours[i]
-        parent_id = hierarchy_entry[3]
+    groups = HierarchyIndex.of(hierarchy).group_by_parent(discard_contours_without_parent)
+    return {parent_id: [contours[i] for i in children] for parent_id, children in groups.items()}
 
-        if discard_contours_without_parent and parent_id == -1:
-            pass
-        else:
-            if parent_id not in sorted_contours:
-                sorted_contours[parent_id] = []
-            sorted_contours[parent_id].append(contour)
 
-    return sorted_contours
+def group_contours_by_x_pos(contours):
+    """
+    Groups the contours that are stacked on top of each other by their bounding boxes (see group_boxes_by_x_pos).
+    Stacks in the same column start at the same x value, so the groups are returned as list instead of by x value.
+    :param contours: Contours you want to group
+    :return: List with the contours of each group, ordered like group_boxes_by_x_pos
+    """
+    boxes = np.array([cv2.boundingRect(c) for c in contours], dtype=np.int32).reshape(-1, 4)
+    return [[contours[i] for i in positions] for positions in group_boxes_by_x_pos(boxes)]
 
 
-def group_contours_by_x_pos(contours):
+def group_boxes_by_x_pos(boxes, x_tolerance=10, y_tolerance=10):
     """
-    Keys will be the first x value that was found for a group. Values of each key will be the contours that are within
-    the tolerance of the x value (respectively the key).
-    :param contours:
-    :return:
+    Groups bounding boxes that are stacked on top of each other, such as the compartments of a class. The boxes are
+    swept in the order of their x values and a group takes all boxes whose x value is within the tolerance of the first
+    x value of the group. Each of these groups is then sorted by y and split where a box does not start within the
+    tolerance of the bottom of the box above it.
+    :param boxes: Array of shape (n, 4), where each row is (x, y, w, h)
+    :param x_tolerance: Maximum distance an x value can have to the first x value of a group
+    :param y_tolerance: Maximum gap between two stacked boxes
+    :return: List of arrays with the positions of the boxes of each group. The positions of a group are sorted and
+             the groups are ordered by their first position.
     """
-    tolerance = 10
-    group = {}
-    for c in contours:
-        x, y, w, h = cv2.boundingRect(c)
+    boxes = np.asarray(boxes).reshape(-1, 4)
+    if len(boxes) == 0:
+        return []
+
+    x, y, h = boxes[:, 0], boxes[:, 1], boxes[:, 3]
 
-        was_added = False
-        for key in group.keys():
-            if (int(key) - tolerance) <= x <= (int(key) + tolerance):
-                group[key].append(c)
-                was_added = True
-                break
+    # Sweep along x, a new column starts where an x value leaves the tolerance of the first x value of the column
+    order = np.argsort(x, kind='stable')
+    columns = []
+    start = 0
+    for k in range(1, len(order) + 1):
+        if k == len(order) or x[order[k]] > x[order[start]] + x_tolerance:
+            columns.append(order[start:k])
+            start = k
 
-        if not was_added:
-            if x not in group:
-                group[x] = []
-            group[x].append(c)
+    # Split each column where the boxes are not adjacent in y
+    groups = []
+    for column in columns:
+        column = column[np.argsort(y[column], kind='stable')]
+        bottoms = np.maximum.accumulate(y[column] + h[column])
+        splits = np.flatnonzero(y[column][1:] > bottoms[:-1] + y_tolerance) + 1
+        groups.extend(np.sort(g) for g in np.split(column, splits))
 
-    return group
+    return sorted(groups, key=lambda g: g[0])
 
 
 def create_canny_edge_image(image, min=100, max=200):
@@ -481,45 +607,88 @@ def dilate(image, kernel=np.ones((5,5), np.uint8), iterations=1):
     return cv2.dilate(image, kernel, iterations)
 
 
-def remove_generic_entities_in_image(image, generic_entities, type=None, preprocess=True):
+def remove_generic_entities_in_image(image, generic_entities, type=None, preprocess=True, preprocessed_image=None):
     """
     Removes the given generic entities from the image. Uses the contours of the contained shapes in a generic entity.
     The generic entities that you want to be removed can be filtered by a type. If no type is given, all generic
-    entities will be removed.
+    entities will be removed. The regions of all entities are collected in one mask, which is removed at once.
     :param image: Original image (not modified) you want the generic entities removed from
     :param generic_entities: List of generic entities
     :param type: The type of the generic entities you want to remove (None if you want to remove all)
+    :param preprocess: Defines whether the entities are removed from the preprocessed image
+    :param preprocessed_image: Already preprocessed image (see ShapeDetector.preprocessed_image), which is used instead
+                               of preprocessing the image again
     :return: The image with the generic entitites removed
     """
-    image = image.copy()
-
     if preprocess:
-        image = preprocess_image(image)
+        image = preprocess_image(image) if preprocessed_image is None else preprocessed_image
 
     if type is not None:
         generic_entities = filter(lambda x: x.type == type, generic_entities)
 
-    for e in generic_entities:
-        contours = [s.contour for s in e.shapes]
-        image = remove_contours_in_image(image, contours)
-
-    return image
+    contours = [s.contour for e in generic_entities for s in e.shapes]
+    return remove_contours_in_image(image, contours)
 
 
 def remove_contours_in_image(image, contours):
     """
-    Places white rectangles over the given contours in order to remove them from the given image. The white rectangles
-    are drawn bigger than the contours themselves. The amount the drawn rectangle is bigger is defined by the
-    EROSION_BY constant. Default is 5 pixel.
-    :param image: Image the contours will be removed from
+    Places rectangles in the CONTOUR_REMOVAL_COLOR over the given contours in order to remove them from the given
+    image. The rectangles are drawn bigger than the contours themselves. The amount the drawn rectangle is bigger is
+    defined by the EROSION_BY constant. Default is 5 pixel.
+    :param image: Image the contours will be removed from (not modified)
     :param contours: Contours that will be removed
     :return: The image with removed contours
     """
-    image = image.copy()
-    for c in contours:
-        (x, y, w, h) = cv2.boundingRect(c)
-        cv2.rectangle(image, (x-EROSION_BY, y-EROSION_BY), (x+w+EROSION_BY, y+h+EROSION_BY), CONTOUR_REMOVAL_COLOR, -1)
-    return image
+    return remove_boxes_in_image(image, [cv2.boundingRect(c) for c in contours])
+
+
+def remove_boxes_in_image(image, boxes, offset=(0, 0)):
+    """
+    Removes the given bounding boxes from the given image like remove_contours_in_image.
+    :param image: Image, or region of a larger image, the boxes will be removed from (not modified)
+    :param boxes: Bounding boxes as (x, y, w, h) tuples
+    :param offset: (x, y) position of the region in the larger image the boxes are given in
+    :return: The image with removed boxes
+    """
+    boxes = np.array(boxes, dtype=np.int64).reshape(-1, 4) - np.array([offset[0], offset[1], 0, 0])
+    mask = rectangles_mask(image.shape[:2], grow_boxes(boxes, EROSION_BY), inverted=True)
+
+    # The removal color is black, so removing is a single AND with the inverted mask
+    return cv2.bitwise_and(image, image, mask=mask)
+
+
+def grow_boxes(boxes, by):
+    """
+    Grows the given bounding boxes by the given amount of pixels on each side (see grow_box).
+    :param boxes: Array of shape (n, 4), where each row is (x, y, w, h)
+    :param by: Pixels that are added on each side
+    :return: Array of shape (n, 4) with the grown bounding boxes
+    """
+    return np.asarray(boxes) + np.array([-by, -by, 2 * by, 2 * by])
+
+
+def rectangles_mask(shape, boxes, inverted=False):
+    """
+    Creates a mask with all given rectangles filled. Each rectangle covers the pixels from (x, y) up to and including
+    (x + w, y + h), like cv2.rectangle. The mask is a full frame, but the rectangles are clipped to it at once and
+    only their own pixels are written afterwards.
+    :param shape: (height, width) of the mask
+    :param boxes: Array of shape (n, 4), where each row is (x, y, w, h)
+    :param inverted: If True, covered pixels are 0 and all other pixels 255, which saves inverting the mask
+    :return: Mask as uint8 image, where covered pixels are 255 (0 if inverted)
+    """
+    height, width = shape
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    x1 = np.clip(boxes[:, 0], 0, width)
+    y1 = np.clip(boxes[:, 1], 0, height)
+    x2 = np.clip(boxes[:, 0] + boxes[:, 2] + 1, 0, width)
+    y2 = np.clip(boxes[:, 1] + boxes[:, 3] + 1, 0, height)
+
+    background, value = (255, 0) if inverted else (0, 255)
+    mask = np.full((height, width), background, dtype=np.uint8)
+    for a, b, c, d in zip(y1.tolist(), y2.tolist(), x1.tolist(), x2.tolist()):
+        mask[a:b, c:d] = value
+    return mask
 
 
 def create_inverted_image(image):
@@ -551,12 +720,10 @@ def angle_for_slopes(m1, m2):
     Calculates the angle between two slopes.
     :param m1: Slope a
     :param m2: Slope b
-    :return: Returns the angle in degrees
+    :return: Returns the angle in degrees, between 0 and 90. Infinite slopes are treated as vertical lines.
     """
-    m1 = float(m1)
-    m2 = float(m2)
-    talpha = np.absolute((m1 - m2) / (1 + (m1 * m2)))
-    return np.rad2deg(np.arctan(talpha))
+    alpha = np.absolute(np.rad2deg(np.arctan(float(m1)) - np.arctan(float(m2))))
+    return min(alpha, 180 - alpha)
 
 
 def angle_between_lines(line_a, line_b):
@@ -568,7 +735,6 @@ def angle_between_lines(line_a, line_b):
     """
     slope_a = line_a.slope()
     slope_b = line_b.slope()
-    log(f"angle between line A and line B: {angle_for_slopes(slope_a, slope_b)}")
     return angle_for_slopes(slope_a, slope_b)
 
 
@@ -584,6 +750,28 @@ def is_point_in_area(p1, area):
     return ax <= px <= ax+aw and ay <= py <= ay+ah
 
 
+def grow_box(box, by):
+    """
+    Grows the given bounding box by the given amount of pixels on each side.
+    :param box: Bounding box as tuple (x, y, w, h)
+    :param by: Pixels that are added on each side
+    :return: The grown bounding box as tuple (x, y, w, h)
+    """
+    x, y, w, h = box
+    return x - by, y - by, w + 2 * by, h + 2 * by
+
+
+def union_box(boxes):
+    """
+    Returns the bounding box that contains all given bounding boxes.
+    :param boxes: List of bounding boxes as tuples (x, y, w, h)
+    :return: The bounding box as tuple (x, y, w, h)
+    """
+    x = min(b[0] for b in boxes)
+    y = min(b[1] for b in boxes)
+    return x, y, max(b[0] + b[2] for b in boxes) - x, max(b[1] + b[3] for b in boxes) - y
+
+
 def do_bounding_boxes_intersect(bb_a, bb_b):
     """
     Checks if the given bounding boxes intersect each other.
@@ -50,7 +50,7 @@ if __name__ == '__main__':
     #shape_detector.image = util.label_entities_in_image(assoc_entities, shape_detector.image)
 
     line_detector = LineDetector()
-    line_detector.init_with_image(shape_detector.image)
+    line_detector.init_with_context(shape_detector.context)
     line_detector.find_lines()
     lines = line_detector.filter_lines(min_length=100, max_length=110)
     log(f"{len(lines)} lines found")
@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import cv2
+import numpy as np
+
+from detector import batch
+
+
+def process_or_crash(img_path, opts, output_path):
+    """
+    Replaces batch.process_image in the worker processes. Kills the worker the first time an image named crash is
+    processed and fails for images named broken, all other images succeed without being detected.
+    """
+    name = os.path.basename(img_path)
+    marker = os.path.join(output_path, name + ".crashed")
+    if name.startswith("crash") and not os.path.exists(marker):
+        open(marker, 'w').close()
+        os._exit(1)
+    if name.startswith("broken"):
+        return img_path, None, 0.0, "ValueError: broken"
+    time.sleep(0.05)
+    return img_path, os.path.join(output_path, name), 0.05, None
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output = os.path.join(self.directory, "output")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def create_images(self, *names):
+        paths = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            cv2.imwrite(path, np.full((20, 20, 3), 255, dtype=np.uint8))
+            paths.append(path)
+        return paths
+
+    def test_collect_images(self):
+        a, b, c = self.create_images("a.png", "sub/b.jpg", "sub/c.png")
+        open(os.path.join(self.directory, "notes.txt"), 'w').close()
+        file_list = os.path.join(self.directory, "list.lst")
+        with open(file_list, 'w') as f:
+            f.write(f"# images\n{c}\n\n{a}\n")
+
+        self.assertEqual(batch.collect_images([self.directory]), [a, b, c])
+        self.assertEqual(batch.collect_images([os.path.join(self.directory, "sub", "*.png"), a, file_list]), [c, a])
+
+    def test_output_filenames_differ_for_images_with_the_same_name(self):
+        a, b = self.create_images("a/x.png", "b/x.png")
+        self.assertNotEqual(batch.output_filename(a), batch.output_filename(b))
+        self.assertEqual(batch.output_filename(a), batch.output_filename(a))
+        self.assertTrue(batch.output_filename(a).startswith("x-"))
+
+    def test_process_image_returns_the_error(self):
+        img_path, output, _, error = batch.process_image(os.path.join(self.directory, "missing.png"), {}, self.output)
+        self.assertIsNone(output)
+        self.assertIn("Image doesn't exist", error)
+
+    def run_batch(self, paths, retries):
+        process_image = batch.process_image
+        batch.process_image = process_or_crash
+        try:
+            return batch.run(paths, {}, self.output, workers=2, retries=retries, backoff=0.01)
+        finally:
+            batch.process_image = process_image
+
+    def test_dead_worker_fails_its_images_and_the_batch_continues(self):
+        paths = self.create_images("a.png", "crash.png", "b.png", "c.png", "d.png", "e.png")
+        results = self.run_batch(paths, retries=0)
+
+        self.assertEqual(sorted(r[0] for r in results), sorted(paths))
+        errors = {os.path.basename(r[0]): r[3] for r in results}
+        self.assertIn("BrokenProcessPool", errors["crash.png"])
+        self.assertIsNone(errors["e.png"])
+
+    def test_failed_images_are_retried(self):
+        paths = self.create_images("a.png", "crash.png", "broken.png", "b.png")
+        results = self.run_batch(paths, retries=2)
+
+        self.assertEqual(sorted(r[0] for r in results), sorted(paths))
+        errors = {os.path.basename(r[0]): r[3] for r in results}
+        self.assertEqual(errors, {"a.png": None, "crash.png": None, "broken.png": "ValueError: broken", "b.png": None})
+
+
+if __name__ == '__main__':
+    unittest.main()
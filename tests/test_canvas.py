@@ -0,0 +1,52 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from detector.canvas import Canvas
+
+
+class CanvasTest(unittest.TestCase):
+
+    def test_render_equals_drawing_one_by_one(self):
+        image = np.full((120, 160, 3), 255, dtype=np.uint8)
+        contour = np.array([[[20, 20]], [[60, 20]], [[60, 70]], [[20, 70]]], dtype=np.int32)
+
+        canvas = Canvas()
+        canvas.line((0, 0), (159, 119), (0, 0, 255))
+        canvas.line((0, 119), (159, 0), (0, 0, 255))
+        canvas.polyline([(10, 100), (80, 60), (150, 100)], (0, 255, 0), 3)
+        canvas.rectangle((90, 10), (140, 50), (255, 0, 0), -1)
+        canvas.contours([contour], (0, 128, 0))
+        canvas.text("A", (100, 90), color=(0, 0, 0))
+
+        expected = image.copy()
+        cv2.line(expected, (0, 0), (159, 119), (0, 0, 255), 2)
+        cv2.line(expected, (0, 119), (159, 0), (0, 0, 255), 2)
+        cv2.polylines(expected, [np.array([(10, 100), (80, 60), (150, 100)], dtype=np.int32)], False, (0, 255, 0), 3)
+        cv2.rectangle(expected, (90, 10), (140, 50), (255, 0, 0), -1)
+        cv2.drawContours(expected, [contour], -1, (0, 128, 0), 2)
+        cv2.putText(expected, "A", (100, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 0, 0), 1, cv2.LINE_AA)
+
+        self.assertTrue(np.array_equal(canvas.render(image), expected))
+        self.assertTrue(np.all(image == 255))
+
+    def test_batches_keep_the_order(self):
+        canvas = Canvas()
+        canvas.line((0, 0), (1, 1), (0, 0, 0))
+        canvas.line((1, 1), (2, 2), (0, 0, 0))
+        canvas.rectangle((0, 0), (1, 1), (0, 0, 0))
+        canvas.line((2, 2), (3, 3), (0, 0, 0))
+        self.assertEqual([(kind, len(items)) for kind, _, items in canvas._batches()],
+                         [(Canvas.LINE, 2), (Canvas.RECTANGLE, 1), (Canvas.LINE, 1)])
+
+    def test_render_onto_the_image(self):
+        image = np.zeros((10, 10), dtype=np.uint8)
+        canvas = Canvas()
+        canvas.rectangle((2, 2), (5, 5), 255, -1)
+        self.assertIs(canvas.render(image, copy=False), image)
+        self.assertEqual(image[3, 3], 255)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from detector.primitives.entity_store import EntityStore
+from detector.primitives.generic_entity import GenericEntity
+from detector.primitives.shape import Shape
+
+
+def box_shape(x, y, w, h):
+    contour = np.array([[[x, y]], [[x + w, y]], [[x + w, y + h]], [[x, y + h]]], dtype=np.int32)
+    return Shape(contour, bounding_box=(x, y, w, h))
+
+
+class EntityStoreTest(unittest.TestCase):
+
+    def test_ids_follow_the_order_of_the_entities(self):
+        entities = [GenericEntity(t) for t in "abab"]
+        store = EntityStore(entities[:2])
+        store.extend(entities[2:])
+        self.assertEqual([e.id for e in entities], [0, 1, 2, 3])
+        self.assertEqual(list(store), entities)
+        self.assertIs(store.get(2), entities[2])
+        self.assertEqual(len(store), 4)
+
+    def test_of_type(self):
+        entities = [GenericEntity(t) for t in "abcab"]
+        store = EntityStore(entities)
+        self.assertEqual(store.of_type(["a"]), [entities[0], entities[3]])
+        self.assertEqual(store.of_type(["b", "a"]), [entities[0], entities[1], entities[3], entities[4]])
+        self.assertEqual(store.of_type(["unknown"]), [])
+
+    def test_retype_moves_the_entity_to_the_index_of_its_new_type(self):
+        entities = [GenericEntity(t) for t in "aab"]
+        store = EntityStore(entities)
+        self.assertEqual(len(store.of_type(["a"])), 2)
+
+        entities[0].type = "b"
+        self.assertEqual(store.of_type(["a"]), [entities[1]])
+        self.assertEqual(store.of_type(["b"]), [entities[0], entities[2]])
+
+    def test_of_type_returns_a_copy(self):
+        store = EntityStore([GenericEntity("a")])
+        store.of_type(["a"]).clear()
+        self.assertEqual(len(store.of_type(["a"])), 1)
+
+
+class GenericEntityTest(unittest.TestCase):
+
+    def test_bounding_box_is_updated_when_a_shape_is_added(self):
+        entity = GenericEntity("a")
+        entity.add_shape(box_shape(10, 10, 50, 20))
+        entity.add_shape(box_shape(10, 30, 50, 40))
+        self.assertEqual(entity.bounding_box(adjustment=0), (10, 10, 50, 60))
+        self.assertEqual(entity.bounding_box(adjustment=2), (8, 8, 54, 64))
+
+        entity.add_shape(box_shape(5, 70, 80, 10))
+        self.assertEqual(entity.bounding_box(adjustment=0), (5, 10, 80, 70))
+
+        entity.set_shape(2, box_shape(10, 70, 50, 30))
+        self.assertEqual(entity.bounding_box(adjustment=0), (10, 10, 50, 90))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from detector import util
+from detector.primitives.hierarchy_index import HierarchyIndex
+
+
+def draw_nested_boxes(seed):
+    """ Draws random boxes, some of them nested up to four levels deep. """
+    rng = np.random.default_rng(seed)
+    image = np.zeros((400, 400), dtype=np.uint8)
+    for _ in range(6):
+        x, y = rng.integers(0, 250, 2)
+        size = int(rng.integers(60, 140))
+        for level in range(int(rng.integers(1, 5))):
+            inset = level * 12
+            if size - 2 * inset > 8:
+                cv2.rectangle(image, (int(x) + inset, int(y) + inset), (int(x) + size - inset, int(y) + size - inset),
+                              255, 2)
+    return image
+
+
+class HierarchyIndexTest(unittest.TestCase):
+    """ Compares the index with the scans over the whole hierarchy, that it replaces. """
+
+    def hierarchies(self):
+        for seed in range(10):
+            _, contours, hierarchy = util.detect_contours(draw_nested_boxes(seed))
+            yield contours, hierarchy
+
+    def test_children_and_parents(self):
+        for _, hierarchy in self.hierarchies():
+            index = HierarchyIndex(hierarchy)
+            rows = hierarchy[0]
+            for i in range(-1, len(rows)):
+                self.assertEqual(index.children(i).tolist(), [k for k, row in enumerate(rows) if row[3] == i])
+                self.assertEqual(util.get_contours_w_parent(hierarchy, i), index.children(i).tolist())
+                self.assertEqual(util.get_contours_w_child(hierarchy, i),
+                                 [k for k, row in enumerate(rows) if row[2] == i])
+            for i in range(len(rows)):
+                self.assertEqual(index.parent(i), rows[i][3])
+                self.assertEqual(index.has_children(i), i in rows[:, 3])
+                self.assertEqual(util.has_no_contour_children(i, hierarchy), rows[i][2] == -1)
+                self.assertEqual(list(util.get_contour_children_for(i, hierarchy)),
+                                 [str(k) for k, row in enumerate(rows) if row[3] == i])
+
+    def test_depths(self):
+        for _, hierarchy in self.hierarchies():
+            index = HierarchyIndex(hierarchy)
+            for i in range(len(index)):
+                depth, parent = 0, hierarchy[0][i][3]
+                while parent != -1:
+                    depth, parent = depth + 1, hierarchy[0][parent][3]
+                self.assertEqual(index.depth(i), depth)
+
+    def test_group_by_parent(self):
+        for contours, hierarchy in self.hierarchies():
+            for discard in (True, False):
+                expected = {}
+                for i, row in enumerate(hierarchy[0]):
+                    if not discard or row[3] != -1:
+                        expected.setdefault(row[3], []).append(i)
+
+                groups = HierarchyIndex(hierarchy).group_by_parent(discard)
+                self.assertEqual(list(groups), list(expected))
+                self.assertEqual({p: c.tolist() for p, c in groups.items()}, expected)
+
+                sorted_contours = util.get_sorted_contours_by_parent(contours, hierarchy, discard)
+                self.assertEqual({p: [id(c) for c in cs] for p, cs in sorted_contours.items()},
+                                 {p: [id(contours[i]) for i in cs] for p, cs in expected.items()})
+
+    def test_without_hierarchy(self):
+        index = HierarchyIndex(None)
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.group_by_parent(), {})
+        self.assertIs(HierarchyIndex.of(index), index)
+
+
+if __name__ == '__main__':
+    unittest.main()
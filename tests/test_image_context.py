@@ -0,0 +1,45 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from detector import util
+from detector.image_context import ImageContext
+
+
+def draw_image():
+    image = np.full((120, 160, 3), 255, dtype=np.uint8)
+    cv2.rectangle(image, (20, 20), (100, 90), (0, 0, 0), 2)
+    cv2.line(image, (110, 10), (150, 110), (40, 40, 200), 3)
+    return image
+
+
+class ImageContextTest(unittest.TestCase):
+
+    def test_planes_equal_the_direct_computation(self):
+        image = draw_image()
+        context = ImageContext(image)
+        self.assertTrue(np.array_equal(context.gray(), cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)))
+        self.assertTrue(np.array_equal(context.binary(), util.preprocess_image(image)))
+        self.assertTrue(np.array_equal(context.edges(100, 150, (9, 9)),
+                                       cv2.Canny(cv2.GaussianBlur(context.gray(), (9, 9), 0), 100, 150)))
+        self.assertTrue(np.array_equal(context.edges(), cv2.Canny(image, 100, 200)))
+
+    def test_gray_image(self):
+        gray = cv2.cvtColor(draw_image(), cv2.COLOR_BGR2GRAY)
+        context = ImageContext(gray)
+        self.assertIs(context.gray(), gray)
+        self.assertTrue(np.array_equal(context.binary(), util.preprocess_image(gray)))
+
+    def test_planes_are_computed_once(self):
+        context = ImageContext(draw_image())
+        binary = context.binary()
+        self.assertIs(context.binary(), binary)
+        self.assertIs(context.blurred((5, 5)), context.blurred([5, 5]))
+        self.assertIsNot(context.blurred((5, 5)), context.blurred((5, 5), gray=True))
+        self.assertEqual((context.misses, context.hits), (4, 4))
+        self.assertEqual(context.stats(), "4 planes, 4 hits, 4 misses")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from detector.image_pyramid import ImagePyramid
+
+
+class ImagePyramidTest(unittest.TestCase):
+
+    def setUp(self):
+        self.full = np.arange(400 * 600, dtype=np.uint32).reshape(400, 600)
+        self.pyramid = ImagePyramid(self.full, cv2.resize(self.full.astype(np.float32), (150, 100)))
+
+    def test_boxes_are_mapped_to_full_resolution(self):
+        self.assertEqual(self.pyramid.scale, 4)
+        self.assertEqual(self.pyramid.to_full((10, 20, 5, 5)), (40, 80, 64, 104))
+        self.assertEqual(self.pyramid.to_full((-5, 90, 200, 50)), (0, 360, 600, 400))
+        self.assertEqual(self.pyramid.to_full((200, 200, 10, 10)), (600, 400, 600, 400))
+
+    def test_points_are_mapped_to_the_coarse_level(self):
+        np.testing.assert_allclose(self.pyramid.to_coarse([[40, 80], [2, 6]]), [[10, 20], [0.5, 1.5]])
+
+    def test_crop(self):
+        image, offset = self.pyramid.crop((10, 20, 5, 5))
+        self.assertEqual(offset, (40, 80))
+        self.assertTrue(np.array_equal(image, self.full[80:104, 40:64]))
+
+        context, offset = self.pyramid.context((10, 20, 5, 5))
+        self.assertTrue(np.array_equal(context.image, image))
+        self.assertEqual(self.pyramid.processed_pixels, 2 * 24 * 24)
+
+    def test_processed_pixels_are_counted_by_all_threads(self):
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(lambda _: self.pyramid.crop((0, 0, 1, 1)), range(1000)))
+        self.assertEqual(self.pyramid.processed_pixels, 1000 * 8 * 8)
+        self.assertIn("64000 of 240000 full resolution pixels processed (26.7%)", self.pyramid.stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
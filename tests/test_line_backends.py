@@ -0,0 +1,70 @@
+import threading
+import unittest
+
+import cv2
+import numpy as np
+
+from detector.constants import options
+from detector.detector import line_backends
+from detector.detector.line_backends import SkeletonBackend
+from detector.primitives.line_set import LineSet
+
+
+def draw_stroke():
+    """ Binary image with a horizontal stroke from x=20 to x=180, that is 5 pixels thick around y=50. """
+    image = np.zeros((100, 200), dtype=np.uint8)
+    cv2.rectangle(image, (20, 48), (180, 52), 255, -1)
+    return image
+
+
+class LineBackendsTest(unittest.TestCase):
+
+    def test_every_backend_finds_the_stroke(self):
+        for name in options.LINE_BACKENDS:
+            segments = line_backends.get(name).detect(draw_stroke())
+            self.assertEqual(segments.shape[1], 4, name)
+            self.assertEqual(segments.dtype, np.float32, name)
+
+            line_set = LineSet(segments).select(LineSet(segments).lengths() > 100)
+            self.assertGreater(len(line_set), 0, name)
+            self.assertTrue(np.all(np.absolute(line_set.segments[:, [1, 3]] - 50) <= 4), name)
+            self.assertTrue(np.all(np.absolute(np.mod(line_set.angles(), 180) - 90) > 85), name)
+
+    def test_skeleton_finds_the_centerline(self):
+        segments = line_backends.get(options.LINE_BACKEND_SKELETON).detect(draw_stroke())
+        self.assertEqual(len(segments), 1)
+        self.assertTrue(np.all(np.absolute(segments[0, [1, 3]] - 50) <= 1))
+
+    def test_thin_keeps_one_pixel_wide_lines(self):
+        mask = draw_stroke() > 0
+        skeleton = SkeletonBackend.thin(mask)
+        self.assertTrue(np.all(skeleton <= mask))
+        self.assertLessEqual(skeleton[:, 100].sum(), 1)
+
+    def test_empty_image(self):
+        for name in options.LINE_BACKENDS:
+            self.assertEqual(line_backends.get(name).detect(np.zeros((50, 50), dtype=np.uint8)).shape, (0, 4))
+
+    def test_backends_are_shared_and_engines_are_per_thread(self):
+        backend = line_backends.get(options.LINE_BACKEND_LSD)
+        self.assertIs(line_backends.get(options.LINE_BACKEND_LSD), backend)
+        self.assertIs(backend.engine(), backend.engine())
+
+        engines = []
+        thread = threading.Thread(target=lambda: engines.append(backend.engine()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(engines[0], backend.engine())
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            line_backends.get("unknown")
+
+    def test_compare(self):
+        results = line_backends.compare(draw_stroke(), repeat=1)
+        self.assertEqual([r[0] for r in results], list(options.LINE_BACKENDS))
+        self.assertTrue(all(count > 0 for _, count, _, _ in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+
+import numpy as np
+
+from detector import util
+from detector.detector.line_detector import LineDetector
+from detector.primitives.line_set import LineSet
+
+
+def random_segments(seed, n=150):
+    """ Random segments, many of them duplicated with jittered and swapped end points. """
+    rng = np.random.default_rng(seed)
+    segments = rng.uniform(0, 600, (n, 4))
+    copies = segments[rng.integers(0, n, n)] + rng.normal(0, 15, (n, 4))
+    swapped = copies[:, [2, 3, 0, 1]]
+    return np.concatenate([segments, np.where(rng.random((n, 1)) < 0.5, copies, swapped)])[rng.permutation(2 * n)]
+
+
+class MergeLinesTest(unittest.TestCase):
+    """ Compares the merging over a PointGrid with the comparison of every line with all kept lines. """
+
+    def brute_force(self, lines, min_line_length=None):
+        kept = []
+        for line in lines:
+            if not LineDetector.is_line_in(kept, line) and (min_line_length is None or line.length() >= min_line_length):
+                kept.append(line)
+        return kept
+
+    def test_merge_indices(self):
+        detector = LineDetector()
+        for seed in range(5):
+            line_set = LineSet(random_segments(seed))
+            lines = line_set.lines()
+            expected = [id(line) for line in self.brute_force(lines)]
+            self.assertEqual([id(lines[i]) for i in detector._merge_indices(line_set)], expected)
+            self.assertEqual([id(line) for line in detector._merge_lines(line_set)], expected)
+
+    def test_purge_lines(self):
+        detector = LineDetector()
+        for seed in range(5):
+            line_set = LineSet(random_segments(seed))
+            lines = line_set.lines()
+            self.assertEqual([id(line) for line in detector._purge_lines(line_set, 100)],
+                             [id(line) for line in self.brute_force(lines, 100)])
+
+
+class SameSlopeLinesTest(unittest.TestCase):
+
+    def test_same_slope_lines_match_the_comparison_of_all_pairs(self):
+        rng = np.random.default_rng(2)
+        segments = rng.uniform(0, 100, (120, 4))
+        segments[::10, 2] = segments[::10, 0]
+        detector = LineDetector()
+        detector.line_set = LineSet(segments)
+        lines = detector.lines
+
+        expected = []
+        for i in range(len(lines)):
+            for j in range(i + 1, len(lines)):
+                slope1, slope2 = lines[i].slope(), lines[j].slope()
+                if slope1 - 5 <= slope2 <= slope1 + 5 or slope2 - 5 <= slope1 <= slope2 + 5:
+                    expected.append(lines[i] if lines[i].length() > lines[j].length() else lines[j])
+        self.assertEqual([id(line) for line in detector._same_slope_lines()], [id(line) for line in expected])
+
+
+class FilterByAngleTest(unittest.TestCase):
+
+    def test_pairs_match_the_comparison_of_all_pairs(self):
+        for seed in range(3):
+            line_set = LineSet(random_segments(seed, 60))
+            lines = line_set.lines()
+            expected = [(l1, l2) for l1 in lines for l2 in lines
+                        if util.angle_between_lines(l1, l2) >= 30 and LineDetector.are_lines_close(l1, l2)]
+            pairs = LineDetector._filter_by_angle(line_set, 30)
+            self.assertEqual([(id(a), id(b)) for a, b in pairs], [(id(a), id(b)) for a, b in expected])
+
+
+class FuseCollinearTest(unittest.TestCase):
+
+    def fuse(self, segments):
+        return LineDetector._fuse_collinear(LineSet(segments), 3, 3, 10).segments.tolist()
+
+    def test_pieces_of_one_line_are_fused(self):
+        self.assertEqual(self.fuse([[0, 0, 40, 0], [45, 0, 100, 0], [108, 0, 150, 0], [0, 50, 100, 50]]),
+                         [[0, 0, 150, 0], [0, 50, 100, 50]])
+
+    def test_gaps_offsets_and_angles_beyond_the_tolerances_are_not_fused(self):
+        for other in ([52, 0, 100, 0], [0, 5, 40, 5], [40, 0, 80, 10]):
+            self.assertEqual(len(self.fuse([[0, 0, 40, 0], other])), 2)
+
+    def test_result_does_not_depend_on_the_order_of_the_segments(self):
+        rng = np.random.default_rng(3)
+        segments = np.array([[0, 0, 40, 0], [100, 0, 45, 0], [108, 0, 150, 0], [10, 30, 10, 80], [10, 85, 10, 120],
+                             [200, 200, 240, 240], [246, 246, 280, 280]], dtype=np.float64)
+        expected = sorted(self.fuse(segments))
+        self.assertEqual(len(expected), 3)
+        for _ in range(20):
+            fused = sorted(self.fuse(segments[rng.permutation(len(segments))]))
+            np.testing.assert_allclose(fused, expected, atol=1e-3)
+
+
+class FuseParallelEdgesTest(unittest.TestCase):
+
+    def fuse(self, segments):
+        return LineDetector._fuse_parallel_edges(LineSet(segments), 8, 3, 0.5).segments.tolist()
+
+    def test_edges_of_a_stroke_are_fused_into_its_centerline(self):
+        self.assertEqual(self.fuse([[0, 0, 100, 0], [100, 4, 0, 4], [0, 50, 100, 50]]),
+                         [[0, 2, 100, 2], [0, 50, 100, 50]])
+
+    def test_edges_across_the_angle_wrap_are_fused(self):
+        fused = self.fuse([[0, 0, 100, 0.2], [100, 4, 0, 4.1]])
+        self.assertEqual(len(fused), 1)
+        np.testing.assert_allclose(fused[0], [0, 2.05, 100, 2.05], atol=0.1)
+
+    def test_edges_with_angles_on_both_sides_of_half_the_tolerance_are_fused(self):
+        u, v = [np.array([np.cos(np.radians(a)), np.sin(np.radians(a))]) for a in (1.4, 1.6)]
+        normal = np.array([-u[1], u[0]])
+        fused = self.fuse([[0, 0, *(100 * u)], [*(100 * v + 4 * normal), *(4 * normal)]])
+        self.assertEqual(len(fused), 1)
+
+    def test_parallel_far_or_side_by_side_edges_are_not_fused(self):
+        for other in ([0, 4, 100, 4], [100, 20, 0, 20], [300, 4, 200, 4]):
+            self.assertEqual(len(self.fuse([[0, 0, 100, 0], other])), 2)
+
+    def test_edges_are_paired_with_their_closest_partner(self):
+        fused = self.fuse([[0, 0, 100, 0], [100, 3, 0, 3], [0, 7, 100, 7]])
+        self.assertEqual(fused, [[0, 1.5, 100, 1.5], [0, 7, 100, 7]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import math
+import unittest
+
+import numpy as np
+
+from detector.primitives.line import Line
+from detector.primitives.line_set import LineSet
+from detector.primitives.point import Point
+
+
+class LineSetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.line_set = LineSet([[0, 0, 30, 40], [10, 10, 10, 0], [5, 5, -5, 5]])
+
+    def test_columns_match_the_lines(self):
+        for i, line in enumerate(self.line_set):
+            self.assertAlmostEqual(self.line_set.lengths()[i], line.length(), places=5)
+            self.assertEqual(tuple(self.line_set.bounding_boxes()[i]), line.bounding_box())
+            x1, y1 = line.start_xy()
+            x2, y2 = line.end_xy()
+            self.assertAlmostEqual(self.line_set.angles()[i], math.degrees(math.atan2(y2 - y1, x2 - x1)))
+
+    def test_lines_are_created_once(self):
+        self.assertIs(self.line_set[0], self.line_set.line(0))
+        self.assertEqual(self.line_set[1].start_xy(), (10, 10))
+        self.assertEqual(len(self.line_set.lines()), 3)
+
+    def test_mask_and_select(self):
+        mask = self.line_set.mask(min_length=10, max_length=50)
+        self.assertEqual(mask.tolist(), [False, True, True])
+        self.assertEqual(self.line_set.select(mask).segments.tolist(), [[10, 10, 10, 0], [5, 5, -5, 5]])
+        self.assertEqual(len(self.line_set.select(np.array([], dtype=np.intp))), 0)
+
+    def test_of(self):
+        self.assertIs(LineSet.of(self.line_set), self.line_set)
+        lines = [Line(Point(1, 2), Point(3, 4))]
+        self.assertEqual(LineSet.of(lines).segments.tolist(), [[1, 2, 3, 4]])
+        self.assertEqual(len(LineSet.of([])), 0)
+        self.assertEqual(LineSet().segments.shape, (0, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
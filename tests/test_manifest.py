@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from detector import batch
+from detector.manifest import Manifest
+
+
+def process_without_detection(img_path, opts, output_path):
+    """ Replaces batch.process_image in the worker processes, images named broken fail. """
+    if os.path.basename(img_path).startswith("broken"):
+        return img_path, None, 0.0, "ValueError: broken"
+    return img_path, os.path.join(output_path, os.path.basename(img_path)), 0.0, None
+
+
+class ManifestTest(unittest.TestCase):
+
+    OPTIONS = {'working_width': 800}
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.manifest = Manifest(os.path.join(self.directory, "manifest.db"))
+
+    def tearDown(self):
+        self.manifest.close()
+        shutil.rmtree(self.directory)
+
+    def create_files(self, *names):
+        paths = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            with open(path, 'wb') as file:
+                file.write(name.encode('utf-8'))
+            paths.append(path)
+        return paths
+
+    def test_done_images_are_skipped(self):
+        a, b = self.create_files("a.png", "b.png")
+        self.assertEqual(self.manifest.prepare([a, b], self.OPTIONS), [a, b])
+        self.manifest.record(a, "a-out.png", 1.0)
+
+        # b was interrupted and is detected again
+        self.assertEqual(self.manifest.prepare([a, b], self.OPTIONS), [b])
+        self.manifest.record(b, "b-out.png", 1.0)
+        self.assertEqual(self.manifest.prepare([a, b], self.OPTIONS), [])
+
+    def test_other_options_detect_all_images_again(self):
+        a, = self.create_files("a.png")
+        self.manifest.prepare([a], self.OPTIONS)
+        self.manifest.record(a, "a-out.png", 1.0)
+        self.assertEqual(self.manifest.prepare([a], {'working_width': 1200}), [a])
+
+    def test_failed_images_are_retried(self):
+        a, b = self.create_files("a.png", "b.png")
+        self.manifest.prepare([a, b], self.OPTIONS)
+        self.manifest.record(a, None, 1.0, "ValueError")
+        self.manifest.record(b, "b-out.png", 1.0)
+
+        self.assertEqual(self.manifest.prepare([a, b], self.OPTIONS), [a])
+        self.manifest.record(a, None, 1.0, "ValueError")
+        self.assertEqual(self.manifest.failures(), [(a, 2, "ValueError")])
+
+    def test_changed_images_are_detected_again(self):
+        a, = self.create_files("a.png")
+        self.manifest.prepare([a], self.OPTIONS)
+        self.manifest.record(a, "a-out.png", 1.0)
+
+        with open(a, 'ab') as file:
+            file.write(b"changed")
+        self.assertEqual(self.manifest.prepare([a], self.OPTIONS), [a])
+        self.assertEqual(self.manifest.progress(), {Manifest.PENDING: 1, Manifest.DONE: 0, Manifest.FAILED: 0})
+
+    def test_touched_images_are_hashed_once(self):
+        a, = self.create_files("a.png")
+        self.manifest.prepare([a], self.OPTIONS)
+        self.manifest.record(a, "a-out.png", 1.0)
+
+        with mock.patch.object(Manifest, 'content_hash', wraps=Manifest.content_hash) as content_hash:
+            self.assertEqual(self.manifest.prepare([a], self.OPTIONS), [])
+            self.assertEqual(content_hash.call_count, 0)
+
+            stat = os.stat(a)
+            os.utime(a, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            self.assertEqual(self.manifest.prepare([a], self.OPTIONS), [])
+            self.assertEqual(content_hash.call_count, 1)
+            self.assertEqual(self.manifest.prepare([a], self.OPTIONS), [])
+            self.assertEqual(content_hash.call_count, 1)
+
+    def test_missing_images_are_returned(self):
+        a, = self.create_files("a.png")
+        missing = os.path.join(self.directory, "missing.png")
+        self.assertEqual(self.manifest.prepare([missing, a], self.OPTIONS), [missing, a])
+        self.manifest.record(missing, None, 0.0, "ValueError: Image doesn't exist")
+        self.assertEqual(self.manifest.prepare([missing, a], self.OPTIONS), [missing, a])
+
+    def test_progress_and_failures_of_the_last_options(self):
+        a, b = self.create_files("a.png", "b.png")
+        self.assertIsNone(self.manifest.last_options_key())
+        self.manifest.prepare([a, b], self.OPTIONS)
+        self.manifest.record(a, None, 1.0, "ValueError")
+        self.manifest.prepare([a], {'working_width': 1200})
+
+        self.assertEqual(self.manifest.last_options_key(), Manifest.options_key({'working_width': 1200}))
+        self.assertEqual(self.manifest.progress(), {Manifest.PENDING: 1, Manifest.DONE: 0, Manifest.FAILED: 0})
+        self.assertEqual(self.manifest.failures(), [])
+        self.assertEqual(self.manifest.progress(self.OPTIONS),
+                         {Manifest.PENDING: 1, Manifest.DONE: 0, Manifest.FAILED: 1})
+        self.assertEqual(self.manifest.failures(opts=self.OPTIONS), [(a, 1, "ValueError")])
+
+    def test_batch_resumes_with_the_manifest(self):
+        paths = self.create_files("a.png", "broken.png", "b.png")
+        output = os.path.join(self.directory, "output")
+        process_image = batch.process_image
+        batch.process_image = process_without_detection
+        try:
+            first = batch.run(paths, self.OPTIONS, output, workers=2, manifest=self.manifest)
+            second = batch.run(paths, self.OPTIONS, output, workers=2, manifest=self.manifest)
+        finally:
+            batch.process_image = process_image
+
+        self.assertEqual(sorted(r[0] for r in first), sorted(paths))
+        self.assertEqual([r[0] for r in second], [paths[1]])
+        self.assertEqual(self.manifest.progress(), {Manifest.PENDING: 0, Manifest.DONE: 2, Manifest.FAILED: 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import cv2
+import numpy as np
+
+from detector import batch
+from detector.manifest import Manifest
+from detector.pipeline import Pipeline, Stage
+from tests.test_tiling import draw_class_diagram
+
+
+class PipelineTest(unittest.TestCase):
+
+    def test_items_run_through_all_stages_in_order(self):
+        pipeline = Pipeline([Stage("add", lambda _, v: v + 1), Stage("double", lambda _, v: v * 2)])
+        results = list(pipeline.run(range(20)))
+        self.assertEqual([(item, value, error) for item, value, error, _ in results],
+                         [(i, (i + 1) * 2, None) for i in range(20)])
+
+    def test_several_workers_process_every_item_once(self):
+        pipeline = Pipeline([Stage("add", lambda _, v: v + 1, workers=3, queue_size=2),
+                             Stage("double", lambda _, v: v * 2, workers=2, queue_size=1)])
+        results = list(pipeline.run(range(50)))
+        self.assertEqual(sorted((item, value) for item, value, _, _ in results), [(i, (i + 1) * 2) for i in range(50)])
+        self.assertEqual([s.items for s in pipeline.stages], [50, 50])
+
+    def test_failed_items_skip_the_following_stages(self):
+        seen = []
+
+        def check(item, value):
+            if item == 3:
+                raise ValueError("item 3")
+            return value
+
+        pipeline = Pipeline([Stage("check", check), Stage("record", lambda item, v: seen.append(item) or v)])
+        results = {item: (value, error) for item, value, error, _ in pipeline.run(range(5))}
+
+        self.assertEqual(seen, [0, 1, 2, 4])
+        self.assertIsNone(results[3][0])
+        self.assertIn("ValueError: item 3", results[3][1])
+        self.assertTrue(all(results[i] == (i, None) for i in (0, 1, 2, 4)))
+
+    def test_queues_are_bounded(self):
+        release = threading.Event()
+        fed = []
+        pipeline = Pipeline([Stage("feed", lambda item, v: fed.append(item) or v, queue_size=2),
+                             Stage("wait", lambda _, v: release.wait() and v, queue_size=2)])
+        results = []
+        consumer = threading.Thread(target=lambda: results.extend(pipeline.run(range(100))))
+        consumer.start()
+        time.sleep(0.2)
+
+        # One item in the waiting stage, two in its queue and one the first stage can not put into the queue
+        self.assertLessEqual(len(fed), 4)
+        release.set()
+        consumer.join()
+        self.assertEqual(len(results), 100)
+        self.assertGreater(pipeline.stages[0].blocked, 0.1)
+
+    def test_metrics(self):
+        pipeline = Pipeline([Stage("sleep", lambda _, v: time.sleep(0.01) or v, workers=2, queue_size=3)])
+        results = list(pipeline.run(range(10)))
+        stage = pipeline.stages[0]
+
+        self.assertEqual(stage.items, 10)
+        self.assertGreaterEqual(stage.busy, 0.1)
+        self.assertTrue(all(seconds >= 0.01 for _, _, _, seconds in results))
+        self.assertEqual(len(pipeline.metrics()), 1)
+        self.assertTrue(pipeline.metrics()[0].startswith("sleep: 10 items, 2 workers, busy "))
+        self.assertTrue(pipeline.metrics()[0].endswith("/3"))
+
+
+class RunPipelineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output = os.path.join(self.directory, "output")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_results_equal_the_results_of_the_process_pool(self):
+        img_path = os.path.join(self.directory, "diagram.png")
+        cv2.imwrite(img_path, draw_class_diagram(0))
+        missing = os.path.join(self.directory, "missing.png")
+
+        results = batch.run_pipeline([img_path, missing], {}, self.output, workers=(1, 1, 2, 1, 1, 1))
+        errors = {path: error for path, _, _, error in results}
+        self.assertIsNone(errors[img_path])
+        self.assertIn("Image doesn't exist", errors[missing])
+
+        pipeline_output = cv2.imread(os.path.join(self.output, batch.output_filename(img_path)))
+        os.remove(os.path.join(self.output, batch.output_filename(img_path)))
+        _, output, _, error = batch.process_image(img_path, {}, self.output)
+        self.assertIsNone(error)
+        self.assertTrue(np.array_equal(pipeline_output, cv2.imread(output)))
+
+    def test_failed_images_are_retried(self):
+        missing = os.path.join(self.directory, "missing.png")
+        with Manifest(os.path.join(self.directory, "manifest.db")) as manifest:
+            results = batch.run_pipeline([missing], {}, self.output, manifest=manifest, retries=2, backoff=0.01)
+            self.assertEqual(len(results), 1)
+            self.assertEqual(manifest.failures()[0][:2], (missing, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
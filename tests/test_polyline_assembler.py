@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from detector.detector.polyline_assembler import PolylineAssembler
+from detector.primitives.line_set import LineSet
+from detector.union_find import UnionFind
+
+
+def assemble(segments, snap_distance=5):
+    return [[tuple(float(v) for v in p) for p in polyline.points_xy()]
+            for polyline in PolylineAssembler(snap_distance).assemble(LineSet(segments))]
+
+
+class PolylineAssemblerTest(unittest.TestCase):
+
+    def test_chain_is_joined_in_order(self):
+        polylines = assemble([[100, 0, 100, 50], [0, 0, 49, 1], [51, -1, 100, 0]])
+        self.assertEqual(polylines, [[(0, 0), (50, 0), (100, 0), (100, 50)]])
+
+    def test_ends_further_than_the_snap_distance_are_not_joined(self):
+        self.assertEqual(len(assemble([[0, 0, 50, 0], [60, 0, 100, 0]])), 2)
+
+    def test_branches_split_the_polylines(self):
+        polylines = assemble([[0, 0, 10, 0], [10, 0, 20, 0], [10, 0, 10, 10]])
+        self.assertEqual(sorted(polylines), [[(0, 0), (10, 0)], [(10, 0), (10, 10)], [(10, 0), (20, 0)]])
+
+    def test_closed_loop(self):
+        polylines = assemble([[0, 0, 10, 0], [10, 0, 10, 10], [10, 10, 0, 10], [0, 10, 0, 0]])
+        self.assertEqual(polylines, [[(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]])
+
+    def test_degenerate_segments_are_dropped(self):
+        self.assertEqual(assemble([[5, 5, 5, 5]]), [])
+        self.assertEqual(assemble(np.zeros((0, 4))), [])
+
+    def test_result_does_not_depend_on_the_order_of_the_segments(self):
+        rng = np.random.default_rng(0)
+        segments = np.array([[0, 0, 100, 0], [100, 30, 100, 0], [100, 30, 300, 30], [400, 0, 400, 80],
+                             [400, 80, 450, 80]], dtype=np.float64)
+        expected = [[(0, 0), (100, 0), (100, 30), (300, 30)], [(400, 0), (400, 80), (450, 80)]]
+        for _ in range(20):
+            self.assertEqual(sorted(assemble(segments[rng.permutation(len(segments))])), expected)
+
+    def test_polylines_run_in_the_direction_of_most_of_their_length(self):
+        segments = np.array([[0, 0, 100, 0], [100, 30, 100, 0], [100, 30, 300, 30]], dtype=np.float64)
+        self.assertEqual(assemble(segments), [[(0, 0), (100, 0), (100, 30), (300, 30)]])
+        self.assertEqual(assemble(segments[:, [2, 3, 0, 1]]), [[(300, 30), (100, 30), (100, 0), (0, 0)]])
+
+
+class UnionFindTest(unittest.TestCase):
+
+    def test_union_and_find(self):
+        union_find = UnionFind(6)
+        union_find.union(0, 1)
+        union_find.union(2, 3)
+        union_find.union(1, 3)
+        roots = union_find.roots()
+        self.assertEqual(len({roots[i] for i in (0, 1, 2, 3)}), 1)
+        self.assertEqual(len(set(roots.tolist())), 3)
+        self.assertEqual(union_find.find(4), 4)
+        self.assertEqual(union_find.union(0, 2), union_find.find(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
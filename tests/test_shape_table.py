@@ -0,0 +1,57 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from detector import util
+from detector.primitives.shape_table import ShapeTable
+from detector.primitives.shape_type import ShapeType
+
+
+def draw_shapes():
+    image = np.zeros((200, 300), dtype=np.uint8)
+    cv2.rectangle(image, (10, 10), (150, 190), 255, 2)
+    cv2.rectangle(image, (30, 30), (60, 60), 255, 2)
+    cv2.fillPoly(image, [np.array([[200, 150], [280, 150], [240, 40]], dtype=np.int32)], 255)
+    return image
+
+
+class ShapeTableTest(unittest.TestCase):
+
+    def setUp(self):
+        _, self.contours, self.hierarchy = util.detect_contours(draw_shapes())
+        self.table = ShapeTable(self.contours, self.hierarchy)
+
+    def test_features_match_the_single_contour_functions(self):
+        self.assertEqual(len(self.table), len(self.contours))
+        for i, c in enumerate(self.contours):
+            row = self.table.features[i]
+            self.assertEqual((row['x'], row['y'], row['w'], row['h']), cv2.boundingRect(c))
+            self.assertEqual(row['area'], util.area_contour(c))
+            self.assertEqual(row['shape_type'], util.detect_shape(c))
+            self.assertEqual(row['parent'], self.hierarchy[0][i][3])
+            self.assertEqual(self.table.details(i), util.get_contour_details(c))
+
+    def test_where(self):
+        triangles = self.table.where(shape_type=ShapeType.TRIANGLE)
+        self.assertEqual(len(triangles), 1)
+        self.assertEqual(self.table.features['x'][triangles[0]], 200)
+
+        large = self.table.where(min_area=1000)
+        self.assertTrue(np.all(self.table.features['area'][large] > 1000))
+        self.assertEqual(self.table.where(parent=-1).tolist(), [i for i, h in enumerate(self.hierarchy[0]) if h[3] == -1])
+
+    def test_shapes_are_created_once_on_access(self):
+        shape = self.table.shape(0)
+        self.assertIs(self.table[0], shape)
+        self.assertEqual(shape.contour_index, 0)
+        self.assertEqual(shape.bounding_box(), tuple(self.table.bounding_boxes()[0]))
+
+    def test_empty(self):
+        table = ShapeTable([])
+        self.assertEqual(len(table), 0)
+        self.assertEqual(len(table.where(min_area=0)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
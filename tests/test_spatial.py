@@ -0,0 +1,66 @@
+import math
+import unittest
+
+import numpy as np
+
+from detector import util
+from detector.spatial import BoxIndex, PointGrid
+
+
+class PointGridTest(unittest.TestCase):
+
+    def test_near_contains_all_points_within_the_cell_size(self):
+        rng = np.random.default_rng(0)
+        points = rng.uniform(-200, 200, (300, 2))
+        grid = PointGrid(30)
+        for i, p in enumerate(points):
+            grid.add(p, i)
+
+        for query in rng.uniform(-220, 220, (100, 2)):
+            near = set(grid.near(query))
+            expected = {i for i, p in enumerate(points) if math.dist(p, query) <= 30}
+            self.assertTrue(expected <= near)
+
+    def test_items_added_twice_are_returned_twice(self):
+        grid = PointGrid(10)
+        grid.add((1, 1), "a")
+        grid.add((2, 2), "a")
+        self.assertEqual(grid.near((0, 0)), ["a", "a"])
+        self.assertEqual(grid.near((100, 100)), [])
+
+
+class BoxIndexTest(unittest.TestCase):
+
+    def test_queries_match_the_brute_force_checks(self):
+        rng = np.random.default_rng(1)
+        boxes = [tuple(int(v) for v in (*rng.integers(0, 500, 2), *rng.integers(0, 150, 2))) for _ in range(200)]
+        index = BoxIndex(64)
+        for i, box in enumerate(boxes):
+            index.add(box, i)
+
+        for _ in range(100):
+            query = tuple(int(v) for v in (*rng.integers(-20, 600, 2), *rng.integers(0, 80, 2)))
+            self.assertEqual(index.intersecting(query),
+                             [i for i, b in enumerate(boxes) if util.do_bounding_boxes_intersect(b, query)])
+
+            point = query[:2]
+            self.assertEqual(index.containing(point),
+                             [i for i, b in enumerate(boxes) if util.is_point_in_area(point, b)])
+
+    def test_borders_and_points(self):
+        index = BoxIndex(10)
+        index.add((0, 0, 10, 10), "box")
+        index.add_point((25, 25), "point")
+        self.assertEqual(index.containing((10, 10)), ["box"])
+        self.assertEqual(index.intersecting((10, 10, 15, 15)), ["box", "point"])
+        self.assertEqual(index.intersecting((11, 11, 5, 5)), [])
+
+    def test_items_added_twice_are_returned_once(self):
+        index = BoxIndex(10)
+        index.add((0, 0, 5, 5), "a")
+        index.add((3, 3, 5, 5), "a")
+        self.assertEqual(index.intersecting((0, 0, 20, 20)), ["a"])
+
+
+if __name__ == '__main__':
+    unittest.main()
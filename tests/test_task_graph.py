@@ -0,0 +1,124 @@
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from detector.image_context import ImageContext
+from detector.primitives.entity_store import EntityStore
+from detector.primitives.generic_entity import GenericEntity
+from detector.task_graph import TaskError, TaskGraph
+
+
+class TaskGraphTest(unittest.TestCase):
+
+    def create_graph(self, workers, events):
+        """ Diamond a -> (b, c) -> d, where each task records its start and end. """
+        def task(name):
+            def fn():
+                events.append(("start", name))
+                time.sleep(0.01)
+                events.append(("end", name))
+                return name.upper()
+            return fn
+
+        graph = TaskGraph(workers)
+        graph.add("a", task("a"))
+        graph.add("b", task("b"), after=["a"])
+        graph.add("c", task("c"), after=["a"])
+        graph.add("d", task("d"), after=["b", "c"])
+        return graph
+
+    def test_tasks_start_after_their_dependencies(self):
+        for workers in (1, 2, 4):
+            events = []
+            graph = self.create_graph(workers, events)
+            self.assertEqual(graph.run(), {"a": "A", "b": "B", "c": "C", "d": "D"})
+            for name, (_, after) in graph.tasks.items():
+                start = events.index(("start", name))
+                self.assertTrue(all(events.index(("end", d)) < start for d in after), (workers, events))
+            self.assertEqual(set(graph.seconds), {"a", "b", "c", "d"})
+            self.assertIn("d ", graph.stats())
+
+    def test_one_worker_runs_the_tasks_in_the_order_they_were_added(self):
+        events = []
+        self.create_graph(1, events).run()
+        self.assertEqual([name for event, name in events if event == "start"], ["a", "b", "c", "d"])
+
+    def test_independent_tasks_run_at_the_same_time(self):
+        # Both tasks only pass the barrier if they run at the same time
+        barrier = threading.Barrier(2, timeout=5)
+        graph = TaskGraph(2)
+        graph.add("a", barrier.wait)
+        graph.add("b", barrier.wait)
+        self.assertEqual(sorted(graph.run().values()), [0, 1])
+
+    def test_unknown_dependency(self):
+        graph = TaskGraph()
+        with self.assertRaises(ValueError):
+            graph.add("a", lambda: None, after=["b"])
+
+    def test_error_names_the_failed_task(self):
+        for workers in (1, 2):
+            started = []
+
+            def fail():
+                raise FileNotFoundError("model")
+
+            graph = TaskGraph(workers)
+            graph.add("a", lambda: started.append("a"))
+            graph.add("ocr", fail, after=["a"])
+            graph.add("b", lambda: started.append("b"), after=["ocr"])
+            with self.assertRaises(TaskError) as context:
+                graph.run()
+
+            self.assertEqual(context.exception.task, "ocr")
+            self.assertIsInstance(context.exception.__cause__, FileNotFoundError)
+            self.assertIn("Task ocr failed", str(context.exception))
+            self.assertEqual(started, ["a"])
+
+
+class SharedStateTest(unittest.TestCase):
+
+    THREADS = 8
+
+    def run_threads(self, fn):
+        barrier = threading.Barrier(self.THREADS)
+
+        def run(i):
+            barrier.wait()
+            fn(i)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def test_entity_store_from_several_threads(self):
+        store = EntityStore()
+        self.run_threads(lambda i: [store.add(GenericEntity("ab"[i % 2])) for _ in range(500)])
+
+        self.assertEqual(sorted(e.id for e in store), list(range(self.THREADS * 500)))
+        self.assertEqual(len(store.of_type(["a"])), self.THREADS * 250)
+        self.assertEqual(len(store.of_type(["b"])), self.THREADS * 250)
+
+    def test_image_context_computes_a_plane_once(self):
+        context = ImageContext(np.zeros((10, 10, 3), dtype=np.uint8))
+        computed = []
+
+        def compute():
+            computed.append(1)
+            time.sleep(0.05)
+            return np.ones((10, 10), dtype=np.uint8)
+
+        planes = []
+        self.run_threads(lambda _: planes.append(context.plane("slow", compute)))
+
+        self.assertEqual(len(computed), 1)
+        self.assertEqual((context.misses, context.hits), (1, self.THREADS - 1))
+        self.assertTrue(all(p is planes[0] for p in planes))
+
+
+if __name__ == '__main__':
+    unittest.main()
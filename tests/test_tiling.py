@@ -0,0 +1,175 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from detector import util
+from detector.constants import options
+from detector.detector import DiagramTypeDetector, ShapeDetector
+from detector.converter.class_diagram_converter import ClassDiagramTypes
+from detector.image_context import ImageContext
+from detector.tiling import Tiler, compress_contour, containment_hierarchy, in_box
+
+
+def draw_noise(seed, width=450, height=350):
+    """ Random circles, lines and noise pixels, whose contours are cut by many tile borders. """
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    for _ in range(30):
+        center = tuple(int(v) for v in rng.integers(0, width, 2))
+        cv2.circle(image, center, int(rng.integers(3, 80)), (0, 0, 0), int(rng.integers(1, 4)))
+        p1, p2 = [tuple(int(v) for v in rng.integers(0, width, 2)) for _ in range(2)]
+        cv2.line(image, p1, p2, (0, 0, 0), 1)
+    image[rng.random((height, width)) < 0.02] = 0
+    return image
+
+
+def draw_class_diagram(seed, width=1024):
+    """ Three classes, the first two linked by an inheritance, the last two by a bent association. """
+    rng = np.random.default_rng(seed)
+    height = int(width * 0.7)
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    boxes = []
+    for x in (50, 425, 800):
+        y, w, h = int(rng.integers(50, height - 250)), 150, 180
+        cv2.rectangle(image, (x, y), (x + w, y + h), (0, 0, 0), 3)
+        cv2.line(image, (x, y + h // 4), (x + w, y + h // 4), (0, 0, 0), 3)
+        cv2.line(image, (x, y + h // 2), (x + w, y + h // 2), (0, 0, 0), 3)
+        boxes.append((x, y, w, h))
+
+    for (ax, ay, aw, ah), (bx, by, bw, bh), inheritance in zip(boxes, boxes[1:], (True, False)):
+        y1, y2, mx = ay + ah // 2, by + bh // 2, (ax + aw + bx) // 2
+        points = [(ax + aw, y1), (mx, y1), (mx, y2), (bx, y2)]
+        if inheritance:
+            triangle = np.array([[bx - 1, y2], [bx - 30, y2 - 15], [bx - 30, y2 + 15]], dtype=np.int32)
+            cv2.polylines(image, [triangle], True, (0, 0, 0), 2)
+            points[-1] = (bx - 30, y2)
+        cv2.polylines(image, [np.array(points, dtype=np.int32)], False, (0, 0, 0), 2)
+    return image
+
+
+def detect(image, tile_size, overlap=64):
+    shape_detector = ShapeDetector(options={'tile_size': tile_size, 'tile_overlap': overlap,
+                                            'working_width': image.shape[1]})
+    shape_detector.load(image)
+    shape_detector.find_shapes()
+    converter = DiagramTypeDetector.find_converter(shape_detector)
+    converter.convert()
+    return converter
+
+
+class TilerTest(unittest.TestCase):
+
+    def test_tile_size_and_overlap_are_checked(self):
+        image = np.zeros((100, 100, 3), dtype=np.uint8)
+        with self.assertRaises(ValueError):
+            Tiler(image, 256, Tiler.MIN_OVERLAP - 1)
+        with self.assertRaises(ValueError):
+            Tiler(image, 255, 128)
+        Tiler(image, 256, 128)
+
+    def test_tiles_start_on_the_grid(self):
+        for tile_size, overlap in ((256, 8), (384, 64), (300, 9), (512, 128)):
+            tiler = Tiler(np.zeros((1000, 1300, 3), dtype=np.uint8), tile_size, overlap)
+            self.assertGreaterEqual(tiler.overlap, overlap)
+            self.assertTrue(all(x % Tiler.GRID == 0 and y % Tiler.GRID == 0 for x, y, _, _ in tiler.tiles()))
+
+    def test_cores_cover_the_image_once(self):
+        for tile_size, overlap in ((256, 8), (300, 33), (512, 128)):
+            tiler = Tiler(np.zeros((700, 1000, 3), dtype=np.uint8), tile_size, overlap)
+            coverage = np.zeros((700, 1000), dtype=np.int32)
+            for region in tiler.tiles():
+                x1, y1, x2, y2 = region
+                self.assertTrue(x2 - x1 <= tile_size and y2 - y1 <= tile_size)
+                cx1, cy1, cx2, cy2 = tiler.core(region)
+                coverage[cy1:cy2, cx1:cx2] += 1
+            self.assertTrue(np.all(coverage == 1))
+
+    def test_binary_of_a_tile_equals_the_region_of_the_whole_binary(self):
+        image = draw_noise(0)
+        whole = ImageContext(image).binary()
+        tiler = Tiler(image, 128, 16)
+        for x1, y1, x2, y2 in tiler.tiles():
+            self.assertTrue(np.array_equal(tiler.binary((x1, y1, x2, y2)), whole[y1:y2, x1:x2]))
+
+    def test_contours_equal_the_contours_of_the_whole_image(self):
+        for seed in range(3):
+            image = draw_noise(seed)
+            for mode in (options.CONTOUR_MODE_NONE, options.CONTOUR_MODE_SIMPLE):
+                _, contours, hierarchy = util.detect_contours(ImageContext(image).binary(), mode)
+                whole = {c.tobytes(): i for i, c in enumerate(contours)}
+
+                for tile_size, overlap in ((64, 8), (100, 10), (200, 33)):
+                    tiled, tiled_hierarchy = Tiler(image, tile_size, overlap).find_contours(mode)
+                    keys = [c.astype(np.int32).tobytes() for c in tiled]
+                    self.assertEqual(sorted(keys), sorted(whole), (seed, mode, tile_size))
+
+                    # Same parents as in the hierarchy of findContours
+                    positions = [whole[k] for k in keys]
+                    parents = [positions[p] if p > -1 else -1 for p in tiled_hierarchy[0][:, 3]]
+                    self.assertEqual(parents, [hierarchy[0][i][3] for i in positions], (seed, mode, tile_size))
+
+    def test_segments_in_an_overlap_belong_to_one_tile(self):
+        rng = np.random.default_rng(0)
+        tiler = Tiler(np.zeros((700, 1000, 3), dtype=np.uint8), 256, 64)
+        segments = np.hstack([rng.uniform(0, 1000, (500, 1)), rng.uniform(0, 700, (500, 1))])
+        segments = np.hstack([segments, segments + rng.uniform(-40, 40, (500, 2))])
+
+        owners = np.zeros(len(segments), dtype=np.int32)
+        for region in tiler.tiles():
+            found = in_box(segments[:, 0:2], region) & in_box(segments[:, 2:4], region)
+            owners += found & tiler.owns_segments(region, segments)
+
+        inside = in_box(segments[:, 2:4], (0, 0, 1000, 700))
+        self.assertTrue(np.all(owners[inside] == 1))
+
+
+class TiledDetectionTest(unittest.TestCase):
+
+    def test_preprocessed_image_does_not_exist_with_tiles(self):
+        shape_detector = ShapeDetector(options={'tile_size': 256, 'tile_overlap': 64})
+        shape_detector.load(draw_noise(0))
+        self.assertIsNone(shape_detector.preprocessed_image)
+        with self.assertRaises(ValueError):
+            shape_detector.get_preprocessed_image()
+
+    def test_entities_do_not_depend_on_the_tile_size(self):
+        for seed in range(3):
+            image = draw_class_diagram(seed)
+            results = {}
+            for tile_size in (0, 512, 384, 256, 200):
+                converter = detect(image, tile_size)
+                counts = [len(converter.get_generic_entities([t])) for t in
+                          (ClassDiagramTypes.CLASS_ENTITY, ClassDiagramTypes.ASSOCIATION_ENTITY,
+                           ClassDiagramTypes.ASSOCIATION_SYMBOL)]
+                ends = sorted([*a.shapes[0].start_xy(), *a.shapes[0].end_xy()]
+                              for a in converter.get_generic_entities([ClassDiagramTypes.ASSOCIATION_ENTITY]))
+                results[tile_size] = counts, np.array(ends, dtype=np.float64)
+
+            counts, ends = results[0]
+            self.assertEqual(counts, [3, 1, 1])
+            for tile_size, (tiled_counts, tiled_ends) in results.items():
+                self.assertEqual(tiled_counts, counts, (seed, tile_size))
+                np.testing.assert_allclose(tiled_ends, ends, atol=0.01, err_msg=f"{seed} {tile_size}")
+
+
+class ContourHelpersTest(unittest.TestCase):
+
+    def test_compress_contour_equals_chain_approx_simple(self):
+        binary = ImageContext(draw_noise(1)).binary()
+        _, full, _ = util.detect_contours(binary, options.CONTOUR_MODE_NONE)
+        _, simple, _ = util.detect_contours(binary, options.CONTOUR_MODE_SIMPLE)
+        for a, b in zip(full, simple):
+            self.assertTrue(np.array_equal(compress_contour(a), b))
+
+    def test_containment_hierarchy(self):
+        self.assertIsNone(containment_hierarchy([]))
+        image = np.zeros((100, 100), dtype=np.uint8)
+        cv2.rectangle(image, (10, 10), (90, 90), 255, 2)
+        cv2.rectangle(image, (30, 30), (50, 50), 255, -1)
+        _, contours, hierarchy = util.detect_contours(image)
+        self.assertTrue(np.array_equal(containment_hierarchy(contours)[0][:, 3], hierarchy[0][:, 3]))
+
+
+if __name__ == '__main__':
+    unittest.main()
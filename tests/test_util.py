@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from detector import util
+
+
+def box_contour(x, y, w, h):
+    return np.array([[[x, y]], [[x + w, y]], [[x + w, y + h]], [[x, y + h]]], dtype=np.int32)
+
+
+class GroupByXPosTest(unittest.TestCase):
+
+    def test_boxes_are_grouped_into_columns_and_stacks(self):
+        boxes = [(10, 10, 100, 20), (300, 10, 100, 20), (12, 30, 100, 40), (18, 70, 100, 30), (305, 32, 100, 20)]
+        groups = util.group_boxes_by_x_pos(boxes)
+        self.assertEqual([g.tolist() for g in groups], [[0, 2, 3], [1, 4]])
+
+    def test_x_values_beyond_the_tolerance_start_a_new_column(self):
+        groups = util.group_boxes_by_x_pos([(10, 10, 100, 20), (21, 30, 100, 20)])
+        self.assertEqual([g.tolist() for g in groups], [[0], [1]])
+
+    def test_gaps_beyond_the_tolerance_split_a_column(self):
+        groups = util.group_boxes_by_x_pos([(10, 10, 100, 20), (10, 50, 100, 20), (10, 30, 100, 5)])
+        self.assertEqual([g.tolist() for g in groups], [[0, 2], [1]])
+
+    def test_empty(self):
+        self.assertEqual(util.group_boxes_by_x_pos(np.zeros((0, 4))), [])
+        self.assertEqual(util.group_contours_by_x_pos([]), [])
+
+    def test_stacks_at_the_same_x_are_separate_groups(self):
+        contours = [box_contour(10, y, 100, 20) for y in (10, 30, 50, 300, 320, 340)]
+        groups = util.group_contours_by_x_pos(contours)
+        self.assertEqual([[id(c) for c in g] for g in groups], [[id(c) for c in contours[:3]],
+                                                                [id(c) for c in contours[3:]]])
+
+
+class RemoveContoursTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(1, 256, (120, 160), dtype=np.uint8)
+        self.contours = [box_contour(int(x), int(y), int(w), int(h)) for x, y, w, h in
+                         zip(rng.integers(-20, 160, 8), rng.integers(-20, 120, 8), rng.integers(1, 40, 8),
+                             rng.integers(1, 40, 8))]
+
+    def test_removal_equals_drawing_filled_rectangles(self):
+        expected = self.image.copy()
+        for c in self.contours:
+            x, y, w, h = cv2.boundingRect(c)
+            e = util.EROSION_BY
+            cv2.rectangle(expected, (x - e, y - e), (x + w + e, y + h + e), util.CONTOUR_REMOVAL_COLOR[0], -1)
+
+        self.assertTrue(np.array_equal(util.remove_contours_in_image(self.image, self.contours), expected))
+        self.assertTrue(np.all(self.image > 0))
+
+    def test_removal_in_a_region_equals_the_region_of_the_removal(self):
+        boxes = [cv2.boundingRect(c) for c in self.contours]
+        whole = util.remove_boxes_in_image(self.image, boxes)
+        region = util.remove_boxes_in_image(self.image[30:90, 40:120], boxes, offset=(40, 30))
+        self.assertTrue(np.array_equal(region, whole[30:90, 40:120]))
+
+    def test_rectangles_mask(self):
+        mask = util.rectangles_mask((10, 10), [(2, 3, 4, 2), (8, 8, 5, 5)])
+        expected = np.zeros((10, 10), dtype=np.uint8)
+        cv2.rectangle(expected, (2, 3), (6, 5), 255, -1)
+        cv2.rectangle(expected, (8, 8), (13, 13), 255, -1)
+        self.assertTrue(np.array_equal(mask, expected))
+        self.assertTrue(np.array_equal(util.rectangles_mask((10, 10), [(2, 3, 4, 2), (8, 8, 5, 5)], inverted=True),
+                                       255 - expected))
+
+
+class LoadImageTest(unittest.TestCase):
+
+    def test_reduced_decode_is_close_to_resizing_the_full_image(self):
+        image = np.full((700, 2000, 3), 255, dtype=np.uint8)
+        for x in range(0, 2000, 100):
+            cv2.rectangle(image, (x + 10, 100), (x + 80, 600), (0, 0, 0), 8)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "image.png")
+            cv2.imwrite(path, image)
+            for gray in (False, True):
+                working_copy = util.load_image(path, width=480, gray=gray)
+                expected = util.create_working_copy_of_image(util.to_gray(image) if gray else image, 480)
+                self.assertEqual(working_copy.shape, expected.shape)
+                self.assertLess(np.mean(np.absolute(working_copy.astype(int) - expected)), 10)
+
+            self.assertEqual(util.load_image(path, width=3000).shape, (1050, 3000, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()